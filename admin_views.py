@@ -0,0 +1,479 @@
+"""Flask-Admin 管理后台
+
+导入 Flask-Admin 较慢，本模块只在首次访问 /admin 时由 app.LazyAdmin 加载，
+后台作为独立的子应用运行，与主站共用配置、数据库会话和登录状态。
+"""
+from datetime import datetime, timedelta
+import time
+
+from flask import Flask, current_app, request, redirect, url_for, flash
+from flask_admin import Admin, expose, AdminIndexView, BaseView
+from flask_admin.contrib.sqla import ModelView
+from flask_login import current_user
+from sqlalchemy import case, func
+from sqlalchemy.orm import joinedload
+from werkzeug.routing import BuildError
+
+from caching import BackgroundSnapshot
+from app import (db, database_router, login_manager, profiler, user_cache, sync_match_candidates, reconcile_unread_counts,
+                 duplicate_indexes, User, LostItem, FoundItem, Comment, Message, Favorite, Report, ClaimRequest, UserRating,
+                 Place, PlaceAlias)
+
+# Flask-Admin 增强管理界面
+class SecureModelView(ModelView):
+    """安全的基础视图"""
+    def is_accessible(self):
+        return current_user.is_authenticated and current_user.is_admin
+    
+    def inaccessible_callback(self, name, **kwargs):
+        flash('需要管理员权限才能访问', 'danger')
+        return redirect(url_for('login'))
+
+class UserAdminView(SecureModelView):
+    """用户管理视图"""
+    column_list = ['id', 'username', 'email', 'phone', 'is_admin', 'created_at']
+    column_searchable_list = ['username', 'email', 'phone']
+    column_filters = ['is_admin', 'created_at']
+    column_sortable_list = ['id', 'username', 'email', 'created_at']
+    column_labels = {
+        'id': 'ID',
+        'username': '用户名',
+        'email': '邮箱',
+        'phone': '手机号',
+        'is_admin': '管理员',
+        'created_at': '注册时间'
+    }
+    column_descriptions = {
+        'username': '用户登录名',
+        'is_admin': '是否为管理员权限'
+    }
+    form_excluded_columns = ['password_hash', 'unread_count', 'rating_count', 'rating_sum',
+                             'rating_1', 'rating_2', 'rating_3', 'rating_4', 'rating_5', 'lost_items', 'found_items', 'comments', 'messages_sent', 'messages_received']
+    can_export = True
+    export_types = ['csv', 'xlsx']
+    
+    def on_model_change(self, form, model, is_created):
+        if is_created and hasattr(form, 'password'):
+            model.set_password(form.password.data)
+        # 提交后 User 的 after_update 事件还会再清除一次，避免提交前被其他请求重新缓存旧数据
+        if not is_created:
+            user_cache.delete(model.id)
+
+class LostItemAdminView(SecureModelView):
+    """失物管理视图"""
+    column_list = ['id', 'title', 'category', 'location', 'status', 'user_id', 'views', 'created_at']
+    column_searchable_list = ['title', 'description', 'location']
+    column_filters = ['category', 'status', 'created_at', 'lost_date']
+    column_sortable_list = ['id', 'title', 'views', 'created_at']
+    column_labels = {
+        'id': 'ID',
+        'title': '标题',
+        'description': '描述',
+        'category': '类别',
+        'location': '地点',
+        'lost_date': '丢失日期',
+        'status': '状态',
+        'contact_info': '联系方式',
+        'reward': '酬谢',
+        'user_id': '发布者ID',
+        'views': '浏览量',
+        'created_at': '发布时间'
+    }
+    column_formatters = {
+        'category': lambda v, c, m, p: {
+            'electronics': '电子产品',
+            'documents': '证件文件',
+            'accessories': '饰品配饰',
+            'bags': '包袋',
+            'keys': '钥匙',
+            'pets': '宠物',
+            'other': '其他'
+        }.get(m.category, m.category),
+        'status': lambda v, c, m, p: {
+            'lost': '寻找中',
+            'found': '已找到',
+            'closed': '已关闭'
+        }.get(m.status, m.status)
+    }
+    form_excluded_columns = ['minhash']
+    can_export = True
+    export_types = ['csv', 'xlsx']
+    
+    def after_model_change(self, form, model, is_created):
+        sync_match_candidates(model)
+        db.session.commit()
+
+class FoundItemAdminView(SecureModelView):
+    """拾物管理视图"""
+    column_list = ['id', 'title', 'category', 'location', 'status', 'user_id', 'views', 'created_at']
+    column_searchable_list = ['title', 'description', 'location']
+    column_filters = ['category', 'status', 'created_at', 'found_date']
+    column_sortable_list = ['id', 'title', 'views', 'created_at']
+    column_labels = {
+        'id': 'ID',
+        'title': '标题',
+        'description': '描述',
+        'category': '类别',
+        'location': '地点',
+        'found_date': '拾取日期',
+        'status': '状态',
+        'contact_info': '联系方式',
+        'user_id': '发布者ID',
+        'views': '浏览量',
+        'created_at': '发布时间'
+    }
+    column_formatters = {
+        'category': lambda v, c, m, p: {
+            'electronics': '电子产品',
+            'documents': '证件文件',
+            'accessories': '饰品配饰',
+            'bags': '包袋',
+            'keys': '钥匙',
+            'pets': '宠物',
+            'other': '其他'
+        }.get(m.category, m.category),
+        'status': lambda v, c, m, p: {
+            'unclaimed': '待认领',
+            'claimed': '已认领',
+            'returned': '已归还'
+        }.get(m.status, m.status)
+    }
+    form_excluded_columns = ['minhash']
+    can_export = True
+    export_types = ['csv', 'xlsx']
+    
+    def after_model_change(self, form, model, is_created):
+        sync_match_candidates(model)
+        db.session.commit()
+
+class CommentAdminView(SecureModelView):
+    """评论管理视图"""
+    column_list = ['id', 'content', 'user_id', 'lost_item_id', 'found_item_id', 'created_at']
+    column_searchable_list = ['content']
+    column_filters = ['created_at', 'user_id']
+    column_sortable_list = ['id', 'created_at']
+    column_labels = {
+        'id': 'ID',
+        'content': '评论内容',
+        'user_id': '评论者ID',
+        'lost_item_id': '失物ID',
+        'found_item_id': '拾物ID',
+        'created_at': '评论时间'
+    }
+    can_export = True
+
+class MessageAdminView(SecureModelView):
+    """消息管理视图"""
+    column_list = ['id', 'subject', 'sender_id', 'receiver_id', 'is_read', 'created_at']
+    column_searchable_list = ['subject', 'content']
+    column_filters = ['is_read', 'created_at']
+    column_sortable_list = ['id', 'created_at']
+    column_labels = {
+        'id': 'ID',
+        'subject': '主题',
+        'content': '内容',
+        'sender_id': '发送者ID',
+        'receiver_id': '接收者ID',
+        'is_read': '已读',
+        'created_at': '发送时间'
+    }
+    can_export = True
+    
+    # 后台修改或删除消息后重新核对接收者的未读数
+    def after_model_change(self, form, model, is_created):
+        reconcile_unread_counts(model.receiver_id)
+        db.session.commit()
+    
+    def after_model_delete(self, model):
+        reconcile_unread_counts(model.receiver_id)
+        db.session.commit()
+
+class ReportAdminView(SecureModelView):
+    """举报管理视图"""
+    column_list = ['id', 'reason', 'status', 'reporter_id', 'lost_item_id', 'found_item_id', 'created_at']
+    column_searchable_list = ['reason', 'description']
+    column_filters = ['reason', 'status', 'created_at']
+    column_sortable_list = ['id', 'created_at']
+    column_labels = {
+        'id': 'ID',
+        'reporter_id': '举报者ID',
+        'lost_item_id': '失物ID',
+        'found_item_id': '拾物ID',
+        'reason': '举报原因',
+        'description': '详细说明',
+        'status': '状态',
+        'created_at': '举报时间'
+    }
+    column_formatters = {
+        'reason': lambda v, c, m, p: {
+            'spam': '垃圾信息',
+            'fraud': '虚假信息',
+            'inappropriate': '不当内容',
+            'duplicate': '重复发布',
+            'other': '其他'
+        }.get(m.reason, m.reason),
+        'status': lambda v, c, m, p: {
+            'pending': '待处理',
+            'reviewed': '已审核',
+            'resolved': '已解决'
+        }.get(m.status, m.status)
+    }
+    can_export = True
+
+class ClaimRequestAdminView(SecureModelView):
+    """认领管理视图"""
+    column_list = ['id', 'found_item_id', 'claimer_id', 'status', 'created_at', 'reviewed_at']
+    column_searchable_list = ['proof_description']
+    column_filters = ['status', 'created_at']
+    column_sortable_list = ['id', 'created_at']
+    column_labels = {
+        'id': 'ID',
+        'found_item_id': '拾物ID',
+        'claimer_id': '认领者ID',
+        'proof_description': '证明描述',
+        'proof_image': '证明图片',
+        'status': '状态',
+        'created_at': '申请时间',
+        'reviewed_at': '审核时间'
+    }
+    column_formatters = {
+        'status': lambda v, c, m, p: {
+            'pending': '待审核',
+            'approved': '已通过',
+            'rejected': '已拒绝'
+        }.get(m.status, m.status)
+    }
+    can_export = True
+
+class UserRatingAdminView(SecureModelView):
+    """评分管理视图"""
+    column_list = ['id', 'rater_id', 'rated_user_id', 'rating', 'created_at']
+    column_searchable_list = ['comment']
+    column_filters = ['rating', 'created_at']
+    column_sortable_list = ['id', 'rating', 'created_at']
+    column_labels = {
+        'id': 'ID',
+        'rater_id': '评分者ID',
+        'rated_user_id': '被评用户ID',
+        'rating': '评分',
+        'comment': '评价',
+        'created_at': '评分时间'
+    }
+    can_export = True
+
+class FavoriteAdminView(SecureModelView):
+    """收藏管理视图"""
+    column_list = ['id', 'user_id', 'lost_item_id', 'found_item_id', 'created_at']
+    column_filters = ['created_at']
+    column_sortable_list = ['id', 'created_at']
+    column_labels = {
+        'id': 'ID',
+        'user_id': '用户ID',
+        'lost_item_id': '失物ID',
+        'found_item_id': '拾物ID',
+        'created_at': '收藏时间'
+    }
+    can_export = True
+
+class PlaceAdminView(SecureModelView):
+    """地点词典视图（保存后地点词典自动重新加载，已有物品需执行 flask resolve-places 重新解析）"""
+    column_list = ['id', 'name', 'kind', 'parent', 'aliases']
+    column_searchable_list = ['name']
+    column_filters = ['kind']
+    column_sortable_list = ['id', 'name', 'kind']
+    column_labels = {
+        'id': 'ID',
+        'name': '名称',
+        'kind': '类型',
+        'parent': '上级地点',
+        'aliases': '别名'
+    }
+    column_formatters = {
+        'kind': lambda v, c, m, p: {
+            'campus': '校区',
+            'building': '建筑',
+            'floor': '楼层',
+            'area': '区域'
+        }.get(m.kind, m.kind),
+        'aliases': lambda v, c, m, p: '、'.join(alias.alias for alias in m.aliases)
+    }
+    form_choices = {
+        'kind': [('campus', '校区'), ('building', '建筑'), ('floor', '楼层'), ('area', '区域')]
+    }
+    form_excluded_columns = ['children']
+    inline_models = [(PlaceAlias, {'form_columns': ['id', 'alias'], 'form_label': '别名'})]
+    can_export = True
+
+# 控制台指标：后台线程定时计算，打开或刷新首页时只读取快照
+def compute_dashboard_metrics():
+    """每张表一次聚合查询，同时统计最近一小时、一天的新增数"""
+    now = datetime.utcnow()
+    hour_ago, day_ago = now - timedelta(hours=1), now - timedelta(days=1)
+    
+    def aggregate(model, **columns):
+        columns = {
+            'total': func.count(model.id),
+            'last_hour': func.coalesce(func.sum(case((model.created_at >= hour_ago, 1), else_=0)), 0),
+            'last_day': func.coalesce(func.sum(case((model.created_at >= day_ago, 1), else_=0)), 0),
+            **columns
+        }
+        row = db.session.query(*[column.label(name) for name, column in columns.items()]).one()
+        return dict(row._mapping)
+    
+    def pending(model):
+        return func.coalesce(func.sum(case((model.status == 'pending', 1), else_=0)), 0)
+    
+    def recent(*columns):
+        return [row._asdict() for row in db.session.query(*columns).order_by(columns[-1].desc()).limit(5)]
+    
+    return {
+        'users': aggregate(User),
+        'lost': aggregate(LostItem),
+        'found': aggregate(FoundItem),
+        'comments': aggregate(Comment),
+        'messages': aggregate(Message),
+        'reports': aggregate(Report, pending=pending(Report)),
+        'claims': aggregate(ClaimRequest, pending=pending(ClaimRequest)),
+        'recent_users': recent(User.id, User.username, User.created_at),
+        'recent_lost': recent(LostItem.id, LostItem.title, LostItem.status, LostItem.created_at),
+        'recent_found': recent(FoundItem.id, FoundItem.title, FoundItem.status, FoundItem.created_at),
+    }
+
+dashboard_snapshot = BackgroundSnapshot(compute_dashboard_metrics)
+
+# 自定义首页视图
+class DashboardView(AdminIndexView):
+    """管理后台首页视图"""
+    def is_accessible(self):
+        return current_user.is_authenticated and current_user.is_admin
+    
+    def inaccessible_callback(self, name, **kwargs):
+        flash('需要管理员权限才能访问', 'danger')
+        return redirect(url_for('login'))
+    
+    @expose('/')
+    def index(self):
+        metrics, refreshed_at = dashboard_snapshot.get()
+        
+        return self.render('admin/dashboard.html',
+                         metrics=metrics,
+                         snapshot_age=max(0, time.time() - refreshed_at),
+                         refresh_interval=dashboard_snapshot.interval,
+                         total_users=metrics['users']['total'],
+                         total_lost=metrics['lost']['total'],
+                         total_found=metrics['found']['total'],
+                         total_comments=metrics['comments']['total'],
+                         total_messages=metrics['messages']['total'],
+                         total_reports=metrics['reports']['pending'],
+                         total_claims=metrics['claims']['pending'],
+                         recent_users=metrics['recent_users'],
+                         recent_lost=metrics['recent_lost'],
+                         recent_found=metrics['recent_found'])
+
+# 性能监控视图
+class PerformanceView(BaseView):
+    """各路由的响应耗时、查询次数与慢查询"""
+    def is_accessible(self):
+        return current_user.is_authenticated and current_user.is_admin
+    
+    def inaccessible_callback(self, name, **kwargs):
+        flash('需要管理员权限才能访问', 'danger')
+        return redirect(url_for('login'))
+    
+    @expose('/')
+    def index(self):
+        sort = request.args.get('sort', 'p95')
+        if sort not in ('p95', 'p50', 'requests', 'avg_queries', 'max_queries', 'avg_db_time'):
+            sort = 'p95'
+        
+        return self.render('admin/performance.html',
+                         enabled=profiler.enabled,
+                         threshold=profiler.slow_query_threshold,
+                         routes=profiler.report(sort),
+                         slow_queries=profiler.slow_queries(),
+                         sort=sort)
+    
+    @expose('/reset', methods=['POST'])
+    def reset(self):
+        profiler.reset()
+        flash('统计数据已清空', 'success')
+        return redirect(url_for('.index'))
+
+# 重复发布视图
+class DuplicateClustersView(BaseView):
+    """标题和描述近似重复的在架物品分组（按 MinHash 签名估计的相似度，由 LSH 索引直接给出候选）"""
+    def is_accessible(self):
+        return current_user.is_authenticated and current_user.is_admin
+    
+    def inaccessible_callback(self, name, **kwargs):
+        flash('需要管理员权限才能访问', 'danger')
+        return redirect(url_for('login'))
+    
+    @expose('/')
+    def index(self):
+        item_type = request.args.get('type', 'lost')
+        model = FoundItem if item_type == 'found' else LostItem
+        threshold = request.args.get('threshold', current_app.config['DUPLICATE_THRESHOLD'], type=float)
+        limit = 100
+        max_size = 50
+        
+        clusters = duplicate_indexes[model].clusters(threshold, max_size=max_size)
+        shown = clusters[:limit]
+        items = {item.id: item for item in model.query.options(joinedload(model.author))
+                 .filter(model.id.in_([item_id for cluster in shown for item_id in cluster]))}
+        groups = []
+        for cluster in shown:
+            group = [items[item_id] for item_id in cluster if item_id in items]
+            if len(group) > 1:
+                groups.append({'items': group, 'same_user': len({item.user_id for item in group}) < len(group)})
+        
+        return self.render('admin/duplicates.html',
+                         item_type='found' if model is FoundItem else 'lost',
+                         edit_endpoint=f'{model.__name__.lower()}.edit_view',
+                         threshold=threshold,
+                         total=len(clusters),
+                         limit=limit,
+                         max_size=max_size,
+                         groups=groups)
+
+def create_admin_app(parent):
+    """创建管理后台子应用，处理 /admin 下的请求"""
+    admin_app = Flask(parent.import_name)
+    admin_app.config.update(parent.config)
+    db.init_app(admin_app)
+    database_router.init_engine(admin_app, db)
+    login_manager.init_app(admin_app)
+    profiler.init_app(admin_app)
+    dashboard_snapshot.init_app(admin_app)
+    dashboard_snapshot.interval = admin_app.config['DASHBOARD_REFRESH_INTERVAL']
+    
+    # 后台页面中 url_for('login') 等指向主站的端点，由主应用生成地址
+    def build_parent_url(error, endpoint, values):
+        values = {key: value for key, value in values.items() if not key.startswith('_')}
+        try:
+            return parent.create_url_adapter(request).build(endpoint, values)
+        except BuildError:
+            raise error
+    
+    admin_app.url_build_error_handlers.append(build_parent_url)
+    
+    admin = Admin(admin_app, name='失物招领管理后台', template_mode='bootstrap4', index_view=DashboardView(name='控制台'))
+    admin.add_view(PerformanceView(name='性能监控', endpoint='performance'))
+    
+    # 添加视图
+    admin.add_view(UserAdminView(User, db.session, name='用户管理', category='用户'))
+    admin.add_view(UserRatingAdminView(UserRating, db.session, name='用户评分', category='用户'))
+    
+    admin.add_view(LostItemAdminView(LostItem, db.session, name='失物管理', category='物品'))
+    admin.add_view(FoundItemAdminView(FoundItem, db.session, name='拾物管理', category='物品'))
+    admin.add_view(PlaceAdminView(Place, db.session, name='地点词典', category='物品'))
+    
+    admin.add_view(CommentAdminView(Comment, db.session, name='评论管理', category='互动'))
+    admin.add_view(MessageAdminView(Message, db.session, name='消息管理', category='互动'))
+    admin.add_view(FavoriteAdminView(Favorite, db.session, name='收藏管理', category='互动'))
+    
+    admin.add_view(ReportAdminView(Report, db.session, name='举报管理', category='审核'))
+    admin.add_view(ClaimRequestAdminView(ClaimRequest, db.session, name='认领管理', category='审核'))
+    admin.add_view(DuplicateClustersView(name='重复发布', endpoint='duplicates', category='审核'))
+    
+    return admin_app
@@ -1,41 +1,178 @@
-from flask import Flask, render_template, redirect, url_for, flash, request, jsonify, send_file
+from flask import Flask, current_app, render_template, redirect, url_for, flash, request, jsonify, send_file, Response, stream_with_context, session, make_response, abort
 from flask_sqlalchemy import SQLAlchemy
+from flask_migrate import Migrate
 from flask_login import LoginManager, UserMixin, login_user, logout_user, login_required, current_user
 from flask_wtf import FlaskForm
+from werkzeug.middleware.proxy_fix import ProxyFix
 from wtforms import StringField, PasswordField, TextAreaField, SelectField, FileField, IntegerField
 from wtforms.validators import DataRequired, Email, Length, EqualTo, ValidationError, NumberRange
-from werkzeug.security import generate_password_hash, check_password_hash
-from werkzeug.utils import secure_filename
 from datetime import datetime, timedelta
-from difflib import SequenceMatcher
-import os
+from functools import wraps
+from urllib.parse import urlencode
 import csv
-from io import StringIO, BytesIO
-from flask_admin import Admin, expose, AdminIndexView
-from flask_admin.contrib.sqla import ModelView
-
-# 初始化Flask应用
-app = Flask(__name__)
-app.config['SECRET_KEY'] = 'your-secret-key-here-change-in-production'
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///lostfound.db'
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-app.config['UPLOAD_FOLDER'] = 'static/uploads'
-app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
-
-# 确保上传文件夹存在
-os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
-
-# 初始化数据库
-db = SQLAlchemy(app)
+import json
+import base64
+import click
+import sys
+import tempfile
+import threading
+import time
+from io import StringIO
+from sqlalchemy import event, func, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, joinedload, raiseload
+from sqlalchemy.orm.attributes import set_committed_value
+import search_index
+from duplicates import DuplicateIndex, MinHasher, from_bytes, to_bytes
+from gazetteer import Gazetteer
+from image_hash import HashIndex, fingerprint, fingerprint_file, similarity as hash_similarity, to_signed, to_unsigned
+from suggest import Suggester
+from matching import MatchingEngine
+from caching import Snapshot, LRUCache, LocalBackend, WriteVersions
+from view_counter import ViewCounter
+from images import ImagePipeline
+from profiler import QueryProfiler
+from notifications import NotificationHub, format_event
+from sqlite_mode import SQLiteRouter, RoutingSession
+from passwords import PasswordHasher, HasherBusy
+from throttle import TokenBucketThrottle
+
+# 默认配置（create_app 创建应用时加载）
+def configure_app(app):
+    app.config['SECRET_KEY'] = 'your-secret-key-here-change-in-production'
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///lostfound.db'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['UPLOAD_FOLDER'] = 'static/uploads'
+    app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
+    app.config['IMAGE_WORKERS'] = 2  # 后台图片处理线程数
+    app.config['DASHBOARD_REFRESH_INTERVAL'] = 60  # 管理后台控制台指标的后台刷新间隔（秒）
+    app.config['PROFILER_ENABLED'] = False  # 按路由统计 SQL 查询次数与耗时（管理后台"性能监控"）
+    app.config['PROFILER_SLOW_QUERY_THRESHOLD'] = 0.1  # 慢查询阈值（秒）
+    app.config['PROFILER_WINDOW'] = 500  # 每个路由保留最近多少次请求用于计算分位数
+    app.config['SQLALCHEMY_RAISE_ON_LAZY_LOAD'] = False  # 开发调试：页面触发未预加载的关系时直接报错，便于发现 N+1 查询
+    app.config['SEARCH_USE_FTS'] = True  # 使用 SQLite FTS5 全文索引检索，关闭后退回 LIKE 模糊匹配
+    app.config['RECOMMENDATION_TOP_K'] = 20  # 每件物品最多保留的匹配候选数量
+    app.config['MATCH_SCORE_THRESHOLD'] = 0.3  # 相似度阈值
+    app.config['ADVANCED_SEARCH_PAGE_SIZE'] = 20  # 高级搜索每页条数
+    app.config['RATINGS_PAGE_SIZE'] = 10  # 用户主页每页显示的评分数
+    app.config['GAZETTEER_CACHE_TTL'] = 600  # 地点词典在内存中的最长缓存时间（秒），地点表变更后立即重新加载
+    app.config['SUGGEST_TOP_K'] = 10  # 输入联想每个前缀保留的候选数
+    app.config['SUGGEST_MAX_PREFIX'] = 16  # 联想索引的最大前缀长度（字符）
+    app.config['SUGGEST_PINYIN'] = True  # 同时按拼音全拼和首字母联想（需安装 pypinyin）
+    app.config['SUGGEST_REBUILD_INTERVAL'] = 3600  # 联想索引定期从数据库重建的间隔（秒），多进程部署时用于同步其他进程的变更
+    app.config['IMAGE_MATCH_WEIGHT'] = 0.3  # 失物与拾物都有图片时，图片相似度在匹配得分中的权重（只提高得分）
+    app.config['IMAGE_SIMILAR_MAX_DISTANCE'] = 10  # 相似图片检索的最大汉明距离（64 位中不同的位数）
+    app.config['IMAGE_SIMILAR_LIMIT'] = 20  # 相似图片检索最多返回的物品数
+    app.config['IMAGE_INDEX_REBUILD_INTERVAL'] = 3600  # 相似图片索引定期从数据库重建的间隔（秒）
+    app.config['DUPLICATE_THRESHOLD'] = 0.6  # 标题+描述的相似度（Jaccard 估计）达到该值视为重复发布
+    app.config['DUPLICATE_BLOCK_SAME_USER'] = True  # 同一用户重复发布时拒绝，关闭后只提示
+    app.config['DUPLICATE_INDEX_REBUILD_INTERVAL'] = 3600  # 重复检测索引定期从数据库重建的间隔（秒）
+    app.config['STATISTICS_CACHE_TTL'] = 300  # 统计快照最长缓存时间（秒）
+    app.config['STATISTICS_MIN_REFRESH'] = 5  # 数据变更后统计快照的最短刷新间隔（秒）
+    app.config['RESPONSE_CACHE_ENABLED'] = True  # 缓存匿名用户访问的首页和列表页
+    app.config['RESPONSE_CACHE_TTL'] = 60  # 页面缓存时间（秒）
+    app.config['RESPONSE_CACHE_SIZE'] = 512  # 进程内最多缓存的页面数
+    app.config['RESPONSE_CACHE_BACKEND'] = None  # 共享缓存后端（如 caching.RedisBackend），为空时使用进程内缓存
+    app.config['VIEW_COUNT_FLUSH_INTERVAL'] = 5  # 浏览量批量写入间隔（秒）
+    app.config['VIEW_COUNT_FLUSH_THRESHOLD'] = 200  # 累计多少次浏览后立即写入
+    app.config['NOTIFICATION_STREAM_ENABLED'] = True  # 通过 /api/stream 推送新消息，关闭后客户端退回轮询
+    app.config['NOTIFICATION_STREAM_HEARTBEAT'] = 15  # 推送连接的心跳间隔（秒）
+    app.config['NOTIFICATION_STREAM_MAX_DURATION'] = 300  # 单个推送连接的最长时间（秒），到期后客户端自动重连
+    app.config['NOTIFICATION_STREAM_MAX_CONNECTIONS'] = 500  # 每个进程最多保持的推送连接数，超出时客户端改用轮询
+    app.config['SQLITE_PRODUCTION_MODE'] = False  # SQLite 生产模式：WAL + 只读连接池 + 单写连接（多线程/多进程部署时开启）
+    app.config['SQLITE_BUSY_TIMEOUT'] = 5000  # 等待数据库锁的时间（毫秒）
+    app.config['SQLITE_MMAP_SIZE'] = 256 * 1024 * 1024  # 内存映射读取的大小（字节）
+    app.config['SQLITE_CACHE_SIZE'] = -64000  # 每个连接的页缓存，负数表示 KiB
+    app.config['SQLITE_READ_POOL_SIZE'] = 8  # 只读连接池大小
+    app.config['SQLITE_READ_POOL_OVERFLOW'] = 8  # 只读连接池繁忙时最多额外打开的连接数
+    app.config['SQLITE_WRITE_TIMEOUT'] = 30  # 等待写连接的最长时间（秒）
+    app.config['SQLITE_WRITE_RETRIES'] = 5  # 写事务获取写锁失败时的重试次数
+    app.config['SQLITE_WRITE_RETRY_BACKOFF'] = 0.05  # 重试的初始退避时间（秒），每次翻倍
+    app.config['PASSWORD_HASH_METHOD'] = 'scrypt'  # 新密码的哈希算法及参数，如 'scrypt:32768:8:1'、'pbkdf2:sha256:600000'；修改后旧密码在下次登录时自动重新哈希
+    app.config['PASSWORD_HASH_WORKERS'] = 2  # 同时进行密码哈希计算的线程数（0 表示在请求线程中直接计算）
+    app.config['PASSWORD_HASH_QUEUE_SIZE'] = 16  # 排队等待哈希计算的请求数上限，超出时提示系统繁忙
+    app.config['PASSWORD_HASH_TIMEOUT'] = 10  # 等待哈希计算的最长时间（秒）
+    app.config['LOGIN_RATE_PER_IP'] = 20  # 每个 IP 每分钟可尝试登录的次数
+    app.config['LOGIN_BURST_PER_IP'] = 10  # 每个 IP 允许连续尝试的次数
+    app.config['LOGIN_RATE_PER_USERNAME'] = 5  # 每个用户名每分钟可尝试登录的次数
+    app.config['LOGIN_BURST_PER_USERNAME'] = 5  # 每个用户名允许连续尝试的次数
+    app.config['USER_CACHE_TTL'] = 60  # 登录用户信息的缓存时间（秒），多进程部署时其他进程最多延迟这么久看到用户资料的修改
+    app.config['USER_CACHE_SIZE'] = 4096  # 每个进程最多缓存的登录用户数
+    app.config['PROXY_FIX_X_FOR'] = 0  # 前面的反向代理层数，大于 0 时从 X-Forwarded-For 取客户端 IP（按 IP 限流需要）
+
+class Registry:
+    """先登记路由、错误处理、模板函数和命令行命令，create_app 时再注册到应用上
+
+    不使用 Blueprint 是为了保持端点名不变，模板和代码中的 url_for('login') 等无需修改。
+    """
+    def __init__(self):
+        self._callbacks = []
+    
+    def route(self, rule, **options):
+        def decorator(view):
+            self._callbacks.append(lambda app: app.add_url_rule(rule, view_func=view, **options))
+            return view
+        return decorator
+    
+    def errorhandler(self, code):
+        def decorator(handler):
+            self._callbacks.append(lambda app: app.register_error_handler(code, handler))
+            return handler
+        return decorator
+    
+    def template_global(self):
+        def decorator(function):
+            self._callbacks.append(lambda app: app.add_template_global(function))
+            return function
+        return decorator
+    
+    def cli_command(self, name):
+        def decorator(function):
+            self._callbacks.append(lambda app: app.cli.command(name)(function))
+            return function
+        return decorator
+    
+    def init_app(self, app):
+        for callback in self._callbacks:
+            callback(app)
+
+site = Registry()
+
+# 扩展对象在模块级创建，create_app 中通过 init_app 绑定到应用
+database_router = SQLiteRouter()
+db = SQLAlchemy(session_options={'class_': RoutingSession, 'router': database_router})
+migrate = Migrate(db=db, render_as_batch=True)
+
+# 图片处理流水线
+image_pipeline = ImagePipeline()
+
+# 地点词典：地点表与别名表加载到内存，发布物品时把地点文本解析为规范地点
+def load_gazetteer():
+    places = db.session.query(Place.id, Place.parent_id, Place.name).all()
+    aliases = db.session.query(PlaceAlias.place_id, PlaceAlias.alias).all()
+    return Gazetteer(places, aliases)
+
+gazetteer_snapshot = Snapshot(load_gazetteer, min_interval=0)
+
+# SQL 性能统计
+profiler = QueryProfiler()
+
+# 密码哈希线程池与登录限流
+password_hasher = PasswordHasher()
+login_ip_throttle = TokenBucketThrottle()
+login_username_throttle = TokenBucketThrottle()
 
 # 初始化登录管理器
 login_manager = LoginManager()
-login_manager.init_app(app)
 login_manager.login_view = 'login'
 login_manager.login_message = '请先登录以访问此页面'
 
 # 数据库模型
 class User(UserMixin, db.Model):
+    __table_args__ = (
+        db.Index('ix_user_created_at', 'created_at'),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(80), unique=True, nullable=False)
     email = db.Column(db.String(120), unique=True, nullable=False)
@@ -43,6 +180,15 @@ class User(UserMixin, db.Model):
     phone = db.Column(db.String(20))
     is_admin = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    unread_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')  # 未读消息数（冗余计数）
+    # 收到的评分汇总（冗余计数，随 UserRating 增删改同步更新）
+    rating_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_sum = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_1 = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_2 = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_3 = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_4 = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_5 = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     
     # 关系
     lost_items = db.relationship('LostItem', backref='author', lazy=True, foreign_keys='LostItem.user_id')
@@ -52,22 +198,73 @@ class User(UserMixin, db.Model):
     messages_received = db.relationship('Message', backref='receiver', lazy=True, foreign_keys='Message.receiver_id')
     
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = password_hasher.hash(password)
     
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        return password_hasher.verify(self.password_hash, password)
+    
+    @property
+    def average_rating(self):
+        return self.rating_sum / self.rating_count if self.rating_count else 0
+    
+    @property
+    def rating_histogram(self):
+        """各星级的评分数，{5: 数量, 4: 数量, ...}"""
+        return {star: getattr(self, f'rating_{star}') for star in range(5, 0, -1)}
     
     def __repr__(self):
         return f'<User {self.username}>'
 
+class Place(db.Model):
+    """规范地点，按 校区 → 建筑 → 楼层/区域 组织"""
+    __table_args__ = (
+        db.Index('ix_place_parent_name', 'parent_id', 'name'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False)
+    kind = db.Column(db.String(20), nullable=False, default='area')  # campus, building, floor, area
+    parent_id = db.Column(db.Integer, db.ForeignKey('place.id'))
+    
+    parent = db.relationship('Place', remote_side=[id], backref='children')
+    aliases = db.relationship('PlaceAlias', backref='place', lazy=True, cascade='all, delete-orphan')
+    
+    def __repr__(self):
+        return f'<Place {self.name}>'
+
+class PlaceAlias(db.Model):
+    __table_args__ = (
+        db.Index('ix_place_alias_place', 'place_id'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    place_id = db.Column(db.Integer, db.ForeignKey('place.id'), nullable=False)
+    alias = db.Column(db.String(100), nullable=False)
+    
+    def __repr__(self):
+        return f'<PlaceAlias {self.alias}>'
+
 class LostItem(db.Model):
+    __table_args__ = (
+        db.Index('ix_lost_item_category_status', 'category', 'status'),
+        db.Index('ix_lost_item_category_created_at', 'category', 'created_at'),
+        db.Index('ix_lost_item_created_at', 'created_at'),
+        db.Index('ix_lost_item_views', 'views'),
+        db.Index('ix_lost_item_user_status', 'user_id', 'status'),
+        db.Index('ix_lost_item_user_created_at', 'user_id', 'created_at'),
+        db.Index('ix_lost_item_place_created_at', 'place_id', 'created_at'),
+        db.Index('ix_lost_item_image', 'image'),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
     description = db.Column(db.Text, nullable=False)
     category = db.Column(db.String(50), nullable=False)
     location = db.Column(db.String(200), nullable=False)
+    place_id = db.Column(db.Integer, db.ForeignKey('place.id'))  # 由 location 解析出的规范地点，无法解析时为空
     lost_date = db.Column(db.DateTime, nullable=False)
     image = db.Column(db.String(200))
+    minhash = db.Column(db.LargeBinary)  # 标题+描述的 MinHash 签名，用于检测重复发布
     status = db.Column(db.String(20), default='lost')  # lost, found, closed
     contact_info = db.Column(db.String(200))
     reward = db.Column(db.String(100))
@@ -82,13 +279,26 @@ class LostItem(db.Model):
         return f'<LostItem {self.title}>'
 
 class FoundItem(db.Model):
+    __table_args__ = (
+        db.Index('ix_found_item_category_status', 'category', 'status'),
+        db.Index('ix_found_item_category_created_at', 'category', 'created_at'),
+        db.Index('ix_found_item_created_at', 'created_at'),
+        db.Index('ix_found_item_views', 'views'),
+        db.Index('ix_found_item_user_status', 'user_id', 'status'),
+        db.Index('ix_found_item_user_created_at', 'user_id', 'created_at'),
+        db.Index('ix_found_item_place_created_at', 'place_id', 'created_at'),
+        db.Index('ix_found_item_image', 'image'),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
     description = db.Column(db.Text, nullable=False)
     category = db.Column(db.String(50), nullable=False)
     location = db.Column(db.String(200), nullable=False)
+    place_id = db.Column(db.Integer, db.ForeignKey('place.id'))  # 由 location 解析出的规范地点，无法解析时为空
     found_date = db.Column(db.DateTime, nullable=False)
     image = db.Column(db.String(200))
+    minhash = db.Column(db.LargeBinary)  # 标题+描述的 MinHash 签名，用于检测重复发布
     status = db.Column(db.String(20), default='unclaimed')  # unclaimed, claimed, returned
     contact_info = db.Column(db.String(200))
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
@@ -102,6 +312,11 @@ class FoundItem(db.Model):
         return f'<FoundItem {self.title}>'
 
 class Comment(db.Model):
+    __table_args__ = (
+        db.Index('ix_comment_lost_item_created_at', 'lost_item_id', 'created_at'),
+        db.Index('ix_comment_found_item_created_at', 'found_item_id', 'created_at'),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     content = db.Column(db.Text, nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
@@ -113,6 +328,12 @@ class Comment(db.Model):
         return f'<Comment {self.id}>'
 
 class Message(db.Model):
+    __table_args__ = (
+        db.Index('ix_message_receiver_is_read', 'receiver_id', 'is_read'),
+        db.Index('ix_message_receiver_created_at', 'receiver_id', 'created_at'),
+        db.Index('ix_message_sender_created_at', 'sender_id', 'created_at'),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     subject = db.Column(db.String(200), nullable=False)
     content = db.Column(db.Text, nullable=False)
@@ -126,6 +347,12 @@ class Message(db.Model):
 
 # 新增：收藏表
 class Favorite(db.Model):
+    __table_args__ = (
+        db.Index('ix_favorite_user_lost_item', 'user_id', 'lost_item_id'),
+        db.Index('ix_favorite_user_found_item', 'user_id', 'found_item_id'),
+        db.Index('ix_favorite_user_created_at', 'user_id', 'created_at'),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     lost_item_id = db.Column(db.Integer, db.ForeignKey('lost_item.id'))
@@ -141,6 +368,10 @@ class Favorite(db.Model):
 
 # 新增：举报表
 class Report(db.Model):
+    __table_args__ = (
+        db.Index('ix_report_status', 'status'),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     reporter_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     lost_item_id = db.Column(db.Integer, db.ForeignKey('lost_item.id'))
@@ -159,6 +390,12 @@ class Report(db.Model):
 
 # 新增：认领记录表
 class ClaimRequest(db.Model):
+    __table_args__ = (
+        db.Index('ix_claim_request_found_item_claimer_status', 'found_item_id', 'claimer_id', 'status'),
+        db.Index('ix_claim_request_claimer_created_at', 'claimer_id', 'created_at'),
+        db.Index('ix_claim_request_status', 'status'),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     found_item_id = db.Column(db.Integer, db.ForeignKey('found_item.id'), nullable=False)
     claimer_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
@@ -176,6 +413,11 @@ class ClaimRequest(db.Model):
 
 # 新增：用户评分表
 class UserRating(db.Model):
+    __table_args__ = (
+        db.Index('ix_user_rating_rated_user_created_at', 'rated_user_id', 'created_at'),
+        db.Index('ix_user_rating_rater_rated_user', 'rater_id', 'rated_user_id'),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     rater_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     rated_user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
@@ -189,6 +431,468 @@ class UserRating(db.Model):
     def __repr__(self):
         return f'<UserRating {self.id}>'
 
+# 新增：匹配候选表（物品发布时增量计算，推荐页直接按得分读取）
+class MatchCandidate(db.Model):
+    __table_args__ = (
+        db.UniqueConstraint('lost_item_id', 'found_item_id'),
+        db.Index('ix_match_candidate_lost_score', 'lost_item_id', 'score'),
+        db.Index('ix_match_candidate_found_item_id', 'found_item_id'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    lost_item_id = db.Column(db.Integer, db.ForeignKey('lost_item.id'), nullable=False)
+    found_item_id = db.Column(db.Integer, db.ForeignKey('found_item.id'), nullable=False)
+    score = db.Column(db.Float, nullable=False)
+    computed_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    lost_item = db.relationship('LostItem', backref=db.backref('match_candidates', cascade='all, delete-orphan'))
+    found_item = db.relationship('FoundItem', backref=db.backref('match_candidates', cascade='all, delete-orphan'))
+    
+    def __repr__(self):
+        return f'<MatchCandidate {self.lost_item_id}-{self.found_item_id}>'
+
+# 新增：图片感知哈希（按图片存储键保存，图片处理完成后计算）
+class ImageFingerprint(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    image_key = db.Column(db.String(200), unique=True, nullable=False)
+    phash = db.Column(db.BigInteger, nullable=False)  # 64 位哈希按有符号整数存储
+    dhash = db.Column(db.BigInteger, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<ImageFingerprint {self.image_key}>'
+
+# 提交后处理：映射器事件中记录的变更在事务提交后才交给内存索引和缓存，回滚时一并丢弃
+commit_handlers = {}
+
+def on_commit(key):
+    """注册提交后的处理函数，参数为本事务中用 defer_until_commit 记录的全部条目"""
+    def decorator(handler):
+        commit_handlers[key] = handler
+        return handler
+    return decorator
+
+def defer_until_commit(session, key, *entries):
+    """记录提交后交给 key 对应处理函数的条目；不带条目时只标记本事务需要处理"""
+    session.info.setdefault('deferred', {}).setdefault(key, []).extend(entries)
+
+@event.listens_for(Session, 'after_commit')
+def apply_deferred(session):
+    for key, entries in session.info.pop('deferred', {}).items():
+        commit_handlers[key](entries)
+
+@event.listens_for(Session, 'after_rollback')
+def discard_deferred(session):
+    session.info.pop('deferred', None)
+
+# 全文索引同步：物品新增、修改（含状态变更）、删除时更新 FTS5 索引
+@event.listens_for(LostItem, 'after_insert')
+@event.listens_for(LostItem, 'after_update')
+@event.listens_for(FoundItem, 'after_insert')
+@event.listens_for(FoundItem, 'after_update')
+def sync_search_index(mapper, connection, target):
+    search_index.index_item(connection, mapper.local_table.name, target)
+
+@event.listens_for(LostItem, 'after_delete')
+@event.listens_for(FoundItem, 'after_delete')
+def remove_search_index(mapper, connection, target):
+    search_index.remove_item(connection, mapper.local_table.name, target.id)
+
+# 地点解析：物品新增或修改了地点文本时解析规范地点（显式指定了 place_id 的除外）
+@event.listens_for(Session, 'before_flush')
+def resolve_item_places(session, flush_context, instances):
+    for item in list(session.new) + list(session.dirty):
+        if not isinstance(item, (LostItem, FoundItem)):
+            continue
+        state = db.inspect(item)
+        if state.attrs.location.history.has_changes() and not state.attrs.place_id.history.has_changes():
+            item.place_id = gazetteer_snapshot.get().resolve(item.location)
+
+@event.listens_for(Place, 'after_insert')
+@event.listens_for(Place, 'after_update')
+@event.listens_for(Place, 'after_delete')
+@event.listens_for(PlaceAlias, 'after_insert')
+@event.listens_for(PlaceAlias, 'after_update')
+@event.listens_for(PlaceAlias, 'after_delete')
+def mark_places_dirty(mapper, connection, target):
+    defer_until_commit(db.inspect(target).session, 'places')
+
+@on_commit('places')
+def reload_gazetteer(entries):
+    gazetteer_snapshot.invalidate()
+
+def load_places(nodes, parent=None):
+    """导入地点树 [{name, kind, aliases, children}]，已存在的同名地点只补充别名，返回新增地点数"""
+    added = 0
+    for node in nodes:
+        place = Place.query.filter_by(parent_id=parent.id if parent else None, name=node['name']).first()
+        if place is None:
+            place = Place(name=node['name'], kind=node.get('kind', 'area'), parent=parent)
+            db.session.add(place)
+            added += 1
+        existing = {alias.alias for alias in place.aliases}
+        for alias in node.get('aliases', ()):
+            if alias not in existing:
+                place.aliases.append(PlaceAlias(alias=alias))
+                existing.add(alias)
+        db.session.flush()
+        added += load_places(node.get('children', ()), place)
+    return added
+
+def resolve_places(batch_size=500):
+    """按当前地点词典重新解析全部物品的规范地点，返回变化的物品数"""
+    gazetteer = load_gazetteer()
+    changed = 0
+    for model in (LostItem, FoundItem):
+        table = model.__table__
+        rows = []
+        for item_id, location, place_id in db.session.query(model.id, model.location, model.place_id)\
+                .yield_per(batch_size):
+            place = gazetteer.resolve(location)
+            if place != place_id:
+                rows.append({'item_id': item_id, 'place': place})
+        for start in range(0, len(rows), batch_size):
+            db.session.execute(
+                update(table).where(table.c.id == db.bindparam('item_id')).values(place_id=db.bindparam('place')),
+                rows[start:start + batch_size], execution_options={'synchronize_session': False}
+            )
+        changed += len(rows)
+    return changed
+
+# 输入联想：启动后首次查询时从全部物品的标题和地点构建前缀树，之后随物品增删改增量更新
+def load_suggestion_terms():
+    for model in (LostItem, FoundItem):
+        for title, location in db.session.query(model.title, model.location).yield_per(5000):
+            yield 'title', title
+            yield 'location', location
+
+suggester = Suggester(load_suggestion_terms)
+
+@event.listens_for(LostItem, 'after_insert')
+@event.listens_for(FoundItem, 'after_insert')
+def add_suggestion_terms(mapper, connection, target):
+    defer_until_commit(db.inspect(target).session, 'suggest',
+                       ('title', target.title, 1), ('location', target.location, 1))
+
+@event.listens_for(LostItem, 'after_update')
+@event.listens_for(FoundItem, 'after_update')
+def update_suggestion_terms(mapper, connection, target):
+    state = db.inspect(target)
+    for field in ('title', 'location'):
+        history = getattr(state.attrs, field).history
+        if history.has_changes():
+            defer_until_commit(state.session, 'suggest', *((field, value, -1) for value in history.deleted),
+                               *((field, value, 1) for value in history.added))
+
+@event.listens_for(LostItem, 'after_delete')
+@event.listens_for(FoundItem, 'after_delete')
+def remove_suggestion_terms(mapper, connection, target):
+    defer_until_commit(db.inspect(target).session, 'suggest',
+                       ('title', target.title, -1), ('location', target.location, -1))
+
+@on_commit('suggest')
+def apply_suggestion_changes(changes):
+    if changes:
+        suggester.update(changes)
+
+# 图片哈希：图片处理完成后记录感知哈希；未认领拾物的哈希建成内存索引，首次查询时加载，之后随拾物增删改增量更新
+def image_fingerprints(keys):
+    """批量读取图片哈希，返回 {图片键: (pHash, dHash)}"""
+    keys = list(keys)
+    hashes = {}
+    for start in range(0, len(keys), 500):
+        rows = db.session.query(ImageFingerprint.image_key, ImageFingerprint.phash, ImageFingerprint.dhash)\
+            .filter(ImageFingerprint.image_key.in_(keys[start:start + 500]))
+        for key, phash, dhash in rows:
+            hashes[key] = (to_unsigned(phash), to_unsigned(dhash))
+    return hashes
+
+def load_found_image_hashes():
+    rows = db.session.query(FoundItem.id, ImageFingerprint.phash, ImageFingerprint.dhash)\
+        .join(ImageFingerprint, ImageFingerprint.image_key == FoundItem.image)\
+        .filter(FoundItem.status == 'unclaimed').yield_per(5000)
+    for item_id, phash, dhash in rows:
+        yield item_id, to_unsigned(phash), to_unsigned(dhash)
+
+found_image_index = HashIndex(load_found_image_hashes)
+
+# 相似度计算引擎（双方都有规范地点时按地点层级计算地点相似度，双方图片都已计算哈希时混入图片相似度）
+matching_engine = MatchingEngine(places=gazetteer_snapshot.get, images=image_fingerprints)
+
+def record_image_fingerprint(key, image):
+    """图片处理完成后保存感知哈希（在图片处理线程中执行）"""
+    phash_value, dhash_value = fingerprint(image)
+    db.session.add(ImageFingerprint(image_key=key, phash=to_signed(phash_value), dhash=to_signed(dhash_value)))
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()  # 同一张图片已经记录过
+        return
+    # 图片处理完成前已发布的物品：加入相似图片索引，并重新计算匹配候选以计入图片相似度
+    found_items = FoundItem.query.filter_by(image=key, status='unclaimed').all()
+    for item in found_items:
+        found_image_index.add(item.id, phash_value, dhash_value)
+    items = LostItem.query.filter_by(image=key, status='lost').all() + found_items
+    for item in items:
+        sync_match_candidates(item)
+    if items:
+        db.session.commit()
+
+image_pipeline.on_processed = record_image_fingerprint
+
+@event.listens_for(FoundItem, 'after_insert')
+@event.listens_for(FoundItem, 'after_update')
+def sync_found_image_index(mapper, connection, target):
+    state = db.inspect(target)
+    if not found_image_index.loaded or not (state.attrs.image.history.has_changes()
+                                            or state.attrs.status.history.has_changes()):
+        return
+    hashes = None
+    if target.image and target.status == 'unclaimed':
+        row = connection.execute(select(ImageFingerprint.phash, ImageFingerprint.dhash)
+                                 .where(ImageFingerprint.image_key == target.image)).first()
+        if row is not None:
+            hashes = (to_unsigned(row.phash), to_unsigned(row.dhash))
+    defer_until_commit(state.session, 'image_index', (target.id, hashes))
+
+@event.listens_for(FoundItem, 'after_delete')
+def remove_found_image_index(mapper, connection, target):
+    if found_image_index.loaded:
+        defer_until_commit(db.inspect(target).session, 'image_index', (target.id, None))
+
+@on_commit('image_index')
+def apply_image_index_changes(changes):
+    for item_id, hashes in changes:
+        if hashes is None:
+            found_image_index.remove(item_id)
+        else:
+            found_image_index.add(item_id, *hashes)
+
+# 重复发布检测：在架物品（寻找中的失物、待认领的拾物）的 MinHash 签名建成 LSH 索引，首次查询时加载，之后随物品增删改增量更新
+minhasher = MinHasher()
+
+ACTIVE_STATUS = {LostItem: 'lost', FoundItem: 'unclaimed'}
+
+def item_signature(title, description):
+    signature = minhasher.signature(f'{title} {description}')
+    return to_bytes(signature) if signature is not None else None
+
+def duplicate_signature_loader(model):
+    def load():
+        rows = db.session.query(model.id, model.user_id, model.minhash)\
+            .filter(model.status == ACTIVE_STATUS[model], model.minhash.isnot(None)).yield_per(5000)
+        for item_id, user_id, minhash in rows:
+            yield item_id, user_id, from_bytes(minhash)
+    return load
+
+duplicate_indexes = {model: DuplicateIndex(duplicate_signature_loader(model)) for model in ACTIVE_STATUS}
+
+def find_duplicates(model, minhash, exclude=()):
+    """与签名近似重复的在架物品 [(物品ID, 发布者ID, 相似度)]，按相似度降序"""
+    if minhash is None:
+        return []
+    return duplicate_indexes[model].query(from_bytes(minhash), current_app.config['DUPLICATE_THRESHOLD'], exclude)
+
+@event.listens_for(Session, 'before_flush')
+def compute_item_signatures(session, flush_context, instances):
+    """物品新增或修改了标题、描述时重新计算签名（显式指定了 minhash 的除外）"""
+    for item in list(session.new) + list(session.dirty):
+        if not isinstance(item, (LostItem, FoundItem)):
+            continue
+        state = db.inspect(item)
+        if (state.attrs.title.history.has_changes() or state.attrs.description.history.has_changes()) \
+                and not state.attrs.minhash.history.has_changes():
+            item.minhash = item_signature(item.title, item.description)
+
+@event.listens_for(LostItem, 'after_insert')
+@event.listens_for(LostItem, 'after_update')
+@event.listens_for(FoundItem, 'after_insert')
+@event.listens_for(FoundItem, 'after_update')
+def sync_duplicate_index(mapper, connection, target):
+    index = duplicate_indexes[type(target)]
+    state = db.inspect(target)
+    if not index.loaded or not any(getattr(state.attrs, field).history.has_changes()
+                                   for field in ('minhash', 'status', 'user_id')):
+        return
+    entry = None
+    if target.minhash is not None and target.status == ACTIVE_STATUS[type(target)]:
+        entry = (target.user_id, from_bytes(target.minhash))
+    defer_until_commit(state.session, 'duplicate_index', (index, target.id, entry))
+
+@event.listens_for(LostItem, 'after_delete')
+@event.listens_for(FoundItem, 'after_delete')
+def remove_duplicate_index(mapper, connection, target):
+    index = duplicate_indexes[type(target)]
+    if index.loaded:
+        defer_until_commit(db.inspect(target).session, 'duplicate_index', (index, target.id, None))
+
+@on_commit('duplicate_index')
+def apply_duplicate_index_changes(changes):
+    for index, item_id, entry in changes:
+        if entry is None:
+            index.remove(item_id)
+        else:
+            index.add(item_id, *entry)
+
+def rebuild_item_signatures(batch_size=500):
+    """重新计算全部物品的签名（修改了切分方式或签名长度后执行），返回更新的物品数"""
+    changed = 0
+    for model in ACTIVE_STATUS:
+        table = model.__table__
+        rows = []
+        for item_id, title, description, minhash in db.session.query(
+                model.id, model.title, model.description, model.minhash).yield_per(batch_size):
+            signature = item_signature(title, description)
+            if signature != minhash:
+                rows.append({'item_id': item_id, 'signature': signature})
+        for start in range(0, len(rows), batch_size):
+            db.session.execute(
+                update(table).where(table.c.id == db.bindparam('item_id')).values(minhash=db.bindparam('signature')),
+                rows[start:start + batch_size], execution_options={'synchronize_session': False}
+            )
+        changed += len(rows)
+    return changed
+
+# 评分汇总：评分新增、修改、删除时在同一事务中更新被评用户的计数
+def change_rating_aggregates(connection, user_id, rating, sign):
+    """sign 为 1 时计入一条评分，为 -1 时扣除"""
+    table = User.__table__
+    values = {
+        'rating_count': table.c.rating_count + sign,
+        'rating_sum': table.c.rating_sum + sign * rating,
+    }
+    if 1 <= rating <= 5:
+        column = f'rating_{rating}'
+        values[column] = table.c[column] + sign
+    connection.execute(update(table).where(table.c.id == user_id).values(**values))
+
+@event.listens_for(UserRating, 'after_insert')
+def add_rating_aggregates(mapper, connection, target):
+    change_rating_aggregates(connection, target.rated_user_id, target.rating, 1)
+
+@event.listens_for(UserRating, 'after_update')
+def update_rating_aggregates(mapper, connection, target):
+    state = db.inspect(target)
+    rating, rated_user = state.attrs.rating.history, state.attrs.rated_user_id.history
+    if not (rating.has_changes() or rated_user.has_changes()):
+        return
+    old_rating = rating.deleted[0] if rating.deleted else target.rating
+    old_user_id = rated_user.deleted[0] if rated_user.deleted else target.rated_user_id
+    change_rating_aggregates(connection, old_user_id, old_rating, -1)
+    change_rating_aggregates(connection, target.rated_user_id, target.rating, 1)
+
+@event.listens_for(UserRating, 'after_delete')
+def remove_rating_aggregates(mapper, connection, target):
+    change_rating_aggregates(connection, target.rated_user_id, target.rating, -1)
+
+# 页面缓存与写入版本号：表数据变更提交后版本号加一，包含旧版本号的缓存不再命中
+# 缓存后端在 create_app 中按配置替换
+write_versions = WriteVersions(LocalBackend())
+
+@event.listens_for(LostItem, 'after_insert')
+@event.listens_for(LostItem, 'after_update')
+@event.listens_for(LostItem, 'after_delete')
+@event.listens_for(FoundItem, 'after_insert')
+@event.listens_for(FoundItem, 'after_update')
+@event.listens_for(FoundItem, 'after_delete')
+@event.listens_for(User, 'after_insert')
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def mark_table_written(mapper, connection, target):
+    defer_until_commit(db.inspect(target).session, 'written_tables', mapper.local_table.name)
+
+# 评分汇总直接 UPDATE 用户表，列表页卡片上显示的平均分也需要随之失效
+@event.listens_for(UserRating, 'after_insert')
+@event.listens_for(UserRating, 'after_update')
+@event.listens_for(UserRating, 'after_delete')
+def mark_user_table_written(mapper, connection, target):
+    defer_until_commit(db.inspect(target).session, 'written_tables', User.__tablename__)
+
+@on_commit('written_tables')
+def bump_write_versions(tables):
+    for table in set(tables):
+        write_versions.bump(table)
+
+def cached_response(*tables):
+    """缓存匿名用户的 GET 页面，缓存键由路由、规范化后的查询参数和相关表的写入版本号组成"""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if (not current_app.config['RESPONSE_CACHE_ENABLED'] or current_user.is_authenticated
+                    or session.get('_flashes')):
+                return view(*args, **kwargs)
+            
+            params = sorted((k, v) for k, v in request.args.items(multi=True) if v)
+            versions = '.'.join(str(v) for v in write_versions.get(*tables))
+            key = f'page:{request.endpoint}:{json.dumps(kwargs, sort_keys=True)}?{urlencode(params)}#{versions}'
+            body = write_versions.backend.get(key)
+            if body is not None:
+                return Response(body, mimetype='text/html')
+            
+            response = make_response(view(*args, **kwargs))
+            # 渲染过程中写入了会话（如闪现消息、CSRF 令牌）的页面不缓存
+            if response.status_code == 200 and response.mimetype == 'text/html' and not session.modified:
+                write_versions.backend.set(key, response.get_data(), current_app.config['RESPONSE_CACHE_TTL'])
+            return response
+        return wrapper
+    return decorator
+
+# 浏览量写回：按表合并为一次批量 UPDATE
+def write_view_counts(batch):
+    with db.engine.begin() as connection:
+        for model in (LostItem, FoundItem):
+            rows = [{'item_id': item_id, 'amount': amount}
+                    for (item_model, item_id), amount in batch.items() if item_model is model]
+            if rows:
+                connection.execute(
+                    db.update(model.__table__)
+                    .where(model.__table__.c.id == db.bindparam('item_id'))
+                    .values(views=func.coalesce(model.__table__.c.views, 0) + db.bindparam('amount')),
+                    rows
+                )
+
+view_counter = ViewCounter(write_view_counts)
+
+def count_view(item):
+    """记录一次浏览，并把尚未写入的次数计入页面显示的浏览量（不会产生写操作）"""
+    model = type(item)
+    view_counter.increment(model, item.id)
+    set_committed_value(item, 'views', (item.views or 0) + view_counter.pending(model, item.id))
+
+# 统计快照失效：物品、用户、评论发生变更并提交后标记统计数据过期
+@event.listens_for(LostItem, 'after_insert')
+@event.listens_for(LostItem, 'after_delete')
+@event.listens_for(FoundItem, 'after_insert')
+@event.listens_for(FoundItem, 'after_delete')
+@event.listens_for(User, 'after_insert')
+@event.listens_for(User, 'after_delete')
+@event.listens_for(Comment, 'after_insert')
+@event.listens_for(Comment, 'after_delete')
+def mark_statistics_dirty(mapper, connection, target):
+    defer_until_commit(db.inspect(target).session, 'statistics')
+
+@event.listens_for(LostItem, 'after_update')
+@event.listens_for(FoundItem, 'after_update')
+def mark_statistics_dirty_on_update(mapper, connection, target):
+    state = db.inspect(target)
+    if state.attrs.status.history.has_changes() or state.attrs.category.history.has_changes():
+        defer_until_commit(state.session, 'statistics')
+
+@on_commit('statistics')
+def invalidate_statistics(entries):
+    statistics_snapshot.invalidate()
+
+# 站内通知推送：事务提交后再推送，回滚的消息不会被推送
+notification_hub = NotificationHub()
+
+@on_commit('notifications')
+def publish_notifications(notifications):
+    for receiver_id, message, data, claim, claim_data in notifications:
+        # 提交后属性已过期，只从标识中取主键，不再查询数据库
+        notification_hub.publish(receiver_id, 'message', dict(data, id=db.inspect(message).identity[0]))
+        if claim is not None:
+            notification_hub.publish(receiver_id, 'claim', dict(claim_data, id=db.inspect(claim).identity[0]))
+
 # 表单类
 class RegistrationForm(FlaskForm):
     username = StringField('用户名', validators=[DataRequired(), Length(min=4, max=20)])
@@ -280,316 +984,297 @@ class RatingForm(FlaskForm):
     ], validators=[DataRequired()])
     comment = TextAreaField('评价内容（可选）', validators=[Length(max=200)])
 
-# Flask-Admin 增强管理界面
-class SecureModelView(ModelView):
-    """安全的基础视图"""
-    def is_accessible(self):
-        return current_user.is_authenticated and current_user.is_admin
+# 登录用户缓存：每个已登录请求不再查询用户表
+class CachedUser(UserMixin):
+    """登录用户的只读快照；访问快照以外的属性（如关系）时才从数据库加载完整的 User"""
+    fields = ('id', 'username', 'email', 'phone', 'is_admin', 'created_at')
     
-    def inaccessible_callback(self, name, **kwargs):
-        flash('需要管理员权限才能访问', 'danger')
-        return redirect(url_for('login'))
-
-class UserAdminView(SecureModelView):
-    """用户管理视图"""
-    column_list = ['id', 'username', 'email', 'phone', 'is_admin', 'created_at']
-    column_searchable_list = ['username', 'email', 'phone']
-    column_filters = ['is_admin', 'created_at']
-    column_sortable_list = ['id', 'username', 'email', 'created_at']
-    column_labels = {
-        'id': 'ID',
-        'username': '用户名',
-        'email': '邮箱',
-        'phone': '手机号',
-        'is_admin': '管理员',
-        'created_at': '注册时间'
-    }
-    column_descriptions = {
-        'username': '用户登录名',
-        'is_admin': '是否为管理员权限'
-    }
-    form_excluded_columns = ['password_hash', 'lost_items', 'found_items', 'comments', 'messages_sent', 'messages_received']
-    can_export = True
-    export_types = ['csv', 'xlsx']
-    
-    def on_model_change(self, form, model, is_created):
-        if is_created and hasattr(form, 'password'):
-            model.set_password(form.password.data)
-
-class LostItemAdminView(SecureModelView):
-    """失物管理视图"""
-    column_list = ['id', 'title', 'category', 'location', 'status', 'user_id', 'views', 'created_at']
-    column_searchable_list = ['title', 'description', 'location']
-    column_filters = ['category', 'status', 'created_at', 'lost_date']
-    column_sortable_list = ['id', 'title', 'views', 'created_at']
-    column_labels = {
-        'id': 'ID',
-        'title': '标题',
-        'description': '描述',
-        'category': '类别',
-        'location': '地点',
-        'lost_date': '丢失日期',
-        'status': '状态',
-        'contact_info': '联系方式',
-        'reward': '酬谢',
-        'user_id': '发布者ID',
-        'views': '浏览量',
-        'created_at': '发布时间'
-    }
-    column_formatters = {
-        'category': lambda v, c, m, p: {
-            'electronics': '电子产品',
-            'documents': '证件文件',
-            'accessories': '饰品配饰',
-            'bags': '包袋',
-            'keys': '钥匙',
-            'pets': '宠物',
-            'other': '其他'
-        }.get(m.category, m.category),
-        'status': lambda v, c, m, p: {
-            'lost': '寻找中',
-            'found': '已找到',
-            'closed': '已关闭'
-        }.get(m.status, m.status)
-    }
-    can_export = True
-    export_types = ['csv', 'xlsx']
-
-class FoundItemAdminView(SecureModelView):
-    """拾物管理视图"""
-    column_list = ['id', 'title', 'category', 'location', 'status', 'user_id', 'views', 'created_at']
-    column_searchable_list = ['title', 'description', 'location']
-    column_filters = ['category', 'status', 'created_at', 'found_date']
-    column_sortable_list = ['id', 'title', 'views', 'created_at']
-    column_labels = {
-        'id': 'ID',
-        'title': '标题',
-        'description': '描述',
-        'category': '类别',
-        'location': '地点',
-        'found_date': '拾取日期',
-        'status': '状态',
-        'contact_info': '联系方式',
-        'user_id': '发布者ID',
-        'views': '浏览量',
-        'created_at': '发布时间'
-    }
-    column_formatters = {
-        'category': lambda v, c, m, p: {
-            'electronics': '电子产品',
-            'documents': '证件文件',
-            'accessories': '饰品配饰',
-            'bags': '包袋',
-            'keys': '钥匙',
-            'pets': '宠物',
-            'other': '其他'
-        }.get(m.category, m.category),
-        'status': lambda v, c, m, p: {
-            'unclaimed': '待认领',
-            'claimed': '已认领',
-            'returned': '已归还'
-        }.get(m.status, m.status)
-    }
-    can_export = True
-    export_types = ['csv', 'xlsx']
-
-class CommentAdminView(SecureModelView):
-    """评论管理视图"""
-    column_list = ['id', 'content', 'user_id', 'lost_item_id', 'found_item_id', 'created_at']
-    column_searchable_list = ['content']
-    column_filters = ['created_at', 'user_id']
-    column_sortable_list = ['id', 'created_at']
-    column_labels = {
-        'id': 'ID',
-        'content': '评论内容',
-        'user_id': '评论者ID',
-        'lost_item_id': '失物ID',
-        'found_item_id': '拾物ID',
-        'created_at': '评论时间'
-    }
-    can_export = True
-
-class MessageAdminView(SecureModelView):
-    """消息管理视图"""
-    column_list = ['id', 'subject', 'sender_id', 'receiver_id', 'is_read', 'created_at']
-    column_searchable_list = ['subject', 'content']
-    column_filters = ['is_read', 'created_at']
-    column_sortable_list = ['id', 'created_at']
-    column_labels = {
-        'id': 'ID',
-        'subject': '主题',
-        'content': '内容',
-        'sender_id': '发送者ID',
-        'receiver_id': '接收者ID',
-        'is_read': '已读',
-        'created_at': '发送时间'
-    }
-    can_export = True
-
-class ReportAdminView(SecureModelView):
-    """举报管理视图"""
-    column_list = ['id', 'reason', 'status', 'reporter_id', 'lost_item_id', 'found_item_id', 'created_at']
-    column_searchable_list = ['reason', 'description']
-    column_filters = ['reason', 'status', 'created_at']
-    column_sortable_list = ['id', 'created_at']
-    column_labels = {
-        'id': 'ID',
-        'reporter_id': '举报者ID',
-        'lost_item_id': '失物ID',
-        'found_item_id': '拾物ID',
-        'reason': '举报原因',
-        'description': '详细说明',
-        'status': '状态',
-        'created_at': '举报时间'
-    }
-    column_formatters = {
-        'reason': lambda v, c, m, p: {
-            'spam': '垃圾信息',
-            'fraud': '虚假信息',
-            'inappropriate': '不当内容',
-            'duplicate': '重复发布',
-            'other': '其他'
-        }.get(m.reason, m.reason),
-        'status': lambda v, c, m, p: {
-            'pending': '待处理',
-            'reviewed': '已审核',
-            'resolved': '已解决'
-        }.get(m.status, m.status)
-    }
-    can_export = True
-
-class ClaimRequestAdminView(SecureModelView):
-    """认领管理视图"""
-    column_list = ['id', 'found_item_id', 'claimer_id', 'status', 'created_at', 'reviewed_at']
-    column_searchable_list = ['proof_description']
-    column_filters = ['status', 'created_at']
-    column_sortable_list = ['id', 'created_at']
-    column_labels = {
-        'id': 'ID',
-        'found_item_id': '拾物ID',
-        'claimer_id': '认领者ID',
-        'proof_description': '证明描述',
-        'proof_image': '证明图片',
-        'status': '状态',
-        'created_at': '申请时间',
-        'reviewed_at': '审核时间'
-    }
-    column_formatters = {
-        'status': lambda v, c, m, p: {
-            'pending': '待审核',
-            'approved': '已通过',
-            'rejected': '已拒绝'
-        }.get(m.status, m.status)
-    }
-    can_export = True
-
-class UserRatingAdminView(SecureModelView):
-    """评分管理视图"""
-    column_list = ['id', 'rater_id', 'rated_user_id', 'rating', 'created_at']
-    column_searchable_list = ['comment']
-    column_filters = ['rating', 'created_at']
-    column_sortable_list = ['id', 'rating', 'created_at']
-    column_labels = {
-        'id': 'ID',
-        'rater_id': '评分者ID',
-        'rated_user_id': '被评用户ID',
-        'rating': '评分',
-        'comment': '评价',
-        'created_at': '评分时间'
-    }
-    can_export = True
-
-class FavoriteAdminView(SecureModelView):
-    """收藏管理视图"""
-    column_list = ['id', 'user_id', 'lost_item_id', 'found_item_id', 'created_at']
-    column_filters = ['created_at']
-    column_sortable_list = ['id', 'created_at']
-    column_labels = {
-        'id': 'ID',
-        'user_id': '用户ID',
-        'lost_item_id': '失物ID',
-        'found_item_id': '拾物ID',
-        'created_at': '收藏时间'
-    }
-    can_export = True
-
-# 自定义首页视图
-class DashboardView(AdminIndexView):
-    """管理后台首页视图"""
-    def is_accessible(self):
-        return current_user.is_authenticated and current_user.is_admin
+    def __init__(self, user):
+        for name in self.fields:
+            object.__setattr__(self, name, getattr(user, name))
     
-    def inaccessible_callback(self, name, **kwargs):
-        flash('需要管理员权限才能访问', 'danger')
-        return redirect(url_for('login'))
+    def __setattr__(self, name, value):
+        raise AttributeError('CachedUser 是只读快照，请修改 User 模型')
     
-    @expose('/')
-    def index(self):
-        # 统计数据
-        total_users = User.query.count()
-        total_lost = LostItem.query.count()
-        total_found = FoundItem.query.count()
-        total_comments = Comment.query.count()
-        total_messages = Message.query.count()
-        total_reports = Report.query.filter_by(status='pending').count()
-        total_claims = ClaimRequest.query.filter_by(status='pending').count()
-        
-        # 最近活动
-        recent_users = User.query.order_by(User.created_at.desc()).limit(5).all()
-        recent_lost = LostItem.query.order_by(LostItem.created_at.desc()).limit(5).all()
-        recent_found = FoundItem.query.order_by(FoundItem.created_at.desc()).limit(5).all()
-        
-        return self.render('admin/dashboard.html',
-                         total_users=total_users,
-                         total_lost=total_lost,
-                         total_found=total_found,
-                         total_comments=total_comments,
-                         total_messages=total_messages,
-                         total_reports=total_reports,
-                         total_claims=total_claims,
-                         recent_users=recent_users,
-                         recent_lost=recent_lost,
-                         recent_found=recent_found)
-
-# 初始化Admin
-admin = Admin(app, name='失物招领管理后台', template_mode='bootstrap4', index_view=DashboardView(name='控制台'))
-
-# 添加视图
-admin.add_view(UserAdminView(User, db.session, name='用户管理', category='用户'))
-admin.add_view(UserRatingAdminView(UserRating, db.session, name='用户评分', category='用户'))
-
-admin.add_view(LostItemAdminView(LostItem, db.session, name='失物管理', category='物品'))
-admin.add_view(FoundItemAdminView(FoundItem, db.session, name='拾物管理', category='物品'))
-
-admin.add_view(CommentAdminView(Comment, db.session, name='评论管理', category='互动'))
-admin.add_view(MessageAdminView(Message, db.session, name='消息管理', category='互动'))
-admin.add_view(FavoriteAdminView(Favorite, db.session, name='收藏管理', category='互动'))
-
-admin.add_view(ReportAdminView(Report, db.session, name='举报管理', category='审核'))
-admin.add_view(ClaimRequestAdminView(ClaimRequest, db.session, name='认领管理', category='审核'))
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        # 同一请求内由会话的标识映射复用，只查询一次
+        return getattr(db.session.get(User, self.id), name)
+    
+    def __repr__(self):
+        return f'<CachedUser {self.username}>'
+
+user_cache = LRUCache()
 
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    user_id = int(user_id)
+    cached = user_cache.get(user_id)
+    if cached is None:
+        user = db.session.get(User, user_id)
+        if user is None:
+            return None
+        cached = CachedUser(user)
+        user_cache.set(user_id, cached)
+    return cached
+
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def mark_user_changed(mapper, connection, target):
+    defer_until_commit(db.inspect(target).session, 'users', target.id)
+
+@on_commit('users')
+def invalidate_cached_users(user_ids):
+    for user_id in set(user_ids):
+        user_cache.delete(user_id)
+
+def load_options(*options):
+    """查询的关系预加载选项；开启 SQLALCHEMY_RAISE_ON_LAZY_LOAD 时其余关系一律禁止懒加载"""
+    if current_app.config['SQLALCHEMY_RAISE_ON_LAZY_LOAD']:
+        options += (raiseload('*'),)
+    return options
+
+def apply_text_search(query, model, clauses):
+    """按关键词过滤物品查询，返回 (query, 相关度列)；FTS5 不可用时退回 LIKE，相关度列为 None"""
+    clauses = [(columns, value) for columns, value in clauses if value]
+    if not clauses:
+        return query, None
+    
+    hits = None
+    if current_app.config['SEARCH_USE_FTS']:
+        hits = search_index.match(db.session, model.__tablename__, clauses)
+    
+    if hits is None:
+        for columns, value in clauses:
+            query = query.filter(db.or_(*[getattr(model, column).contains(value) for column in columns]))
+        return query, None
+    
+    query = query.join(hits, model.id == hits.c.item_id)
+    return query, hits.c.rank
+
+def encode_cursor(values):
+    """把排序键编码为 URL 安全的游标字符串"""
+    payload = json.dumps([v.isoformat() if isinstance(v, datetime) else v for v in values])
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor, columns):
+    """解析游标，格式不正确时返回 None（从第一页开始）"""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        if len(values) != len(columns):
+            return None
+        return [datetime.fromisoformat(v) if isinstance(column.type, db.DateTime) else v
+                for column, v in zip(columns, values)]
+    except (ValueError, TypeError):
+        return None
+
+def keyset_paginate(query, columns, descending, cursor, per_page):
+    """按 (排序列..., id) 做游标分页，返回 (items, next_cursor)；翻到任意深度代价都与第一页相同"""
+    if cursor:
+        values = decode_cursor(cursor, columns)
+        if values is not None:
+            key = db.tuple_(*columns)
+            query = query.filter(key < db.tuple_(*values) if descending else key > db.tuple_(*values))
+    
+    query = query.order_by(*[column.desc() if descending else column.asc() for column in columns])
+    rows = query.add_columns(*columns).limit(per_page + 1).all()
+    
+    next_cursor = encode_cursor(rows[per_page - 1][1:]) if len(rows) > per_page else None
+    return [row[0] for row in rows[:per_page]], next_cursor
+
+def ranked_match_candidates(*conditions):
+    """按失物分组、得分降序编号的候选记录子查询（列：id、lost_item_id、score、position）"""
+    return db.session.query(
+        MatchCandidate.id, MatchCandidate.lost_item_id, MatchCandidate.score,
+        func.row_number().over(
+            partition_by=MatchCandidate.lost_item_id, order_by=(MatchCandidate.score.desc(), MatchCandidate.id)
+        ).label('position')
+    ).filter(*conditions).subquery()
+
+def top_lost_item_matches(lost_item_ids, threshold, top_k):
+    """按当前未认领的拾物重新计算多件失物的前 top_k 个候选，返回 {失物ID: [(拾物, 得分)]}"""
+    if not lost_item_ids:
+        return {}
+    lost_items = [lost_item for lost_item in LostItem.query.filter(LostItem.id.in_(lost_item_ids), LostItem.status == 'lost')
+                  if lost_item.status == 'lost']
+    found_items = {}
+    for found_item in FoundItem.query.filter(FoundItem.category.in_({lost_item.category for lost_item in lost_items}),
+                                             FoundItem.status == 'unclaimed'):
+        if found_item.status == 'unclaimed':
+            found_items.setdefault(found_item.category, []).append(found_item)
+    return {
+        lost_item.id: matching_engine.top_matches(lost_item, found_items.get(lost_item.category, []),
+                                                  threshold=threshold, k=top_k)
+        for lost_item in lost_items
+    }
+
+def sync_match_candidates(item):
+    """重新计算一件物品的匹配候选；物品已关闭时只删除旧记录（调用方负责提交）
+    
+    拾物关闭或得分下降后，原来把它列为候选的失物按其余拾物重新计算，由排在后面的拾物补上空出的名额。
+    
+    先读取并计算得分，最后才删除和写入，生产模式下 BEGIN IMMEDIATE 的写锁不会在计算期间持有。
+    调用方修改的状态等属性在计算期间不会自动 flush，候选物品按内存中的状态再过滤一次。
+    """
+    threshold = current_app.config['MATCH_SCORE_THRESHOLD']
+    top_k = current_app.config['RECOMMENDATION_TOP_K']
+    
+    if isinstance(item, LostItem):
+        if item.status != 'lost':
+            MatchCandidate.query.filter_by(lost_item_id=item.id).delete()
+            return
+        with db.session.no_autoflush:
+            candidates = [found_item for found_item in FoundItem.query.filter_by(category=item.category, status='unclaimed')
+                          if found_item.status == 'unclaimed']
+            matches = matching_engine.top_matches(item, candidates, threshold=threshold, k=top_k)
+        MatchCandidate.query.filter_by(lost_item_id=item.id).delete()
+        db.session.add_all([
+            MatchCandidate(lost_item_id=item.id, found_item_id=found_item.id, score=score)
+            for found_item, score in matches
+        ])
+    else:
+        with db.session.no_autoflush:
+            matches = []
+            if item.status == 'unclaimed':
+                # 对所有未关闭的同类失物计算得分，不按 top_k 截断：拾物排不进前 top_k 的失物仍可能把它列为前几名
+                candidates = [lost_item for lost_item in LostItem.query.filter_by(category=item.category, status='lost')
+                              if lost_item.status == 'lost']
+                matches = matching_engine.top_matches(item, candidates, threshold=threshold)
+                # 各失物现有候选（不含本拾物）中第 top_k 名的得分；候选不足 top_k 个的失物不在其中
+                ranked = ranked_match_candidates(
+                    MatchCandidate.lost_item_id == LostItem.id, LostItem.category == item.category,
+                    LostItem.status == 'lost', MatchCandidate.found_item_id != item.id
+                )
+                kth_scores = dict(db.session.query(ranked.c.lost_item_id, ranked.c.score).filter(ranked.c.position == top_k))
+                matches = [(lost_item, score) for lost_item, score in matches
+                           if score > kth_scores.get(lost_item.id, threshold)]
+            # 原来把本拾物列为候选的失物，拾物已关闭或得分下降时其他拾物可能排到前面，这些失物按全部拾物重新计算
+            previous = dict(db.session.query(MatchCandidate.lost_item_id, MatchCandidate.score).filter_by(found_item_id=item.id))
+            scores = {lost_item.id: score for lost_item, score in matches}
+            refills = top_lost_item_matches(
+                [lost_item_id for lost_item_id, score in previous.items() if scores.get(lost_item_id, -1.0) < score],
+                threshold, top_k
+            )
+            matches = [(lost_item, score) for lost_item, score in matches if lost_item.id not in refills]
+        
+        MatchCandidate.query.filter_by(found_item_id=item.id).delete()
+        if refills:
+            MatchCandidate.query.filter(MatchCandidate.lost_item_id.in_(list(refills))).delete(synchronize_session=False)
+        db.session.add_all([
+            MatchCandidate(lost_item_id=lost_item.id, found_item_id=item.id, score=score)
+            for lost_item, score in matches
+        ] + [
+            MatchCandidate(lost_item_id=lost_item_id, found_item_id=found_item.id, score=score)
+            for lost_item_id, found_matches in refills.items() for found_item, score in found_matches
+        ])
+        if matches:
+            db.session.flush()
+            # 每件失物只保留得分最高的 top_k 个候选：一条语句删除本拾物所涉及失物排名 top_k 之后的记录
+            affected = db.session.query(MatchCandidate.lost_item_id).filter_by(found_item_id=item.id)
+            ranked = ranked_match_candidates(MatchCandidate.lost_item_id.in_(affected))
+            MatchCandidate.query.filter(
+                MatchCandidate.id.in_(db.session.query(ranked.c.id).filter(ranked.c.position > top_k))
+            ).delete(synchronize_session=False)
+
+def rebuild_match_candidates():
+    """全量重建匹配候选表"""
+    MatchCandidate.query.delete()
+    for lost_item in LostItem.query.filter_by(status='lost').all():
+        sync_match_candidates(lost_item)
+    db.session.commit()
+
+# 站内消息：发送消息与未读计数在同一事务内更新，计数用 UPDATE 语句原子加减
+def send_notification(receiver_id, subject, content, sender_id, claim=None):
+    """claim 为相关的认领记录时，提交后额外推送认领状态变化"""
+    message = Message(subject=subject, content=content, sender_id=sender_id, receiver_id=receiver_id)
+    db.session.add(message)
+    db.session.execute(
+        update(User).where(User.id == receiver_id).values(unread_count=User.unread_count + 1),
+        execution_options={'synchronize_session': False}
+    )
+    data = {'subject': subject, 'sender_id': sender_id}
+    claim_data = {'found_item_id': claim.found_item_id, 'status': claim.status} if claim is not None else None
+    defer_until_commit(db.session, 'notifications', (receiver_id, message, data, claim, claim_data))
+    return message
+
+def mark_message_read(message):
+    """标记为已读并减少未读数；并发重复标记时只减一次"""
+    result = db.session.execute(
+        update(Message).where(Message.id == message.id, Message.is_read == False).values(is_read=True),
+        execution_options={'synchronize_session': False}
+    )
+    set_committed_value(message, 'is_read', True)
+    if result.rowcount:
+        db.session.execute(
+            update(User).where(User.id == message.receiver_id, User.unread_count > 0)
+            .values(unread_count=User.unread_count - 1),
+            execution_options={'synchronize_session': False}
+        )
+
+def reconcile_unread_counts(user_id=None):
+    """按消息表重新计算未读数，修正计数偏差，返回修正的用户数"""
+    actual = db.session.query(func.count(Message.id)).filter(
+        Message.receiver_id == User.id, Message.is_read == False
+    ).scalar_subquery()
+    statement = update(User).where(User.unread_count != actual).values(unread_count=actual)
+    if user_id is not None:
+        statement = statement.where(User.id == user_id)
+    return db.session.execute(statement, execution_options={'synchronize_session': False}).rowcount
+
+def reconcile_rating_aggregates(user_id=None):
+    """按评分表重新计算评分汇总，修正计数偏差，返回修正的用户数"""
+    def actual(*conditions, value=func.count(UserRating.id)):
+        return db.session.query(func.coalesce(value, 0)).filter(
+            UserRating.rated_user_id == User.id, *conditions
+        ).scalar_subquery()
+    
+    values = {'rating_count': actual(), 'rating_sum': actual(value=func.sum(UserRating.rating))}
+    for star in range(1, 6):
+        values[f'rating_{star}'] = actual(UserRating.rating == star)
+    statement = update(User).where(db.or_(*(getattr(User, name) != value for name, value in values.items())))\
+        .values(**values)
+    if user_id is not None:
+        statement = statement.where(User.id == user_id)
+    return db.session.execute(statement, execution_options={'synchronize_session': False}).rowcount
+
+def save_image(file):
+    """保存上传的图片，返回存储键；不是有效图片时提示并返回 None"""
+    key = image_pipeline.save(file)
+    if key is None:
+        flash('图片格式不支持，已忽略该图片', 'warning')
+    return key
+
+@site.template_global()
+def image_url(name, variant='card', fmt='webp'):
+    """模板中获取图片地址：variant 为 card（列表卡片）、detail（详情页）或 original，处理中返回 None"""
+    path = image_pipeline.relative_path(name, variant, fmt)
+    if path is None:
+        return None
+    return url_for('static', filename=f'uploads/{path}')
 
 # 路由
-@app.route('/')
+@site.route('/')
+@cached_response('lost_item', 'found_item', 'user')
 def index():
     # 获取最新的失物和拾物信息
-    recent_lost = LostItem.query.order_by(LostItem.created_at.desc()).limit(6).all()
-    recent_found = FoundItem.query.order_by(FoundItem.created_at.desc()).limit(6).all()
+    recent_lost = LostItem.query.options(*load_options(joinedload(LostItem.author)))\
+        .order_by(LostItem.created_at.desc()).limit(6).all()
+    recent_found = FoundItem.query.options(*load_options(joinedload(FoundItem.author)))\
+        .order_by(FoundItem.created_at.desc()).limit(6).all()
     
-    # 统计数据
+    # 统计数据（来自统计快照）
+    snapshot = statistics_snapshot.get()
     stats = {
-        'total_lost': LostItem.query.count(),
-        'total_found': FoundItem.query.count(),
-        'total_users': User.query.count(),
-        'success_cases': LostItem.query.filter_by(status='found').count() + FoundItem.query.filter_by(status='returned').count()
+        'total_lost': snapshot['total_lost'],
+        'total_found': snapshot['total_found'],
+        'total_users': snapshot['total_users'],
+        'success_cases': snapshot['lost_status'].get('found', 0) + snapshot['found_status'].get('returned', 0)
     }
     
     return render_template('index.html', recent_lost=recent_lost, recent_found=recent_found, stats=stats)
 
-@app.route('/register', methods=['GET', 'POST'])
+@site.route('/register', methods=['GET', 'POST'])
 def register():
     if current_user.is_authenticated:
         return redirect(url_for('index'))
@@ -601,7 +1286,11 @@ def register():
             email=form.email.data,
             phone=form.phone.data
         )
-        user.set_password(form.password.data)
+        try:
+            user.set_password(form.password.data)
+        except HasherBusy:
+            flash('系统繁忙，请稍后再试', 'warning')
+            return render_template('register.html', form=form), 503
         db.session.add(user)
         db.session.commit()
         flash('注册成功！请登录', 'success')
@@ -609,15 +1298,32 @@ def register():
     
     return render_template('register.html', form=form)
 
-@app.route('/login', methods=['GET', 'POST'])
+@site.route('/login', methods=['GET', 'POST'])
 def login():
     if current_user.is_authenticated:
         return redirect(url_for('index'))
     
     form = LoginForm()
     if form.validate_on_submit():
+        username_key = form.username.data.strip().lower()
+        retry_after = max(login_ip_throttle.hit(request.remote_addr), login_username_throttle.hit(username_key))
+        if retry_after:
+            flash('登录尝试过于频繁，请稍后再试', 'warning')
+            response = make_response(render_template('login.html', form=form), 429)
+            response.headers['Retry-After'] = str(int(retry_after) + 1)
+            return response
+        
         user = User.query.filter_by(username=form.username.data).first()
-        if user and user.check_password(form.password.data):
+        try:
+            authenticated = user is not None and user.check_password(form.password.data)
+            if authenticated and password_hasher.needs_rehash(user.password_hash):
+                user.set_password(form.password.data)
+                db.session.commit()
+        except HasherBusy:
+            flash('系统繁忙，请稍后再试', 'warning')
+            return render_template('login.html', form=form), 503
+        if authenticated:
+            login_username_throttle.reset(username_key)
             login_user(user)
             flash('登录成功！', 'success')
             next_page = request.args.get('next')
@@ -627,71 +1333,75 @@ def login():
     
     return render_template('login.html', form=form)
 
-@app.route('/logout')
+@site.route('/logout')
 @login_required
 def logout():
     logout_user()
     flash('已退出登录', 'info')
     return redirect(url_for('index'))
 
-@app.route('/lost')
+@site.route('/lost')
+@cached_response('lost_item', 'user')
 def lost_list():
     page = request.args.get('page', 1, type=int)
     category = request.args.get('category', '')
     search = request.args.get('search', '')
     
-    query = LostItem.query
+    query = LostItem.query.options(*load_options(joinedload(LostItem.author)))
     
     if category:
         query = query.filter_by(category=category)
     
-    if search:
-        query = query.filter(
-            db.or_(
-                LostItem.title.contains(search),
-                LostItem.description.contains(search),
-                LostItem.location.contains(search)
-            )
-        )
+    query, rank = apply_text_search(query, LostItem, [(('title', 'description', 'location'), search)])
+    
+    if rank is not None:
+        query = query.order_by(rank, LostItem.created_at.desc())
+    else:
+        query = query.order_by(LostItem.created_at.desc())
     
-    items = query.order_by(LostItem.created_at.desc()).paginate(page=page, per_page=12, error_out=False)
+    items = query.paginate(page=page, per_page=12, error_out=False)
     
     return render_template('lost_list.html', items=items, category=category, search=search)
 
-@app.route('/found')
+@site.route('/found')
+@cached_response('found_item', 'user')
 def found_list():
     page = request.args.get('page', 1, type=int)
     category = request.args.get('category', '')
     search = request.args.get('search', '')
     
-    query = FoundItem.query
+    query = FoundItem.query.options(*load_options(joinedload(FoundItem.author)))
     
     if category:
         query = query.filter_by(category=category)
     
-    if search:
-        query = query.filter(
-            db.or_(
-                FoundItem.title.contains(search),
-                FoundItem.description.contains(search),
-                FoundItem.location.contains(search)
-            )
-        )
+    query, rank = apply_text_search(query, FoundItem, [(('title', 'description', 'location'), search)])
     
-    items = query.order_by(FoundItem.created_at.desc()).paginate(page=page, per_page=12, error_out=False)
+    if rank is not None:
+        query = query.order_by(rank, FoundItem.created_at.desc())
+    else:
+        query = query.order_by(FoundItem.created_at.desc())
+    
+    items = query.paginate(page=page, per_page=12, error_out=False)
     
     return render_template('found_list.html', items=items, category=category, search=search)
 
-@app.route('/lost/new', methods=['GET', 'POST'])
+@site.route('/lost/new', methods=['GET', 'POST'])
 @login_required
 def new_lost():
     form = LostItemForm()
     if form.validate_on_submit():
+        # 同一用户重复发布时拒绝；其他用户发布过相似信息时发布后提示
+        minhash = item_signature(form.title.data, form.description.data)
+        duplicates = find_duplicates(LostItem, minhash)
+        own = [item_id for item_id, user_id, _ in duplicates if user_id == current_user.id]
+        if own and current_app.config['DUPLICATE_BLOCK_SAME_USER']:
+            flash(f'你已发布过相似的失物信息「{db.session.get(LostItem, own[0]).title}」，请在原信息上修改，无需重复发布', 'warning')
+            return render_template('new_lost.html', form=form)
+        
         filename = None
         if form.image.data:
-            file = form.image.data
-            filename = secure_filename(f"{datetime.now().strftime('%Y%m%d%H%M%S')}_{file.filename}")
-            file.save(os.path.join(app.config['UPLOAD_FOLDER'], filename))
+            filename = save_image(form.image.data)
         
         item = LostItem(
             title=form.title.data,
@@ -702,25 +1412,36 @@ def new_lost():
             contact_info=form.contact_info.data,
             reward=form.reward.data,
             image=filename,
+            minhash=minhash,
             user_id=current_user.id
         )
         db.session.add(item)
         db.session.commit()
+        sync_match_candidates(item)
+        db.session.commit()
         flash('失物信息发布成功！', 'success')
+        if len(duplicates) > len(own):
+            flash(f'已有 {len(duplicates) - len(own)} 条相似的失物信息，可能是同一物品', 'info')
         return redirect(url_for('lost_detail', id=item.id))
     
     return render_template('new_lost.html', form=form)
 
-@app.route('/found/new', methods=['GET', 'POST'])
+@site.route('/found/new', methods=['GET', 'POST'])
 @login_required
 def new_found():
     form = FoundItemForm()
     if form.validate_on_submit():
+        # 同一用户重复发布时拒绝；其他用户发布过相似信息时发布后提示
+        minhash = item_signature(form.title.data, form.description.data)
+        duplicates = find_duplicates(FoundItem, minhash)
+        own = [item_id for item_id, user_id, _ in duplicates if user_id == current_user.id]
+        if own and current_app.config['DUPLICATE_BLOCK_SAME_USER']:
+            flash(f'你已发布过相似的拾物信息「{db.session.get(FoundItem, own[0]).title}」，请在原信息上修改，无需重复发布', 'warning')
+            return render_template('new_found.html', form=form)
+        
         filename = None
         if form.image.data:
-            file = form.image.data
-            filename = secure_filename(f"{datetime.now().strftime('%Y%m%d%H%M%S')}_{file.filename}")
-            file.save(os.path.join(app.config['UPLOAD_FOLDER'], filename))
+            filename = save_image(form.image.data)
         
         item = FoundItem(
             title=form.title.data,
@@ -730,22 +1451,27 @@ def new_found():
             found_date=datetime.strptime(form.found_date.data, '%Y-%m-%d'),
             contact_info=form.contact_info.data,
             image=filename,
+            minhash=minhash,
             user_id=current_user.id
         )
         db.session.add(item)
         db.session.commit()
+        sync_match_candidates(item)
+        db.session.commit()
         flash('拾物信息发布成功！', 'success')
+        if len(duplicates) > len(own):
+            flash(f'已有 {len(duplicates) - len(own)} 条相似的拾物信息，可能是同一物品', 'info')
         return redirect(url_for('found_detail', id=item.id))
     
     return render_template('new_found.html', form=form)
 
-@app.route('/lost/<int:id>')
+@site.route('/lost/<int:id>')
 def lost_detail(id):
-    item = LostItem.query.get_or_404(id)
-    item.views += 1
-    db.session.commit()
+    item = LostItem.query.options(*load_options(joinedload(LostItem.author))).get_or_404(id)
+    count_view(item)
     
-    comments = Comment.query.filter_by(lost_item_id=id).order_by(Comment.created_at.desc()).all()
+    comments = Comment.query.options(*load_options(joinedload(Comment.author)))\
+        .filter_by(lost_item_id=id).order_by(Comment.created_at.desc()).all()
     comment_form = CommentForm()
     
     # 检查当前用户是否已收藏
@@ -759,13 +1485,13 @@ def lost_detail(id):
     return render_template('lost_detail.html', item=item, comments=comments, 
                          comment_form=comment_form, is_favorited=is_favorited)
 
-@app.route('/found/<int:id>')
+@site.route('/found/<int:id>')
 def found_detail(id):
-    item = FoundItem.query.get_or_404(id)
-    item.views += 1
-    db.session.commit()
+    item = FoundItem.query.options(*load_options(joinedload(FoundItem.author))).get_or_404(id)
+    count_view(item)
     
-    comments = Comment.query.filter_by(found_item_id=id).order_by(Comment.created_at.desc()).all()
+    comments = Comment.query.options(*load_options(joinedload(Comment.author)))\
+        .filter_by(found_item_id=id).order_by(Comment.created_at.desc()).all()
     comment_form = CommentForm()
     
     # 检查当前用户是否已收藏
@@ -779,7 +1505,7 @@ def found_detail(id):
     return render_template('found_detail.html', item=item, comments=comments, 
                          comment_form=comment_form, is_favorited=is_favorited)
 
-@app.route('/lost/<int:id>/comment', methods=['POST'])
+@site.route('/lost/<int:id>/comment', methods=['POST'])
 @login_required
 def comment_lost(id):
     item = LostItem.query.get_or_404(id)
@@ -797,7 +1523,7 @@ def comment_lost(id):
     
     return redirect(url_for('lost_detail', id=id))
 
-@app.route('/found/<int:id>/comment', methods=['POST'])
+@site.route('/found/<int:id>/comment', methods=['POST'])
 @login_required
 def comment_found(id):
     item = FoundItem.query.get_or_404(id)
@@ -815,7 +1541,7 @@ def comment_found(id):
     
     return redirect(url_for('found_detail', id=id))
 
-@app.route('/profile')
+@site.route('/profile')
 @login_required
 def profile():
     my_lost_items = LostItem.query.filter_by(user_id=current_user.id).order_by(LostItem.created_at.desc()).all()
@@ -823,35 +1549,31 @@ def profile():
     
     return render_template('profile.html', my_lost_items=my_lost_items, my_found_items=my_found_items)
 
-@app.route('/messages')
+@site.route('/messages')
 @login_required
 def messages():
-    received = Message.query.filter_by(receiver_id=current_user.id).order_by(Message.created_at.desc()).all()
-    sent = Message.query.filter_by(sender_id=current_user.id).order_by(Message.created_at.desc()).all()
+    received = Message.query.options(*load_options(joinedload(Message.sender)))\
+        .filter_by(receiver_id=current_user.id).order_by(Message.created_at.desc()).all()
+    sent = Message.query.options(*load_options(joinedload(Message.receiver)))\
+        .filter_by(sender_id=current_user.id).order_by(Message.created_at.desc()).all()
     
     return render_template('messages.html', received=received, sent=sent)
 
-@app.route('/messages/send/<int:user_id>', methods=['GET', 'POST'])
+@site.route('/messages/send/<int:user_id>', methods=['GET', 'POST'])
 @login_required
 def send_message(user_id):
     receiver = User.query.get_or_404(user_id)
     form = MessageForm()
     
     if form.validate_on_submit():
-        message = Message(
-            subject=form.subject.data,
-            content=form.content.data,
-            sender_id=current_user.id,
-            receiver_id=user_id
-        )
-        db.session.add(message)
+        send_notification(user_id, form.subject.data, form.content.data, current_user.id)
         db.session.commit()
         flash('消息发送成功！', 'success')
         return redirect(url_for('messages'))
     
     return render_template('send_message.html', form=form, receiver=receiver)
 
-@app.route('/messages/<int:id>/read')
+@site.route('/messages/<int:id>/read')
 @login_required
 def read_message(id):
     message = Message.query.get_or_404(id)
@@ -861,12 +1583,12 @@ def read_message(id):
         return redirect(url_for('messages'))
     
     if message.receiver_id == current_user.id and not message.is_read:
-        message.is_read = True
+        mark_message_read(message)
         db.session.commit()
     
     return render_template('read_message.html', message=message)
 
-@app.route('/lost/<int:id>/update_status/<status>')
+@site.route('/lost/<int:id>/update_status/<status>')
 @login_required
 def update_lost_status(id, status):
     item = LostItem.query.get_or_404(id)
@@ -877,12 +1599,13 @@ def update_lost_status(id, status):
     
     if status in ['lost', 'found', 'closed']:
         item.status = status
+        sync_match_candidates(item)
         db.session.commit()
         flash('状态更新成功！', 'success')
     
     return redirect(url_for('lost_detail', id=id))
 
-@app.route('/found/<int:id>/update_status/<status>')
+@site.route('/found/<int:id>/update_status/<status>')
 @login_required
 def update_found_status(id, status):
     item = FoundItem.query.get_or_404(id)
@@ -893,12 +1616,37 @@ def update_found_status(id, status):
     
     if status in ['unclaimed', 'claimed', 'returned']:
         item.status = status
+        sync_match_candidates(item)
         db.session.commit()
         flash('状态更新成功！', 'success')
     
     return redirect(url_for('found_detail', id=id))
 
-@app.route('/statistics')
+def compute_statistics():
+    """按 (类别, 状态) 分组汇总物品数量，每张表一次查询"""
+    snapshot = {}
+    for name, model in (('lost', LostItem), ('found', FoundItem)):
+        by_category = {}
+        by_status = {}
+        total = 0
+        rows = db.session.query(model.category, model.status, func.count())\
+            .group_by(model.category, model.status).all()
+        for category, status, count in rows:
+            by_category[category] = by_category.get(category, 0) + count
+            by_status[status] = by_status.get(status, 0) + count
+            total += count
+        snapshot[f'{name}_by_category'] = by_category
+        snapshot[f'{name}_status'] = by_status
+        snapshot[f'total_{name}'] = total
+    
+    snapshot['total_users'] = User.query.count()
+    snapshot['total_comments'] = Comment.query.count()
+    return snapshot
+
+# 统计快照：定时刷新，数据变更后失效
+statistics_snapshot = Snapshot(compute_statistics)
+
+@site.route('/statistics')
 def statistics():
     # 各类别统计
     categories = ['electronics', 'documents', 'accessories', 'bags', 'keys', 'pets', 'other']
@@ -912,32 +1660,36 @@ def statistics():
         'other': '其他'
     }
     
+    snapshot = statistics_snapshot.get()
+    
     lost_by_category = {}
     found_by_category = {}
     
     for cat in categories:
-        lost_by_category[category_labels[cat]] = LostItem.query.filter_by(category=cat).count()
-        found_by_category[category_labels[cat]] = FoundItem.query.filter_by(category=cat).count()
+        lost_by_category[category_labels[cat]] = snapshot['lost_by_category'].get(cat, 0)
+        found_by_category[category_labels[cat]] = snapshot['found_by_category'].get(cat, 0)
     
     # 状态统计
     lost_status = {
-        '寻找中': LostItem.query.filter_by(status='lost').count(),
-        '已找到': LostItem.query.filter_by(status='found').count(),
-        '已关闭': LostItem.query.filter_by(status='closed').count()
+        '寻找中': snapshot['lost_status'].get('lost', 0),
+        '已找到': snapshot['lost_status'].get('found', 0),
+        '已关闭': snapshot['lost_status'].get('closed', 0)
     }
     
     found_status = {
-        '待认领': FoundItem.query.filter_by(status='unclaimed').count(),
-        '已认领': FoundItem.query.filter_by(status='claimed').count(),
-        '已归还': FoundItem.query.filter_by(status='returned').count()
+        '待认领': snapshot['found_status'].get('unclaimed', 0),
+        '已认领': snapshot['found_status'].get('claimed', 0),
+        '已归还': snapshot['found_status'].get('returned', 0)
     }
     
     # 总体统计
+    total_items = snapshot['total_lost'] + snapshot['total_found']
+    success_cases = snapshot['lost_status'].get('found', 0) + snapshot['found_status'].get('returned', 0)
     total_stats = {
-        'total_items': LostItem.query.count() + FoundItem.query.count(),
-        'total_users': User.query.count(),
-        'total_comments': Comment.query.count(),
-        'success_rate': round((LostItem.query.filter_by(status='found').count() + FoundItem.query.filter_by(status='returned').count()) / max(LostItem.query.count() + FoundItem.query.count(), 1) * 100, 1)
+        'total_items': total_items,
+        'total_users': snapshot['total_users'],
+        'total_comments': snapshot['total_comments'],
+        'success_rate': round(success_cases / max(total_items, 1) * 100, 1)
     }
     
     return render_template('statistics.html', 
@@ -947,14 +1699,97 @@ def statistics():
                          found_status=found_status,
                          total_stats=total_stats)
 
-@app.route('/api/unread_messages')
+@site.route('/api/unread_messages')
 @login_required
 def unread_messages():
-    count = Message.query.filter_by(receiver_id=current_user.id, is_read=False).count()
-    return jsonify({'count': count})
+    count = db.session.query(User.unread_count).filter(User.id == current_user.id).scalar()
+    return jsonify({'count': count or 0})
+
+@site.route('/api/suggest')
+def suggest():
+    """输入联想：field 为 title 或 location，q 为已输入的前缀（汉字、拼音全拼或首字母）"""
+    field = request.args.get('field', 'title')
+    prefix = request.args.get('q', '').strip()
+    limit = max(1, min(request.args.get('limit', current_app.config['SUGGEST_TOP_K'], type=int),
+                       current_app.config['SUGGEST_TOP_K']))
+    suggestions = suggester.lookup(field, prefix, limit) if prefix and field in suggester.fields else []
+    response = jsonify({'q': prefix, 'field': field, 'suggestions': suggestions})
+    response.cache_control.public = True
+    response.cache_control.max_age = 60
+    return response
+
+@site.route('/api/similar-images/<item_type>/<int:item_id>')
+def similar_images(item_type, item_id):
+    """与指定物品图片相似的未认领拾物，按汉明距离升序；图片尚未处理完时 ready 为 false"""
+    model = {'lost': LostItem, 'found': FoundItem}.get(item_type)
+    if model is None:
+        abort(404)
+    item = model.query.get_or_404(item_id)
+    hashes = image_fingerprints([item.image]).get(item.image) if item.image else None
+    if hashes is None:
+        return jsonify({'ready': False, 'items': []})
+    limit = max(1, min(request.args.get('limit', current_app.config['IMAGE_SIMILAR_LIMIT'], type=int),
+                       current_app.config['IMAGE_SIMILAR_LIMIT']))
+    matches = found_image_index.search(*hashes, max_distance=current_app.config['IMAGE_SIMILAR_MAX_DISTANCE'],
+                                       limit=limit, exclude={item.id} if model is FoundItem else ())
+    # 索引可能滞后于数据库（其他进程的修改），按当前状态再过滤一次
+    found_items = {found_item.id: found_item for found_item in FoundItem.query.filter(
+        FoundItem.id.in_([found_id for found_id, _ in matches]), FoundItem.status == 'unclaimed')}
+    return jsonify({'ready': True, 'items': [{
+        'id': found_id,
+        'title': found_items[found_id].title,
+        'location': found_items[found_id].location,
+        'distance': distance,
+        'similarity': round(hash_similarity(distance), 3),
+        'url': url_for('found_detail', id=found_id),
+        'image': image_url(found_items[found_id].image),
+    } for found_id, distance in matches if found_id in found_items]})
+
+@site.route('/api/stream')
+@login_required
+def notification_stream():
+    """推送未读数、新消息和认领状态（text/event-stream）；返回 204 时客户端应改用轮询"""
+    app = current_app._get_current_object()
+    if not app.config['NOTIFICATION_STREAM_ENABLED']:
+        return '', 204
+    user_id = current_user.id
+    subscription = notification_hub.subscribe(user_id)
+    if subscription is None:
+        return '', 204
+    heartbeat = app.config['NOTIFICATION_STREAM_HEARTBEAT']
+    deadline = time.monotonic() + app.config['NOTIFICATION_STREAM_MAX_DURATION']
+    
+    def unread_count():
+        # 每次单独开应用上下文，读完立即归还数据库连接，空闲连接不占用连接池
+        with app.app_context():
+            return db.session.query(User.unread_count).filter(User.id == user_id).scalar() or 0
+    
+    def generate():
+        try:
+            yield f'retry: {heartbeat * 1000}\n\n'
+            yield format_event('unread', {'count': unread_count()})
+            while time.monotonic() < deadline:
+                first = subscription.get(timeout=min(heartbeat, max(deadline - time.monotonic(), 0)))
+                if first is None:
+                    yield ': heartbeat\n\n'
+                    continue
+                events = [first] + subscription.drain()
+                for event_name, data in events:
+                    yield format_event(event_name, data)
+                # 一批事件之后只读一次最新未读数
+                yield format_event('unread', {'count': unread_count()})
+        finally:
+            notification_hub.unsubscribe(subscription)
+    
+    response = Response(generate(), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'  # 关闭 Nginx 缓冲
+    # HEAD 请求或客户端在首次读取前断开时生成器不会执行，关闭响应时也要取消订阅
+    response.call_on_close(lambda: notification_hub.unsubscribe(subscription))
+    return response
 
 # 新增：收藏功能
-@app.route('/lost/<int:id>/favorite', methods=['POST'])
+@site.route('/lost/<int:id>/favorite', methods=['POST'])
 @login_required
 def favorite_lost(id):
     item = LostItem.query.get_or_404(id)
@@ -970,7 +1805,7 @@ def favorite_lost(id):
         db.session.commit()
         return jsonify({'favorited': True, 'message': '收藏成功'})
 
-@app.route('/found/<int:id>/favorite', methods=['POST'])
+@site.route('/found/<int:id>/favorite', methods=['POST'])
 @login_required
 def favorite_found(id):
     item = FoundItem.query.get_or_404(id)
@@ -986,14 +1821,17 @@ def favorite_found(id):
         db.session.commit()
         return jsonify({'favorited': True, 'message': '收藏成功'})
 
-@app.route('/favorites')
+@site.route('/favorites')
 @login_required
 def favorites():
-    favorites = Favorite.query.filter_by(user_id=current_user.id).order_by(Favorite.created_at.desc()).all()
+    favorites = Favorite.query.options(*load_options(
+        joinedload(Favorite.lost_item).joinedload(LostItem.author),
+        joinedload(Favorite.found_item).joinedload(FoundItem.author)
+    )).filter_by(user_id=current_user.id).order_by(Favorite.created_at.desc()).all()
     return render_template('favorites.html', favorites=favorites)
 
 # 新增：举报功能
-@app.route('/lost/<int:id>/report', methods=['GET', 'POST'])
+@site.route('/lost/<int:id>/report', methods=['GET', 'POST'])
 @login_required
 def report_lost(id):
     item = LostItem.query.get_or_404(id)
@@ -1013,7 +1851,7 @@ def report_lost(id):
     
     return render_template('report.html', form=form, item=item, item_type='lost')
 
-@app.route('/found/<int:id>/report', methods=['GET', 'POST'])
+@site.route('/found/<int:id>/report', methods=['GET', 'POST'])
 @login_required
 def report_found(id):
     item = FoundItem.query.get_or_404(id)
@@ -1034,7 +1872,7 @@ def report_found(id):
     return render_template('report.html', form=form, item=item, item_type='found')
 
 # 新增：认领功能
-@app.route('/found/<int:id>/claim', methods=['GET', 'POST'])
+@site.route('/found/<int:id>/claim', methods=['GET', 'POST'])
 @login_required
 def claim_item(id):
     item = FoundItem.query.get_or_404(id)
@@ -1055,27 +1893,25 @@ def claim_item(id):
     if form.validate_on_submit():
         filename = None
         if form.proof_image.data:
-            file = form.proof_image.data
-            filename = secure_filename(f"claim_{datetime.now().strftime('%Y%m%d%H%M%S')}_{file.filename}")
-            file.save(os.path.join(app.config['UPLOAD_FOLDER'], filename))
+            filename = save_image(form.proof_image.data)
         
         claim = ClaimRequest(
             found_item_id=id,
             claimer_id=current_user.id,
             proof_description=form.proof_description.data,
-            proof_image=filename
+            proof_image=filename,
+            status='pending'
         )
         db.session.add(claim)
-        db.session.commit()
         
-        # 通知发布者
-        message = Message(
-            subject=f'有人申请认领您发布的物品：{item.title}',
-            content=f'用户 {current_user.username} 申请认领您发布的物品，请前往查看认领详情。',
-            sender_id=current_user.id,
-            receiver_id=item.user_id
+        # 通知发布者（与认领记录在同一事务内提交）
+        send_notification(
+            item.user_id,
+            f'有人申请认领您发布的物品：{item.title}',
+            f'用户 {current_user.username} 申请认领您发布的物品，请前往查看认领详情。',
+            current_user.id,
+            claim=claim
         )
-        db.session.add(message)
         db.session.commit()
         
         flash('认领申请已提交！', 'success')
@@ -1083,20 +1919,25 @@ def claim_item(id):
     
     return render_template('claim_item.html', form=form, item=item)
 
-@app.route('/my-claims')
+@site.route('/my-claims')
 @login_required
 def my_claims():
     # 我申请的认领
-    my_claim_requests = ClaimRequest.query.filter_by(claimer_id=current_user.id).order_by(ClaimRequest.created_at.desc()).all()
+    claim_options = load_options(
+        joinedload(ClaimRequest.found_item).joinedload(FoundItem.author),
+        joinedload(ClaimRequest.claimer)
+    )
+    my_claim_requests = ClaimRequest.query.options(*claim_options)\
+        .filter_by(claimer_id=current_user.id).order_by(ClaimRequest.created_at.desc()).all()
     
     # 我发布物品的认领请求
-    my_items_claims = ClaimRequest.query.join(FoundItem).filter(
+    my_items_claims = ClaimRequest.query.options(*claim_options).join(ClaimRequest.found_item).filter(
         FoundItem.user_id == current_user.id
     ).order_by(ClaimRequest.created_at.desc()).all()
     
     return render_template('my_claims.html', my_claim_requests=my_claim_requests, my_items_claims=my_items_claims)
 
-@app.route('/claim/<int:id>/review/<action>')
+@site.route('/claim/<int:id>/review/<action>')
 @login_required
 def review_claim(id, action):
     claim = ClaimRequest.query.get_or_404(id)
@@ -1109,35 +1950,36 @@ def review_claim(id, action):
         claim.status = 'approved'
         claim.reviewed_at = datetime.utcnow()
         claim.found_item.status = 'returned'
+        sync_match_candidates(claim.found_item)
         
         # 通知认领者
-        message = Message(
-            subject=f'您的认领申请已通过',
-            content=f'您申请认领的物品"{claim.found_item.title}"已被批准，请联系发布者领取。',
-            sender_id=current_user.id,
-            receiver_id=claim.claimer_id
+        send_notification(
+            claim.claimer_id,
+            f'您的认领申请已通过',
+            f'您申请认领的物品"{claim.found_item.title}"已被批准，请联系发布者领取。',
+            current_user.id,
+            claim=claim
         )
-        db.session.add(message)
         flash('已通过认领申请', 'success')
     elif action == 'reject':
         claim.status = 'rejected'
         claim.reviewed_at = datetime.utcnow()
         
         # 通知认领者
-        message = Message(
-            subject=f'您的认领申请未通过',
-            content=f'很抱歉，您申请认领的物品"{claim.found_item.title}"未通过审核。',
-            sender_id=current_user.id,
-            receiver_id=claim.claimer_id
+        send_notification(
+            claim.claimer_id,
+            f'您的认领申请未通过',
+            f'很抱歉，您申请认领的物品"{claim.found_item.title}"未通过审核。',
+            current_user.id,
+            claim=claim
         )
-        db.session.add(message)
         flash('已拒绝认领申请', 'info')
     
     db.session.commit()
     return redirect(url_for('my_claims'))
 
 # 新增：用户评分功能
-@app.route('/user/<int:user_id>/rate', methods=['GET', 'POST'])
+@site.route('/user/<int:user_id>/rate', methods=['GET', 'POST'])
 @login_required
 def rate_user(user_id):
     user = User.query.get_or_404(user_id)
@@ -1175,72 +2017,47 @@ def rate_user(user_id):
     
     return render_template('rate_user.html', form=form, user=user)
 
-@app.route('/user/<int:user_id>')
+@site.route('/user/<int:user_id>')
 def user_profile(user_id):
     user = User.query.get_or_404(user_id)
+    page = request.args.get('page', 1, type=int)
     
-    # 计算平均评分
-    ratings = UserRating.query.filter_by(rated_user_id=user_id).all()
-    avg_rating = sum(r.rating for r in ratings) / len(ratings) if ratings else 0
+    # 平均分和星级分布读取用户表上的汇总，评分列表分页显示
+    ratings = UserRating.query.options(*load_options(joinedload(UserRating.rater)))\
+        .filter_by(rated_user_id=user_id).order_by(UserRating.created_at.desc())\
+        .paginate(page=page, per_page=current_app.config['RATINGS_PAGE_SIZE'], error_out=False)
     
     # 用户发布的物品
     lost_items = LostItem.query.filter_by(user_id=user_id).order_by(LostItem.created_at.desc()).limit(5).all()
     found_items = FoundItem.query.filter_by(user_id=user_id).order_by(FoundItem.created_at.desc()).limit(5).all()
     
-    return render_template('user_profile.html', user=user, avg_rating=avg_rating, 
-                         ratings=ratings, lost_items=lost_items, found_items=found_items)
+    return render_template('user_profile.html', user=user, avg_rating=user.average_rating,
+                         rating_histogram=user.rating_histogram, ratings=ratings.items, ratings_pagination=ratings,
+                         lost_items=lost_items, found_items=found_items)
 
 # 新增：智能匹配推荐
-@app.route('/recommendations')
+@site.route('/recommendations')
 @login_required
 def recommendations():
-    # 获取我的失物
-    my_lost_items = LostItem.query.filter_by(user_id=current_user.id, status='lost').all()
-    recommendations = []
-    
-    for lost_item in my_lost_items:
-        # 查找相似的拾物
-        found_items = FoundItem.query.filter_by(category=lost_item.category, status='unclaimed').all()
-        
-        for found_item in found_items:
-            # 计算相似度
-            similarity = calculate_similarity(lost_item, found_item)
-            if similarity > 0.3:  # 相似度阈值
-                recommendations.append({
-                    'lost_item': lost_item,
-                    'found_item': found_item,
-                    'similarity': round(similarity * 100, 1)
-                })
-    
-    # 按相似度排序
-    recommendations.sort(key=lambda x: x['similarity'], reverse=True)
+    # 读取我的失物已计算好的匹配候选，按相似度排序
+    rows = db.session.query(MatchCandidate, LostItem, FoundItem)\
+        .join(LostItem, MatchCandidate.lost_item_id == LostItem.id)\
+        .join(FoundItem, MatchCandidate.found_item_id == FoundItem.id)\
+        .options(*load_options(joinedload(FoundItem.author)))\
+        .filter(LostItem.user_id == current_user.id, LostItem.status == 'lost',
+                FoundItem.status == 'unclaimed')\
+        .order_by(MatchCandidate.score.desc()).all()
+    
+    recommendations = [{
+        'lost_item': lost_item,
+        'found_item': found_item,
+        'similarity': round(candidate.score * 100, 1)
+    } for candidate, lost_item, found_item in rows]
     
     return render_template('recommendations.html', recommendations=recommendations)
 
-def calculate_similarity(lost_item, found_item):
-    """计算失物和拾物的相似度"""
-    score = 0.0
-    
-    # 类别匹配（权重0.3）
-    if lost_item.category == found_item.category:
-        score += 0.3
-    
-    # 标题相似度（权重0.3）
-    title_sim = SequenceMatcher(None, lost_item.title.lower(), found_item.title.lower()).ratio()
-    score += title_sim * 0.3
-    
-    # 描述相似度（权重0.2）
-    desc_sim = SequenceMatcher(None, lost_item.description.lower(), found_item.description.lower()).ratio()
-    score += desc_sim * 0.2
-    
-    # 地点相似度（权重0.2）
-    if lost_item.location.lower() in found_item.location.lower() or found_item.location.lower() in lost_item.location.lower():
-        score += 0.2
-    
-    return score
-
 # 新增：高级搜索
-@app.route('/advanced-search')
+@site.route('/advanced-search')
 def advanced_search():
     item_type = request.args.get('type', 'lost')  # lost or found
     category = request.args.get('category', '')
@@ -1249,21 +2066,26 @@ def advanced_search():
     date_from = request.args.get('date_from', '')
     date_to = request.args.get('date_to', '')
     status = request.args.get('status', '')
-    sort = request.args.get('sort', 'newest')  # newest, oldest, most_viewed
+    # relevance, newest, oldest, most_viewed；有关键词时默认按相关度排序
+    sort = request.args.get('sort') or ('relevance' if keyword or location else 'newest')
+    cursor = request.args.get('cursor', '')
+    per_page = current_app.config['ADVANCED_SEARCH_PAGE_SIZE']
+    
+    # 地点能解析为规范地点时按该地点及其下级过滤（走 place_id 索引），否则退回文本检索
+    gazetteer = gazetteer_snapshot.get()
+    place_id = gazetteer.resolve(location) if location else None
+    place_ids = gazetteer.subtree(place_id) if place_id is not None else None
+    text_clauses = [(('title', 'description'), keyword)]
+    if place_ids is None:
+        text_clauses.append((('location',), location))
     
     if item_type == 'lost':
-        query = LostItem.query
+        query = LostItem.query.options(*load_options(joinedload(LostItem.author)))
         if category:
             query = query.filter_by(category=category)
-        if keyword:
-            query = query.filter(
-                db.or_(
-                    LostItem.title.contains(keyword),
-                    LostItem.description.contains(keyword)
-                )
-            )
-        if location:
-            query = query.filter(LostItem.location.contains(location))
+        if place_ids is not None:
+            query = query.filter(LostItem.place_id.in_(place_ids))
+        query, rank = apply_text_search(query, LostItem, text_clauses)
         if date_from:
             query = query.filter(LostItem.lost_date >= datetime.strptime(date_from, '%Y-%m-%d'))
         if date_to:
@@ -1271,28 +2093,22 @@ def advanced_search():
         if status:
             query = query.filter_by(status=status)
         
-        # 排序
-        if sort == 'oldest':
-            query = query.order_by(LostItem.created_at.asc())
+        # 排序（以 id 作为并列时的次序，保证游标唯一）
+        if sort == 'relevance' and rank is not None:
+            items, next_cursor = keyset_paginate(query, [rank, LostItem.id], False, cursor, per_page)
+        elif sort == 'oldest':
+            items, next_cursor = keyset_paginate(query, [LostItem.created_at, LostItem.id], False, cursor, per_page)
         elif sort == 'most_viewed':
-            query = query.order_by(LostItem.views.desc())
+            items, next_cursor = keyset_paginate(query, [LostItem.views, LostItem.id], True, cursor, per_page)
         else:  # newest
-            query = query.order_by(LostItem.created_at.desc())
-        
-        items = query.all()
+            items, next_cursor = keyset_paginate(query, [LostItem.created_at, LostItem.id], True, cursor, per_page)
     else:
-        query = FoundItem.query
+        query = FoundItem.query.options(*load_options(joinedload(FoundItem.author)))
         if category:
             query = query.filter_by(category=category)
-        if keyword:
-            query = query.filter(
-                db.or_(
-                    FoundItem.title.contains(keyword),
-                    FoundItem.description.contains(keyword)
-                )
-            )
-        if location:
-            query = query.filter(FoundItem.location.contains(location))
+        if place_ids is not None:
+            query = query.filter(FoundItem.place_id.in_(place_ids))
+        query, rank = apply_text_search(query, FoundItem, text_clauses)
         if date_from:
             query = query.filter(FoundItem.found_date >= datetime.strptime(date_from, '%Y-%m-%d'))
         if date_to:
@@ -1300,32 +2116,80 @@ def advanced_search():
         if status:
             query = query.filter_by(status=status)
         
-        # 排序
-        if sort == 'oldest':
-            query = query.order_by(FoundItem.created_at.asc())
+        # 排序（以 id 作为并列时的次序，保证游标唯一）
+        if sort == 'relevance' and rank is not None:
+            items, next_cursor = keyset_paginate(query, [rank, FoundItem.id], False, cursor, per_page)
+        elif sort == 'oldest':
+            items, next_cursor = keyset_paginate(query, [FoundItem.created_at, FoundItem.id], False, cursor, per_page)
         elif sort == 'most_viewed':
-            query = query.order_by(FoundItem.views.desc())
+            items, next_cursor = keyset_paginate(query, [FoundItem.views, FoundItem.id], True, cursor, per_page)
         else:  # newest
-            query = query.order_by(FoundItem.created_at.desc())
-        
-        items = query.all()
+            items, next_cursor = keyset_paginate(query, [FoundItem.created_at, FoundItem.id], True, cursor, per_page)
     
     return render_template('advanced_search.html', items=items, item_type=item_type,
                          category=category, keyword=keyword, location=location,
-                         date_from=date_from, date_to=date_to, status=status, sort=sort)
+                         place=gazetteer.names.get(place_id),
+                         date_from=date_from, date_to=date_to, status=status, sort=sort,
+                         cursor=cursor, next_cursor=next_cursor)
 
 # 新增：数据导出
-@app.route('/export/lost')
+EXPORT_BATCH_SIZE = 500
+EXPORT_CHUNK_SIZE = 64 * 1024
+
+def export_rows(query, row):
+    """分批读取数据库，逐行生成导出内容"""
+    for item in query.yield_per(EXPORT_BATCH_SIZE):
+        yield row(item)
+
+def export_response(query, header, row, basename):
+    """流式导出：默认 CSV，format=xlsx 时导出 Excel，内存占用与导出行数无关"""
+    date = datetime.now().strftime("%Y%m%d")
+    
+    if request.args.get('format') == 'xlsx':
+        # 只写模式逐行写入，文件内容暂存在磁盘临时文件中
+        from openpyxl import Workbook  # 只有导出 Excel 时才需要，避免拖慢启动
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet()
+        sheet.append(header)
+        for values in export_rows(query, row):
+            sheet.append(values)
+        output = tempfile.TemporaryFile()
+        workbook.save(output)
+        output.seek(0)
+        return send_file(
+            output,
+            mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+            as_attachment=True,
+            download_name=f'{basename}_{date}.xlsx'
+        )
+    
+    def generate():
+        buffer = StringIO()
+        writer = csv.writer(buffer)
+        buffer.write('\ufeff')
+        writer.writerow(header)
+        for values in export_rows(query, row):
+            writer.writerow(values)
+            if buffer.tell() >= EXPORT_CHUNK_SIZE:
+                yield buffer.getvalue().encode('utf-8')
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue().encode('utf-8')
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/csv',
+        headers={'Content-Disposition': f'attachment; filename={basename}_{date}.csv'}
+    )
+
+@site.route('/export/lost')
 @login_required
 def export_lost():
-    items = LostItem.query.filter_by(user_id=current_user.id).all()
+    query = LostItem.query.filter_by(user_id=current_user.id)
+    header = ['ID', '标题', '类别', '描述', '丢失地点', '丢失日期', '状态', '联系方式', '酬谢', '浏览次数', '发布时间']
     
-    output = StringIO()
-    writer = csv.writer(output)
-    writer.writerow(['ID', '标题', '类别', '描述', '丢失地点', '丢失日期', '状态', '联系方式', '酬谢', '浏览次数', '发布时间'])
-    
-    for item in items:
-        writer.writerow([
+    def row(item):
+        return [
             item.id,
             item.title,
             item.category,
@@ -1337,27 +2201,18 @@ def export_lost():
             item.reward or '',
             item.views,
             item.created_at.strftime('%Y-%m-%d %H:%M:%S')
-        ])
+        ]
     
-    output.seek(0)
-    return send_file(
-        BytesIO(output.getvalue().encode('utf-8-sig')),
-        mimetype='text/csv',
-        as_attachment=True,
-        download_name=f'my_lost_items_{datetime.now().strftime("%Y%m%d")}.csv'
-    )
+    return export_response(query, header, row, 'my_lost_items')
 
-@app.route('/export/found')
+@site.route('/export/found')
 @login_required
 def export_found():
-    items = FoundItem.query.filter_by(user_id=current_user.id).all()
+    query = FoundItem.query.filter_by(user_id=current_user.id)
+    header = ['ID', '标题', '类别', '描述', '拾取地点', '拾取日期', '状态', '联系方式', '浏览次数', '发布时间']
     
-    output = StringIO()
-    writer = csv.writer(output)
-    writer.writerow(['ID', '标题', '类别', '描述', '拾取地点', '拾取日期', '状态', '联系方式', '浏览次数', '发布时间'])
-    
-    for item in items:
-        writer.writerow([
+    def row(item):
+        return [
             item.id,
             item.title,
             item.category,
@@ -1368,29 +2223,178 @@ def export_found():
             item.contact_info,
             item.views,
             item.created_at.strftime('%Y-%m-%d %H:%M:%S')
-        ])
-    
-    output.seek(0)
-    return send_file(
-        BytesIO(output.getvalue().encode('utf-8-sig')),
-        mimetype='text/csv',
-        as_attachment=True,
-        download_name=f'my_found_items_{datetime.now().strftime("%Y%m%d")}.csv'
-    )
+        ]
+    
+    return export_response(query, header, row, 'my_found_items')
+
+# 命令行工具
+@site.cli_command('rebuild-search-index')
+def rebuild_search_index_command():
+    """重建全文检索索引"""
+    with db.engine.begin() as connection:
+        search_index.rebuild(connection)
+    print('全文检索索引重建完成')
+
+@site.cli_command('rebuild-match-candidates')
+def rebuild_match_candidates_command():
+    """全量重建匹配候选表"""
+    rebuild_match_candidates()
+    print(f'匹配候选重建完成，共 {MatchCandidate.query.count()} 条')
+
+@site.cli_command('reconcile-unread-counts')
+def reconcile_unread_counts_command():
+    """按消息表修正所有用户的未读消息数（可定时执行）"""
+    fixed = reconcile_unread_counts()
+    db.session.commit()
+    print(f'未读消息数核对完成，修正 {fixed} 个用户')
+
+@site.cli_command('reconcile-ratings')
+def reconcile_ratings_command():
+    """按评分表修正所有用户的评分汇总"""
+    fixed = reconcile_rating_aggregates()
+    db.session.commit()
+    print(f'评分汇总核对完成，修正 {fixed} 个用户')
+
+@site.cli_command('load-places')
+@click.argument('path', default='places.json')
+def load_places_command(path):
+    """从 JSON 文件导入地点词典，并重新解析已有物品的地点"""
+    with open(path, encoding='utf-8') as f:
+        added = load_places(json.load(f))
+    db.session.commit()
+    changed = resolve_places()
+    db.session.commit()
+    print(f'地点导入完成，新增 {added} 个地点，{changed} 件物品的地点已更新')
+
+@site.cli_command('resolve-places')
+def resolve_places_command():
+    """按当前地点词典重新解析全部物品的地点"""
+    changed = resolve_places()
+    db.session.commit()
+    print(f'地点解析完成，{changed} 件物品的地点已更新')
+
+@site.cli_command('backfill-image-hashes')
+def backfill_image_hashes_command():
+    """为已有图片计算感知哈希（跳过已计算的图片）"""
+    keys = set()
+    for column in (LostItem.image, FoundItem.image, ClaimRequest.proof_image):
+        keys.update(key for key, in db.session.query(column).filter(column.isnot(None)).distinct())
+    keys -= {key for key, in db.session.query(ImageFingerprint.image_key)}
+    added = failed = 0
+    for key in sorted(keys):
+        try:
+            phash_value, dhash_value = fingerprint_file(image_pipeline.source_path(key))
+        except (OSError, ValueError):
+            failed += 1
+            continue
+        db.session.add(ImageFingerprint(image_key=key, phash=to_signed(phash_value), dhash=to_signed(dhash_value)))
+        added += 1
+        if added % 500 == 0:
+            db.session.commit()
+    db.session.commit()
+    found_image_index.reset()
+    print(f'图片哈希计算完成，新增 {added} 张，{failed} 张无法读取；'
+          f'执行 flask rebuild-match-candidates 可让推荐计入图片相似度')
+
+@site.cli_command('rebuild-duplicate-signatures')
+def rebuild_duplicate_signatures_command():
+    """为全部物品重新计算重复检测签名（升级后为已有物品补充签名）"""
+    changed = rebuild_item_signatures()
+    db.session.commit()
+    for index in duplicate_indexes.values():
+        index.reset()
+    print(f'重复检测签名计算完成，{changed} 件物品已更新')
 
 # 错误处理
-@app.errorhandler(404)
+@site.errorhandler(404)
 def not_found_error(error):
     return render_template('404.html'), 404
 
-@app.errorhandler(500)
+@site.errorhandler(500)
 def internal_error(error):
     db.session.rollback()
     return render_template('500.html'), 500
 
+# 管理后台：首次访问 /admin 时才导入 Flask-Admin 并创建子应用
+class LazyAdmin:
+    """WSGI 中间件，/admin 下的请求转给管理后台子应用，其余请求交给主应用"""
+    def __init__(self, wsgi_app, factory, prefix='/admin'):
+        self.wsgi_app = wsgi_app
+        self.factory = factory
+        self.prefix = prefix
+        self._admin_app = None
+        self._lock = threading.Lock()
+    
+    def __call__(self, environ, start_response):
+        path = environ.get('PATH_INFO', '')
+        if path == self.prefix or path.startswith(self.prefix + '/'):
+            return self.admin_app(environ, start_response)
+        return self.wsgi_app(environ, start_response)
+    
+    @property
+    def admin_app(self):
+        if self._admin_app is None:
+            with self._lock:
+                if self._admin_app is None:
+                    self._admin_app = self.factory()
+        return self._admin_app
+
+def create_app(config=None):
+    """创建应用；config 中的配置项覆盖默认配置"""
+    app = Flask(__name__)
+    configure_app(app)
+    if config:
+        app.config.update(config)
+    
+    database_router.configure(app)
+    db.init_app(app)
+    database_router.init_db(app, db)
+    migrate.init_app(app)
+    login_manager.init_app(app)
+    profiler.init_app(app)
+    image_pipeline.init_app(app)
+    view_counter.init_app(app)
+    password_hasher.init_app(app)
+    login_ip_throttle.rate = app.config['LOGIN_RATE_PER_IP']
+    login_ip_throttle.burst = app.config['LOGIN_BURST_PER_IP']
+    login_username_throttle.rate = app.config['LOGIN_RATE_PER_USERNAME']
+    login_username_throttle.burst = app.config['LOGIN_BURST_PER_USERNAME']
+    write_versions.backend = app.config['RESPONSE_CACHE_BACKEND'] or LocalBackend(
+        maxsize=app.config['RESPONSE_CACHE_SIZE'], ttl=app.config['RESPONSE_CACHE_TTL'])
+    statistics_snapshot.ttl = app.config['STATISTICS_CACHE_TTL']
+    statistics_snapshot.min_interval = app.config['STATISTICS_MIN_REFRESH']
+    gazetteer_snapshot.ttl = app.config['GAZETTEER_CACHE_TTL']
+    suggester.init_app(app)
+    matching_engine.image_weight = app.config['IMAGE_MATCH_WEIGHT']
+    found_image_index.rebuild_interval = app.config['IMAGE_INDEX_REBUILD_INTERVAL']
+    for index in duplicate_indexes.values():
+        index.rebuild_interval = app.config['DUPLICATE_INDEX_REBUILD_INTERVAL']
+    notification_hub.max_connections = app.config['NOTIFICATION_STREAM_MAX_CONNECTIONS']
+    user_cache.ttl = app.config['USER_CACHE_TTL']
+    user_cache.maxsize = app.config['USER_CACHE_SIZE']
+    site.init_app(app)
+    
+    def create_admin_app():
+        from admin_views import create_admin_app
+        return create_admin_app(app)
+    
+    app.wsgi_app = LazyAdmin(app.wsgi_app, create_admin_app)
+    if app.config['PROXY_FIX_X_FOR']:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config['PROXY_FIX_X_FOR'], x_proto=1)
+    return app
+
 if __name__ == '__main__':
+    # 以脚本方式运行时本模块名为 __main__，让 admin_views 中的 "from app import ..." 引用同一份模块
+    sys.modules.setdefault('app', sys.modules[__name__])
+    app = create_app()
     with app.app_context():
         db.create_all()
+        with db.engine.begin() as connection:
+            if search_index.is_supported(connection):
+                search_index.ensure_index(connection)
+        # 首次启用匹配候选表时回填已有数据
+        if not MatchCandidate.query.first() and LostItem.query.first():
+            rebuild_match_candidates()
         # 创建管理员账号（如果不存在）
         admin_user = User.query.filter_by(username='admin').first()
         if not admin_user:
@@ -0,0 +1,273 @@
+"""缓存工具：统计快照、LRU 缓存、按表写入版本失效与延迟加载的内存索引"""
+from collections import OrderedDict
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class Snapshot:
+    """定时刷新、写入后失效的只读快照
+
+    ttl 秒后强制刷新；invalidate() 标记数据已变更，
+    但两次刷新之间至少间隔 min_interval 秒，避免频繁写入时每次访问都重新计算。
+    """
+
+    def __init__(self, loader, ttl=300, min_interval=5):
+        self.loader = loader
+        self.ttl = ttl
+        self.min_interval = min_interval
+        self._value = None
+        self._loaded_at = None
+        self._stale = False
+        self._lock = threading.Lock()
+
+    def _fresh(self, now):
+        if self._loaded_at is None:
+            return False
+        age = now - self._loaded_at
+        if age >= self.ttl:
+            return False
+        return not (self._stale and age >= self.min_interval)
+
+    def get(self):
+        if self._fresh(time.monotonic()):
+            return self._value
+        with self._lock:
+            # 等锁期间其他线程可能已经刷新
+            if not self._fresh(time.monotonic()):
+                self._stale = False
+                self._value = self.loader()
+                self._loaded_at = time.monotonic()
+            return self._value
+
+    def invalidate(self):
+        self._stale = True
+
+    def clear(self):
+        with self._lock:
+            self._value = None
+            self._loaded_at = None
+
+
+class BackgroundSnapshot:
+    """由后台线程按固定间隔重新计算的快照，读取时不等待计算（进程内首次读取除外）
+
+    loader 在 init_app 绑定的应用上下文中执行。线程不会被 fork 出的子进程继承，
+    每个进程在首次读取时启动自己的刷新线程。
+    """
+
+    def __init__(self, loader, interval=60):
+        self.loader = loader
+        self.interval = interval
+        self.app = None
+        self._value = None
+        self._refreshed_at = None  # 计算完成的时间（time.time()）
+        self._pid = None
+        self._wakeup = threading.Event()
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.app = app
+
+    def _load(self):
+        if self.app is None:
+            value = self.loader()
+        else:
+            with self.app.app_context():
+                value = self.loader()
+        self._value, self._refreshed_at = value, time.time()
+
+    def _run(self, wakeup):
+        while True:
+            wakeup.wait(self.interval)
+            wakeup.clear()
+            try:
+                self._load()
+            except Exception:
+                logger.exception('快照刷新失败')
+
+    def _start(self):
+        with self._lock:
+            if self._pid != os.getpid():
+                self._wakeup = threading.Event()
+                threading.Thread(target=self._run, args=(self._wakeup,), name='snapshot-refresh', daemon=True).start()
+                self._pid = os.getpid()
+
+    def get(self):
+        """返回 (快照, 计算完成的时间戳)"""
+        if self._pid != os.getpid():
+            self._start()
+        if self._refreshed_at is None:
+            with self._lock:
+                if self._refreshed_at is None:
+                    self._load()
+        return self._value, self._refreshed_at
+
+    def refresh(self):
+        """让刷新线程立即重新计算（不等待完成）"""
+        self._wakeup.set()
+
+
+class LazyIndex:
+    """首次查询时由 loader() 加载、之后随数据变更增量更新的内存索引
+
+    索引由 {ID: 条目} 和若干个哈希表组成，子类实现 _insert(ID, *值) 和 _delete(ID)，
+    查询前在持有 self._lock 时调用 _ensure()。设置了 rebuild_interval 时超过该时间（秒）后
+    在下次查询时重新加载：多进程部署时其他进程的变更只能通过重新加载同步。
+    """
+
+    def __init__(self, loader=None, tables=1, rebuild_interval=None):
+        self.loader = loader
+        self.rebuild_interval = rebuild_interval
+        self._table_count = tables
+        self._built_at = None
+        self._entries = None
+        self._tables = None
+        self._lock = threading.RLock()
+
+    @property
+    def loaded(self):
+        return self._entries is not None
+
+    def _ensure(self):
+        if self._entries is not None and self.rebuild_interval \
+                and time.monotonic() - self._built_at >= self.rebuild_interval:
+            self._entries = None
+        if self._entries is None:
+            self._entries, self._tables = {}, [{} for _ in range(self._table_count)]
+            self._built_at = time.monotonic()
+            try:
+                self._load(list(self.loader()) if self.loader else [])
+            except Exception:
+                self._entries = self._tables = None
+                raise
+
+    def _load(self, rows):
+        """rows 为 loader() 返回的 [(ID, *值)]"""
+        for item_id, *values in rows:
+            self._insert(item_id, *values)
+
+    def build(self):
+        with self._lock:
+            self._entries = None
+            self._ensure()
+
+    def reset(self):
+        """丢弃索引，下次查询时重新加载"""
+        with self._lock:
+            self._entries = self._tables = None
+
+    def add(self, item_id, *values):
+        with self._lock:
+            if self._entries is None:
+                return  # 尚未加载，加载时会从数据库读取
+            self._delete(item_id)
+            self._insert(item_id, *values)
+
+    def remove(self, item_id):
+        with self._lock:
+            if self._entries is not None:
+                self._delete(item_id)
+
+    def __len__(self):
+        return len(self._entries or ())
+
+
+class LRUCache:
+    """带过期时间的 LRU 缓存（线程安全）"""
+
+    def __init__(self, maxsize=1024, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class LocalBackend:
+    """进程内缓存后端"""
+
+    def __init__(self, maxsize=1024, ttl=60):
+        self._cache = LRUCache(maxsize=maxsize, ttl=ttl)
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        return self._cache.get(key)
+
+    def set(self, key, value, ttl=None):
+        self._cache.set(key, value, ttl)
+
+    def incr(self, key):
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+            return self._counters[key]
+
+    def get_counter(self, key):
+        return self._counters.get(key, 0)
+
+
+class RedisBackend:
+    """多进程共享的缓存后端，client 为 redis.Redis 实例（需自行安装 redis）"""
+
+    def __init__(self, client, prefix='lostfound:'):
+        self.client = client
+        self.prefix = prefix
+
+    def get(self, key):
+        return self.client.get(self.prefix + key)
+
+    def set(self, key, value, ttl=None):
+        self.client.set(self.prefix + key, value, ex=ttl)
+
+    def incr(self, key):
+        return self.client.incr(self.prefix + key)
+
+    def get_counter(self, key):
+        return int(self.client.get(self.prefix + key) or 0)
+
+
+class WriteVersions:
+    """每张表的写入版本号；缓存键包含版本号，表数据变更后旧缓存自然失效"""
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    def bump(self, table):
+        return self.backend.incr(f'version:{table}')
+
+    def get(self, *tables):
+        return tuple(self.backend.get_counter(f'version:{table}') for table in tables)
@@ -0,0 +1,197 @@
+"""发布物品时的近似重复检测
+
+标题和描述规范化后切成相邻两个字符的片段（中文按字切分时 2-gram 最能区分措辞变化），用 MinHash
+压缩成 128 个整数的签名：两件物品签名中相同位置取值相等的比例，即为两组片段的 Jaccard 相似度的估计。
+签名分成 32 段（每段 4 个值），每段的取值作为哈希表的键（局部敏感哈希），至少有一段完全相同的物品
+才成为候选，再按签名估计相似度。相似度 0.6 的两件物品成为候选的概率约 98.8%，0.3 的约 23%，0.1 的不到 1%；
+检查只需查 32 次哈希表，与已有物品数量无关。
+"""
+import unicodedata
+import zlib
+
+import numpy as np
+
+from caching import LazyIndex
+
+NUM_PERM = 128
+BANDS = 32
+SHINGLE_SIZE = 2
+
+_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+
+def normalize(text):
+    """全角转半角、转小写，只保留文字和数字"""
+    return ''.join(char for char in unicodedata.normalize('NFKC', text or '').lower() if char.isalnum())
+
+
+def shingles(text, size=SHINGLE_SIZE):
+    text = normalize(text)
+    if len(text) <= size:
+        return {text} if text else set()
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+def _parameter(name, i):
+    # 由固定字符串导出哈希参数，签名保存在数据库中，不能依赖随机数生成器的实现
+    return zlib.crc32(f'minhash-{name}-{i}'.encode()) & 0x7fffffff | 1
+
+
+class MinHasher:
+    def __init__(self, num_perm=NUM_PERM):
+        self.num_perm = num_perm
+        self.a = np.array([_parameter('a', i) for i in range(num_perm)], dtype=np.uint64)
+        self.b = np.array([_parameter('b', i) for i in range(num_perm)], dtype=np.uint64)
+
+    def signature(self, text):
+        """文本的 MinHash 签名（uint32 数组），没有可用字符时返回 None"""
+        grams = shingles(text)
+        if not grams:
+            return None
+        values = np.fromiter((zlib.crc32(gram.encode('utf-8')) for gram in grams), dtype=np.uint64, count=len(grams))
+        # a < 2^31、值 < 2^32，乘积加 b 不会超出 64 位
+        hashed = (values[:, None] * self.a + self.b) % _PRIME & _MAX_HASH
+        return hashed.min(axis=0).astype(np.uint32)
+
+
+def to_bytes(signature):
+    return signature.astype('<u4').tobytes()
+
+
+def from_bytes(data):
+    return np.frombuffer(data, dtype='<u4')
+
+
+def similarity(a, b):
+    """两个签名估计的 Jaccard 相似度"""
+    return float(np.count_nonzero(a == b)) / len(a)
+
+
+class DuplicateIndex(LazyIndex):
+    """按 LSH 分段检索近似重复的物品
+
+    loader() 返回 [(物品ID, 发布者ID, 签名)]，首次查询时调用。
+    每段的哈希表中，只有一件物品的桶直接保存物品ID，多件时才用集合，几十万件物品也不会占用太多内存。
+    """
+
+    def __init__(self, loader=None, bands=BANDS, rebuild_interval=None):
+        super().__init__(loader, tables=bands, rebuild_interval=rebuild_interval)
+        self.bands = bands
+        # 每段的取值合并为一个 64 位整数作为键；键相同但取值不同的情况极少，查询时会按签名核对
+        self._multipliers = np.random.default_rng(0).integers(1, 1 << 63, size=NUM_PERM, dtype=np.uint64) | np.uint64(1)
+
+    def _band_keys(self, signatures):
+        """签名矩阵（每行一个签名）每段的键"""
+        rows = signatures.shape[1] // self.bands
+        bands = signatures[:, :rows * self.bands].reshape(len(signatures), self.bands, rows).astype(np.uint64)
+        return (bands * self._multipliers[:rows]).sum(axis=2).tolist()
+
+    def _load(self, rows):
+        if rows:
+            # 一次计算全部签名的分段键
+            keys = self._band_keys(np.stack([signature for _, _, signature in rows]))
+            for (item_id, user_id, signature), item_keys in zip(rows, keys):
+                self._insert(item_id, user_id, signature, item_keys)
+
+    def _insert(self, item_id, user_id, signature, keys=None):
+        if keys is None:
+            keys = self._band_keys(signature[None])[0]
+        self._entries[item_id] = (user_id, signature, keys)
+        for table, key in zip(self._tables, keys):
+            bucket = table.get(key)
+            if bucket is None:
+                table[key] = item_id
+            elif type(bucket) is set:
+                bucket.add(item_id)
+            else:
+                table[key] = {bucket, item_id}
+
+    def _delete(self, item_id):
+        entry = self._entries.pop(item_id, None)
+        if entry is None:
+            return
+        for table, key in zip(self._tables, entry[2]):
+            bucket = table.get(key)
+            if type(bucket) is set:
+                bucket.discard(item_id)
+                if len(bucket) == 1:
+                    table[key] = bucket.pop()
+            elif bucket == item_id:
+                del table[key]
+
+    def query(self, signature, threshold=0.6, exclude=()):
+        """返回 [(物品ID, 发布者ID, 相似度)]，按相似度降序"""
+        keys = self._band_keys(signature[None])[0]
+        with self._lock:
+            self._ensure()
+            candidates = set()
+            for table, key in zip(self._tables, keys):
+                bucket = table.get(key)
+                if type(bucket) is set:
+                    candidates.update(bucket)
+                elif bucket is not None:
+                    candidates.add(bucket)
+            results = []
+            for item_id in candidates:
+                if item_id in exclude:
+                    continue
+                user_id, other, _ = self._entries[item_id]
+                score = similarity(signature, other)
+                if score >= threshold:
+                    results.append((item_id, user_id, score))
+        results.sort(key=lambda result: (-result[2], result[0]))
+        return results
+
+    def clusters(self, threshold=0.6, max_bucket=200, max_size=50):
+        """相似度达到阈值的物品连成的分组 [[物品ID, ...]]，按组大小降序
+
+        只比较落在同一个桶中的物品；超过 max_bucket 个物品的桶（通常是大量模板化的内容）只取前 max_bucket 个。
+        相似关系会传递（A 像 B、B 像 C），模板化的内容可能连成几千件的一组，每组最多 max_size 件，
+        合并后超出的两组不再合并。在锁内只复制多件物品的桶和签名，比较在锁外进行，不阻塞发布时的查询。
+        """
+        with self._lock:
+            self._ensure()
+            buckets = [sorted(bucket) for table in self._tables for bucket in table.values() if type(bucket) is set]
+            signatures = {item_id: entry[1] for item_id, entry in self._entries.items()}
+
+        parent, size = {}, {}
+
+        def find(item_id):
+            root = item_id
+            while parent.get(root, root) != root:
+                root = parent[root]
+            while item_id != root:
+                parent[item_id], item_id = root, parent.get(item_id, item_id)
+            return root
+
+        def union(a, b):
+            root_a, root_b = find(a), find(b)
+            if root_a == root_b:
+                return
+            merged = size.get(root_a, 1) + size.get(root_b, 1)
+            if merged > max_size:
+                return
+            root, child = min(root_a, root_b), max(root_a, root_b)
+            parent[child] = root
+            size[root] = merged
+
+        for members in buckets:
+            if len(members) == 2:
+                a, b = members
+                if find(a) != find(b) and similarity(signatures[a], signatures[b]) >= threshold:
+                    union(a, b)
+                continue
+            members = members[:max_bucket]
+            matrix = np.stack([signatures[item_id] for item_id in members])
+            for i in range(len(members) - 1):
+                # 一次比较第 i 个与其后的全部物品
+                scores = np.count_nonzero(matrix[i + 1:] == matrix[i], axis=1) / matrix.shape[1]
+                for j in np.flatnonzero(scores >= threshold):
+                    union(members[i], members[i + 1 + j])
+        groups = {}
+        for item_id in list(parent):
+            groups.setdefault(find(item_id), set()).add(item_id)
+        clusters = [sorted(group | {root}) for root, group in groups.items()]
+        clusters.sort(key=lambda cluster: (-len(cluster), cluster[0]))
+        return clusters
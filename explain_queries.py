@@ -0,0 +1,134 @@
+"""打印各路由热点查询的 EXPLAIN QUERY PLAN，检查是否存在全表扫描
+
+用法：
+    python explain_queries.py             # 使用 app.py 中配置的数据库
+    python explain_queries.py --analyze   # 先执行 ANALYZE 更新统计信息
+
+建议先用大数据量填充数据库再运行，存在全表扫描的查询会被标记为 [FULL SCAN]，
+并以非零状态码退出。
+"""
+import argparse
+import re
+import sys
+from datetime import datetime
+
+from sqlalchemy import func, select
+
+from app import (create_app, db, search_index, User, LostItem, FoundItem, Comment, Message,
+                 Favorite, Report, ClaimRequest, UserRating, MatchCandidate)
+
+FULL_SCAN = re.compile(r'^SCAN (\w+)$')
+
+
+def route_queries(user_id=1, item_id=1):
+    """各路由的查询语句，与 app.py 中的写法保持一致"""
+    now = datetime.utcnow()
+    queries = []
+
+    def add(route, label, statement):
+        queries.append((route, label, statement))
+
+    for model, name in ((LostItem, 'lost'), (FoundItem, 'found')):
+        add('/', f'最新{name}', select(model).order_by(model.created_at.desc()).limit(6))
+        add(f'/{name}', '分类列表',
+            select(model).filter_by(category='electronics').order_by(model.created_at.desc()).limit(12))
+        add(f'/{name}', '全部列表', select(model).order_by(model.created_at.desc()).limit(12))
+        add(f'/{name}/<id>', '评论列表',
+            select(Comment).filter_by(**{f'{name}_item_id': item_id}).order_by(Comment.created_at.desc()))
+        add(f'/{name}/<id>', '是否已收藏',
+            select(Favorite).filter_by(user_id=user_id, **{f'{name}_item_id': item_id}).limit(1))
+        add('/profile', f'我的{name}',
+            select(model).filter_by(user_id=user_id).order_by(model.created_at.desc()))
+        add('/advanced-search', f'{name} 最新（游标）',
+            select(model).filter_by(category='other')
+            .where(db.tuple_(model.created_at, model.id) < db.tuple_(now, 10 ** 9))
+            .order_by(model.created_at.desc(), model.id.desc()).limit(21))
+        add('/advanced-search', f'{name} 浏览最多（游标）',
+            select(model).where(db.tuple_(model.views, model.id) < db.tuple_(100, 10 ** 9))
+            .order_by(model.views.desc(), model.id.desc()).limit(21))
+        add('/advanced-search', f'{name} 按地点（游标）',
+            select(model).where(model.place_id.in_([1, 2, 3]))
+            .where(db.tuple_(model.created_at, model.id) < db.tuple_(now, 10 ** 9))
+            .order_by(model.created_at.desc(), model.id.desc()).limit(21))
+        add('/statistics', f'{name} 分类×状态统计',
+            select(model.category, model.status, func.count()).group_by(model.category, model.status))
+
+        if search_index.is_supported(db.session.connection()):
+            hits = search_index.match(db.session, model.__tablename__,
+                                      [(('title', 'description', 'location'), '图书馆')])
+            add(f'/{name}?search=', '全文检索',
+                select(model).join(hits, model.id == hits.c.item_id).order_by(hits.c.rank).limit(12))
+
+    add('/recommendations', '候选拾物（发布时）',
+        select(FoundItem).filter_by(category='electronics', status='unclaimed'))
+    add('/recommendations', '候选失物（发布时）',
+        select(LostItem).filter_by(category='electronics', status='lost'))
+    add('/recommendations', '匹配候选',
+        select(MatchCandidate, LostItem, FoundItem)
+        .join(LostItem, MatchCandidate.lost_item_id == LostItem.id)
+        .join(FoundItem, MatchCandidate.found_item_id == FoundItem.id)
+        .where(LostItem.user_id == user_id, LostItem.status == 'lost', FoundItem.status == 'unclaimed')
+        .order_by(MatchCandidate.score.desc()))
+    add('/messages', '收件箱',
+        select(Message).filter_by(receiver_id=user_id).order_by(Message.created_at.desc()))
+    add('/messages', '发件箱',
+        select(Message).filter_by(sender_id=user_id).order_by(Message.created_at.desc()))
+    add('/api/unread_messages', '未读消息数',
+        select(User.unread_count).where(User.id == user_id))
+    add('/favorites', '我的收藏',
+        select(Favorite).filter_by(user_id=user_id).order_by(Favorite.created_at.desc()))
+    add('/found/<id>/claim', '重复认领检查',
+        select(ClaimRequest).filter_by(found_item_id=item_id, claimer_id=user_id, status='pending').limit(1))
+    add('/my-claims', '我申请的认领',
+        select(ClaimRequest).filter_by(claimer_id=user_id).order_by(ClaimRequest.created_at.desc()))
+    add('/my-claims', '我的物品收到的认领',
+        select(ClaimRequest).join(FoundItem).where(FoundItem.user_id == user_id)
+        .order_by(ClaimRequest.created_at.desc()))
+    add('/user/<id>', '收到的评分（分页）',
+        select(UserRating).filter_by(rated_user_id=user_id).order_by(UserRating.created_at.desc()).limit(10))
+    add('/user/<id>/rate', '已有评分',
+        select(UserRating).filter_by(rater_id=user_id, rated_user_id=item_id).limit(1))
+    add('/admin', '待处理举报', select(func.count()).select_from(Report).filter_by(status='pending'))
+    add('/admin', '待审核认领', select(func.count()).select_from(ClaimRequest).filter_by(status='pending'))
+    add('/admin', '最新用户', select(User).order_by(User.created_at.desc()).limit(5))
+    return queries
+
+
+def explain(connection, statement):
+    compiled = statement.compile(dialect=connection.dialect, compile_kwargs={'render_postcompile': True})
+    params = compiled.construct_params()
+    positional = tuple(params[name] for name in compiled.positiontup) if compiled.positiontup else params
+    rows = connection.exec_driver_sql(f'EXPLAIN QUERY PLAN {compiled}', positional).fetchall()
+    return [row[-1] for row in rows]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='打印各路由查询的执行计划')
+    parser.add_argument('--analyze', action='store_true', help='先执行 ANALYZE 更新统计信息')
+    parser.add_argument('--user-id', type=int, default=1)
+    parser.add_argument('--item-id', type=int, default=1)
+    args = parser.parse_args()
+
+    full_scans = 0
+    with create_app().app_context():
+        connection = db.session.connection()
+        if connection.dialect.name != 'sqlite':
+            sys.exit('EXPLAIN QUERY PLAN 仅支持 SQLite')
+        if args.analyze:
+            connection.exec_driver_sql('ANALYZE')
+
+        for route, label, statement in route_queries(args.user_id, args.item_id):
+            plan = explain(connection, statement)
+            scanned = [line for line in plan if FULL_SCAN.match(line)]
+            full_scans += bool(scanned)
+            print(f"{'[FULL SCAN] ' if scanned else ''}{route}  {label}")
+            for line in plan:
+                print(f'    {line}')
+
+    print('=' * 60)
+    print(f'存在全表扫描的查询：{full_scans} 条')
+    sys.exit(1 if full_scans else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,172 @@
+"""地点词典：把自由填写的地点解析为规范地点
+
+地点按层级组织（校区 → 建筑 → 楼层/区域），每个地点有若干别名。所有别名构建成一个
+Aho-Corasick 自动机，一次扫描即可找出文本中出现的全部别名，"图书馆三楼"与"三楼图书馆"
+都能解析到同一个地点。物品匹配时按两个地点在层级中的距离计算相似度。
+"""
+from collections import deque
+import unicodedata
+
+
+def normalize(text):
+    """全角转半角、转小写、去掉空白"""
+    return ''.join(unicodedata.normalize('NFKC', text or '').lower().split())
+
+
+class AliasAutomaton:
+    """Aho-Corasick 多模式匹配"""
+
+    def __init__(self, patterns):
+        """patterns: {别名: 地点ID集合}"""
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [[]]
+        for pattern, values in patterns.items():
+            self._add(pattern, values)
+        self._build()
+
+    def _add(self, pattern, values):
+        state = 0
+        for char in pattern:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = next_state
+        self._output[state].append((len(pattern), frozenset(values)))
+
+    def _build(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(char, 0)
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    def find(self, text):
+        """返回 [(起始位置, 结束位置, 地点ID集合)]"""
+        matches = []
+        state = 0
+        for position, char in enumerate(text):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            for length, values in self._output[state]:
+                matches.append((position + 1 - length, position + 1, values))
+        return matches
+
+
+class Gazetteer:
+    """内存中的地点层级与别名索引（只读，重新加载时整体替换）"""
+
+    def __init__(self, places=(), aliases=()):
+        """places: [(地点ID, 上级地点ID, 名称)]；aliases: [(地点ID, 别名)]"""
+        self.names = {}
+        self.parents = {}
+        for place_id, parent_id, name in places:
+            self.names[place_id] = name
+            self.parents[place_id] = parent_id
+        self.children = {}
+        for place_id, parent_id in self.parents.items():
+            if parent_id is not None:
+                self.children.setdefault(parent_id, []).append(place_id)
+        # 从自身到根的路径，用于计算层级距离
+        self.paths = {place_id: self._path(place_id) for place_id in self.parents}
+
+        patterns = {}
+        for place_id, name in self.names.items():
+            patterns.setdefault(normalize(name), set()).add(place_id)
+        for place_id, alias in aliases:
+            if place_id in self.names and normalize(alias):
+                patterns.setdefault(normalize(alias), set()).add(place_id)
+        patterns.pop('', None)
+        self.automaton = AliasAutomaton(patterns)
+
+    def _path(self, place_id):
+        path = []
+        while place_id is not None and place_id not in path:
+            path.append(place_id)
+            place_id = self.parents.get(place_id)
+        return path
+
+    def __len__(self):
+        return len(self.names)
+
+    def depth(self, place_id):
+        return len(self.paths.get(place_id, ()))
+
+    def resolve(self, text):
+        """解析地点文本，返回最具体的地点ID，无法解析时返回 None
+
+        文本中每个出现的别名都是一条线索，指向一个或多个地点（如"三楼"对应所有建筑的三楼），
+        线索的权重为 1/指向的地点数。候选地点的得分为自身或其上级被指向的线索权重之和，
+        得分最高的候选中取层级最深的，仍有多个时取它们的最近公共上级，但只在文本也提到了该上级
+        （或更上级）时采用（如"图书馆 自习室"取图书馆）；只写了"三楼"这类别名时公共上级是整个校区，
+        与文本无关，返回 None，由调用方退回按文本比较。
+        """
+        matches = self.automaton.find(normalize(text))
+        if not matches:
+            return None
+        # 被更长别名覆盖的匹配不算独立线索（如"老图书馆"中的"图书馆"）
+        matches = [m for m in matches
+                   if not any(o is not m and o[0] <= m[0] and m[1] <= o[1] and o[1] - o[0] > m[1] - m[0]
+                              for o in matches)]
+        candidates = set().union(*(values for _, _, values in matches))
+        best, best_key = [], None
+        for place_id in candidates:
+            lineage = set(self.paths[place_id])
+            support = sum(1.0 / len(values) for _, _, values in matches if values & lineage)
+            key = (support, len(lineage))
+            if best_key is None or key > best_key:
+                best, best_key = [place_id], key
+            elif key == best_key:
+                best.append(place_id)
+        if len(best) == 1:
+            return best[0]
+        ancestor = self.common_ancestor(*best)
+        if ancestor is not None and any(values & set(self.paths[ancestor]) for _, _, values in matches):
+            return ancestor
+        return None
+
+    def common_ancestor(self, *place_ids):
+        paths = [self.paths.get(place_id, []) for place_id in place_ids]
+        if not all(paths):
+            return None
+        shared = set(paths[0]).intersection(*map(set, paths[1:]))
+        # 路径从自身到根，第一个公共节点即最近公共上级
+        return next((place_id for place_id in paths[0] if place_id in shared), None)
+
+    def subtree(self, place_id):
+        """地点自身及全部下级地点的ID"""
+        result = []
+        stack = [place_id]
+        while stack:
+            current = stack.pop()
+            result.append(current)
+            stack.extend(self.children.get(current, ()))
+        return result
+
+    def similarity(self, a, b):
+        """层级相似度（Wu-Palmer）：2 × 公共上级深度 / (两者深度之和)，相同地点为 1，不同校区为 0"""
+        if a is None or b is None:
+            return None
+        if a == b:
+            return 1.0
+        ancestor = self.common_ancestor(a, b)
+        if ancestor is None:
+            return 0.0
+        return 2.0 * self.depth(ancestor) / (self.depth(a) + self.depth(b))
+
+    def distance(self, a, b):
+        """两个地点之间经过的层级边数，没有公共上级时返回 None"""
+        ancestor = self.common_ancestor(a, b)
+        if ancestor is None:
+            return None
+        return self.depth(a) + self.depth(b) - 2 * self.depth(ancestor)
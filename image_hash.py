@@ -0,0 +1,137 @@
+"""图片感知哈希与相似图片检索
+
+每张图片计算两个 64 位感知哈希：pHash（缩小到 32×32 后取 DCT 低频部分与中位数比较）
+和 dHash（9×8 灰度图相邻像素比较）。两张图片越相似，哈希的汉明距离越小，
+压缩、缩放、轻微调色后距离通常不超过 10；不相关的图片约为 32。
+
+检索使用多索引哈希：64 位分成 4 段，每段 16 位各建一个哈希表。两个哈希的距离不超过 r 时，
+至少有一段的距离不超过 r // 4，只需在每段中查找这个范围内的取值，再逐个核对完整距离，
+几十万张图片也只需几毫秒。
+"""
+from itertools import combinations
+
+import numpy as np
+from PIL import Image
+
+from caching import LazyIndex
+
+HASH_BITS = 64
+CHUNKS = 4
+CHUNK_BITS = HASH_BITS // CHUNKS
+CHUNK_MASK = (1 << CHUNK_BITS) - 1
+
+_DCT_SIZE = 32
+_DCT = np.cos(np.pi * np.outer(np.arange(_DCT_SIZE), 2 * np.arange(_DCT_SIZE) + 1) / (2 * _DCT_SIZE))
+
+
+def _to_int(bits):
+    return int.from_bytes(np.packbits(bits.ravel()).tobytes(), 'big')
+
+
+def dhash(image):
+    pixels = np.asarray(image.convert('L').resize((9, 8), Image.LANCZOS), dtype=np.int16)
+    return _to_int(pixels[:, 1:] > pixels[:, :-1])
+
+
+def phash(image):
+    pixels = np.asarray(image.convert('L').resize((_DCT_SIZE, _DCT_SIZE), Image.LANCZOS), dtype=np.float64)
+    low = (_DCT @ pixels @ _DCT.T)[:8, :8]
+    # 直流分量反映整体亮度，不参与中位数计算
+    return _to_int(low > np.median(low.ravel()[1:]))
+
+
+def fingerprint(image):
+    """返回 (pHash, dHash)"""
+    return phash(image), dhash(image)
+
+
+def fingerprint_file(path):
+    with Image.open(path) as image:
+        return fingerprint(image)
+
+
+def hamming(a, b):
+    return (a ^ b).bit_count()
+
+
+def similarity(distance):
+    """汉明距离转换为 0~1 的相似度，不相关图片（约 32 位不同）为 0"""
+    return max(0.0, 1.0 - distance / (HASH_BITS / 2))
+
+
+def to_signed(value):
+    """数据库整数列是有符号 64 位"""
+    return value - (1 << HASH_BITS) if value >= 1 << (HASH_BITS - 1) else value
+
+
+def to_unsigned(value):
+    return value + (1 << HASH_BITS) if value < 0 else value
+
+
+def _flip_masks(radius):
+    masks = [0]
+    for count in range(1, radius + 1):
+        masks.extend(sum(1 << bit for bit in bits) for bits in combinations(range(CHUNK_BITS), count))
+    return masks
+
+
+class HashIndex(LazyIndex):
+    """按 pHash 检索相似图片的多索引哈希表，值为物品ID
+
+    loader() 返回 [(物品ID, pHash, dHash)]，首次查询时调用。
+    """
+
+    def __init__(self, loader=None, rebuild_interval=None):
+        super().__init__(loader, tables=CHUNKS, rebuild_interval=rebuild_interval)
+        self._masks = {}
+
+    def _insert(self, item_id, phash_value, dhash_value):
+        self._entries[item_id] = (phash_value, dhash_value)
+        for chunk, table in enumerate(self._tables):
+            table.setdefault((phash_value >> (chunk * CHUNK_BITS)) & CHUNK_MASK, set()).add(item_id)
+
+    def _delete(self, item_id):
+        hashes = self._entries.pop(item_id, None)
+        if hashes is None:
+            return
+        for chunk, table in enumerate(self._tables):
+            key = (hashes[0] >> (chunk * CHUNK_BITS)) & CHUNK_MASK
+            ids = table.get(key)
+            if ids is not None:
+                ids.discard(item_id)
+                if not ids:
+                    del table[key]
+
+    def get(self, item_id):
+        with self._lock:
+            self._ensure()
+            return self._entries.get(item_id)
+
+    def search(self, phash_value, dhash_value=None, max_distance=10, limit=20, exclude=()):
+        """返回 [(物品ID, 距离)]，按距离升序；给出 dHash 时距离取两种哈希的平均值"""
+        chunk_radius = max_distance // CHUNKS
+        masks = self._masks.get(chunk_radius)
+        if masks is None:
+            masks = self._masks[chunk_radius] = _flip_masks(chunk_radius)
+        with self._lock:
+            self._ensure()
+            candidates = set()
+            for chunk, table in enumerate(self._tables):
+                key = (phash_value >> (chunk * CHUNK_BITS)) & CHUNK_MASK
+                for mask in masks:
+                    ids = table.get(key ^ mask)
+                    if ids:
+                        candidates.update(ids)
+            results = []
+            for item_id in candidates:
+                if item_id in exclude:
+                    continue
+                stored_phash, stored_dhash = self._entries[item_id]
+                distance = hamming(phash_value, stored_phash)
+                if distance > max_distance:
+                    continue
+                if dhash_value is not None:
+                    distance = (distance + hamming(dhash_value, stored_dhash)) / 2
+                results.append((item_id, distance))
+        results.sort(key=lambda result: (result[1], result[0]))
+        return results[:limit]
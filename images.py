@@ -0,0 +1,140 @@
+"""上传图片处理流水线
+
+上传的图片按内容的 SHA-256 存储，相同图片只保存一份。后台线程负责纠正方向、
+去除 EXIF，并生成卡片缩略图、详情图、原图三种尺寸的 WebP 与 JPEG 版本：
+
+    static/uploads/ab/ab12...ef_card.webp
+    static/uploads/ab/ab12...ef_detail.jpg
+
+处理完成后调用 on_processed(key, image)（绑定了应用时在应用上下文中执行），用于计算感知哈希等。
+"""
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+import hashlib
+import logging
+import os
+import threading
+
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+logger = logging.getLogger(__name__)
+
+# 各尺寸的最大宽高
+VARIANTS = {
+    'original': (2560, 2560),
+    'detail': (1200, 1200),
+    'card': (400, 400),
+}
+FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpg': ('JPEG', {'quality': 85, 'optimize': True, 'progressive': True}),
+}
+
+
+class ImagePipeline:
+    def __init__(self, upload_folder=None, max_workers=2, app=None, on_processed=None):
+        self.upload_folder = upload_folder
+        self.on_processed = on_processed
+        self.app = None
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='image')
+        self._in_flight = set()
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+    
+    def init_app(self, app):
+        self.app = app
+        self.upload_folder = app.config['UPLOAD_FOLDER']
+        os.makedirs(self.upload_folder, exist_ok=True)
+        self._executor = ThreadPoolExecutor(max_workers=app.config.get('IMAGE_WORKERS', 2),
+                                            thread_name_prefix='image')
+
+    @staticmethod
+    def is_key(name):
+        """内容哈希形式的文件名（旧数据是直接保存的原始文件名）"""
+        return bool(name) and '/' in name and '.' not in name
+
+    def path(self, key, variant, fmt):
+        return os.path.join(self.upload_folder, f'{key}_{variant}.{fmt}')
+
+    def source_path(self, name):
+        """用于重新读取图片内容的文件路径（旧数据为上传目录下的原始文件）"""
+        if self.is_key(name):
+            return self.path(name, 'original', 'jpg')
+        return os.path.join(self.upload_folder, name)
+
+    def is_ready(self, key):
+        # 卡片图最后生成，存在即表示全部尺寸已就绪
+        return os.path.exists(self.path(key, 'card', 'jpg'))
+
+    def save(self, file_storage):
+        """保存上传的图片并提交后台处理，返回存储键；不是有效图片时返回 None"""
+        data = file_storage.read()
+        try:
+            with Image.open(BytesIO(data)) as image:
+                image.verify()
+        except (UnidentifiedImageError, OSError, SyntaxError, ValueError):
+            return None
+
+        digest = hashlib.sha256(data).hexdigest()
+        key = f'{digest[:2]}/{digest}'
+        with self._lock:
+            if key in self._in_flight or self.is_ready(key):
+                return key
+            self._in_flight.add(key)
+        self._executor.submit(self._process, key, data)
+        return key
+
+    def _process(self, key, data):
+        try:
+            os.makedirs(os.path.dirname(self.path(key, 'card', 'jpg')), exist_ok=True)
+            with Image.open(BytesIO(data)) as source:
+                image = ImageOps.exif_transpose(source)
+                image.load()
+            if image.mode not in ('RGB', 'RGBA'):
+                image = image.convert('RGBA' if 'A' in image.getbands() else 'RGB')
+
+            for variant, size in VARIANTS.items():
+                resized = image.copy()
+                resized.thumbnail(size, Image.LANCZOS)
+                for fmt, (pil_format, options) in FORMATS.items():
+                    output = resized
+                    if pil_format == 'JPEG' and output.mode == 'RGBA':
+                        output = Image.new('RGB', output.size, (255, 255, 255))
+                        output.paste(resized, mask=resized.getchannel('A'))
+                    # 先写临时文件再替换，避免读到未写完的图片；不传 exif 参数即去除 EXIF
+                    target = self.path(key, variant, fmt)
+                    temp = f'{target}.{os.getpid()}.tmp'
+                    output.save(temp, pil_format, **options)
+                    os.replace(temp, target)
+        except Exception:
+            logger.exception('图片处理失败：%s', key)
+            return
+        finally:
+            with self._lock:
+                self._in_flight.discard(key)
+        if self.on_processed is not None:
+            self._notify(key, image)
+
+    def _notify(self, key, image):
+        try:
+            if self.app is None:
+                self.on_processed(key, image)
+            else:
+                with self.app.app_context():
+                    self.on_processed(key, image)
+        except Exception:
+            logger.exception('图片处理回调失败：%s', key)
+
+    def relative_path(self, name, variant='card', fmt='webp'):
+        """图片相对于上传目录的路径；尚在处理中时返回 None"""
+        if not name:
+            return None
+        if not self.is_key(name):
+            return name
+        if not self.is_ready(name):
+            return None
+        return f'{name}_{variant}.{fmt}'
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
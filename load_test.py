@@ -0,0 +1,173 @@
+"""对主要页面做并发压测，输出各路由的吞吐量与延迟分位数
+
+先用 seed_data.py 生成数据并启动应用，然后：
+    python load_test.py --base-url http://127.0.0.1:5000 --concurrency 8 --duration 30
+    python load_test.py --requests 2000 --username user1 --password password123
+
+--username 登录后会额外压测推荐页等需要登录的页面。只依赖标准库。
+"""
+import argparse
+import http.cookiejar
+import random
+import re
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import defaultdict
+
+KEYWORDS = ['手机', '钱包', '钥匙', '学生证', '耳机', '雨伞', '图书馆', '食堂', '黑色', '校园卡']
+LOCATIONS = ['图书馆', '教学楼', '食堂', '体育馆', '宿舍']
+CATEGORIES = ['electronics', 'documents', 'accessories', 'bags', 'keys', 'pets', 'other']
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def build_routes(max_id, logged_in):
+    """(名称, 权重, 生成 URL 的函数)，权重大致对应线上访问比例"""
+    routes = [
+        ('index', 10, lambda: '/'),
+        ('lost_list', 10, lambda: f'/lost?page={random.randint(1, 20)}'),
+        ('found_list', 10, lambda: f'/found?page={random.randint(1, 20)}'),
+        ('lost_list_category', 5, lambda: f'/lost?category={random.choice(CATEGORIES)}'),
+        ('lost_search', 8, lambda: '/lost?' + urllib.parse.urlencode({'search': random.choice(KEYWORDS)})),
+        ('found_search', 8, lambda: '/found?' + urllib.parse.urlencode({'search': random.choice(KEYWORDS)})),
+        ('advanced_search', 8, lambda: '/advanced-search?' + urllib.parse.urlencode({
+            'type': random.choice(['lost', 'found']),
+            'keyword': random.choice(KEYWORDS),
+            'location': random.choice(['', ''] + LOCATIONS),
+        })),
+        ('lost_detail', 15, lambda: f'/lost/{random.randint(1, max_id)}'),
+        ('found_detail', 15, lambda: f'/found/{random.randint(1, max_id)}'),
+        ('statistics', 3, lambda: '/statistics'),
+    ]
+    if logged_in:
+        routes += [
+            ('recommendations', 4, lambda: '/recommendations'),
+            ('profile', 2, lambda: '/profile'),
+            ('unread_messages', 5, lambda: '/api/unread_messages'),
+        ]
+    return routes
+
+
+class Client:
+    """每个线程一个客户端，各自维护 Cookie"""
+
+    def __init__(self, base_url, timeout):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+
+    def get(self, path):
+        with self.opener.open(self.base_url + path, timeout=self.timeout) as response:
+            return response.status, response.read()
+
+    def login(self, username, password):
+        _, body = self.get('/login')
+        match = re.search(rb'name="csrf_token"[^>]*value="([^"]+)"', body)
+        fields = {'username': username, 'password': password}
+        if match:
+            fields['csrf_token'] = match.group(1).decode()
+        data = urllib.parse.urlencode(fields).encode()
+        with self.opener.open(self.base_url + '/login', data=data, timeout=self.timeout) as response:
+            response.read()
+            # 登录成功会跳转离开登录页
+            return not response.url.rstrip('/').endswith('/login')
+
+
+class Results:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def record(self, name, elapsed, ok):
+        with self._lock:
+            self.latencies[name].append(elapsed)
+            if not ok:
+                self.errors[name] += 1
+
+
+def worker(args, routes, results, deadline, remaining):
+    client = Client(args.base_url, args.timeout)
+    if args.username and not client.login(args.username, args.password):
+        print(f'登录失败：{args.username}')
+        return
+    names, weights, makers = zip(*routes)
+    while time.monotonic() < deadline:
+        if remaining is not None:
+            with remaining['lock']:
+                if remaining['count'] <= 0:
+                    return
+                remaining['count'] -= 1
+        index = random.choices(range(len(routes)), weights)[0]
+        started = time.perf_counter()
+        try:
+            status, _ = client.get(makers[index]())
+            ok = status < 500
+        except urllib.error.HTTPError as exc:
+            # 随机 ID 可能不存在，404 不算错误
+            ok = exc.code < 500
+        except (urllib.error.URLError, OSError):
+            ok = False
+        results.record(names[index], time.perf_counter() - started, ok)
+
+
+def report(results, wall_time):
+    print(f'{"路由":<22}{"请求数":>8}{"错误":>6}{"req/s":>9}{"p50(ms)":>10}{"p95(ms)":>10}{"p99(ms)":>10}')
+    total = errors = 0
+    for name in sorted(results.latencies, key=lambda n: percentile(results.latencies[n], 0.95), reverse=True):
+        values = results.latencies[name]
+        total += len(values)
+        errors += results.errors[name]
+        print(f'{name:<22}{len(values):>8}{results.errors[name]:>6}{len(values) / wall_time:>9.1f}'
+              f'{percentile(values, 0.50) * 1000:>10.1f}{percentile(values, 0.95) * 1000:>10.1f}'
+              f'{percentile(values, 0.99) * 1000:>10.1f}')
+    every = [value for values in results.latencies.values() for value in values]
+    print(f'{"合计":<22}{total:>8}{errors:>6}{total / wall_time:>9.1f}'
+          f'{percentile(every, 0.50) * 1000:>10.1f}{percentile(every, 0.95) * 1000:>10.1f}'
+          f'{percentile(every, 0.99) * 1000:>10.1f}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='并发压测主要页面')
+    parser.add_argument('--base-url', default='http://127.0.0.1:5000')
+    parser.add_argument('--concurrency', type=int, default=8, help='并发线程数')
+    parser.add_argument('--duration', type=float, default=30, help='压测时长（秒）')
+    parser.add_argument('--requests', type=int, default=None, help='总请求数，指定后忽略 --duration')
+    parser.add_argument('--max-id', type=int, default=1000, help='详情页随机访问的最大物品 ID')
+    parser.add_argument('--username', help='登录后压测需要登录的页面')
+    parser.add_argument('--password', default='password123')
+    parser.add_argument('--timeout', type=float, default=30)
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+    random.seed(args.seed)
+
+    routes = build_routes(args.max_id, bool(args.username))
+    results = Results()
+    remaining = None
+    deadline = time.monotonic() + args.duration
+    if args.requests is not None:
+        remaining = {'count': args.requests, 'lock': threading.Lock()}
+        deadline = float('inf')
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(args, routes, results, deadline, remaining))
+               for _ in range(args.concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    report(results, time.perf_counter() - started)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,159 @@
+"""失物与拾物的批量相似度计算
+
+标题、描述、地点转换为字符 n-gram 的稀疏特征向量（哈希降维后 L2 归一化），
+一次矩阵运算即可算出一件物品与全部候选物品的余弦相似度。两件物品都解析出了规范地点时，
+地点相似度改用地点词典中的层级相似度；两件物品都有已计算感知哈希的图片时，
+再按 image_weight 混入图片相似度，混入后低于原得分时保持原得分：图片只作为加分项，
+同一物品换个角度拍的照片也可能差别很大，不能因此降低文字相近的候选。
+"""
+from collections import OrderedDict
+import threading
+import zlib
+
+import numpy as np
+
+from image_hash import hamming, similarity as hash_similarity
+
+# 各字段权重：类别0.3、标题0.3、描述0.2、地点0.2
+WEIGHTS = {
+    'category': 0.3,
+    'title': 0.3,
+    'description': 0.2,
+    'location': 0.2,
+}
+
+FEATURE_DIM = 1 << 18
+NGRAM_RANGE = (1, 2)
+
+_EMPTY = (np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32))
+
+
+def vectorize(value):
+    """文本 -> (特征下标, 权重)，按字符 1~2 gram 计数并归一化"""
+    value = ''.join((value or '').lower().split())
+    counts = {}
+    for n in range(NGRAM_RANGE[0], NGRAM_RANGE[1] + 1):
+        for i in range(len(value) - n + 1):
+            index = zlib.crc32(value[i:i + n].encode('utf-8')) % FEATURE_DIM
+            counts[index] = counts.get(index, 0) + 1
+    if not counts:
+        return _EMPTY
+    indices = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+    weights = np.fromiter(counts.values(), dtype=np.float32, count=len(counts))
+    return indices, weights / np.linalg.norm(weights)
+
+
+class FeatureMatrix:
+    """多条文本特征拼接成的稀疏矩阵（COO 形式）"""
+
+    def __init__(self, vectors):
+        self.size = len(vectors)
+        lengths = [len(indices) for indices, _ in vectors]
+        if vectors and sum(lengths):
+            self.rows = np.repeat(np.arange(self.size), lengths)
+            self.indices = np.concatenate([indices for indices, _ in vectors])
+            self.weights = np.concatenate([weights for _, weights in vectors])
+        else:
+            self.rows = np.zeros(0, dtype=np.int64)
+            self.indices = np.zeros(0, dtype=np.int64)
+            self.weights = np.zeros(0, dtype=np.float32)
+
+    def cosine(self, vector):
+        """vector 与每一行的余弦相似度"""
+        indices, weights = vector
+        if not len(indices) or not len(self.indices):
+            return np.zeros(self.size, dtype=np.float64)
+        dense = np.zeros(FEATURE_DIM, dtype=np.float32)
+        np.add.at(dense, indices, weights)
+        products = self.weights * dense[self.indices]
+        return np.bincount(self.rows, weights=products, minlength=self.size)
+
+
+class ItemFeatures:
+    __slots__ = ('key', 'title', 'description', 'location')
+
+    def __init__(self, item):
+        self.key = (item.title, item.description, item.location)
+        self.title = vectorize(item.title)
+        self.description = vectorize(item.description)
+        self.location = vectorize(item.location)
+
+
+class MatchingEngine:
+    """相似度计算引擎，缓存每件物品的特征向量"""
+
+    def __init__(self, cache_size=50000, places=None, images=None, image_weight=0.3):
+        """places：返回当前地点词典（gazetteer.Gazetteer）的函数，为空时只按地点文本计算；
+        images(图片键集合)：返回 {图片键: (pHash, dHash)}，为空时不比较图片"""
+        self.cache_size = cache_size
+        self.places = places
+        self.images = images
+        self.image_weight = image_weight
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def features(self, item):
+        cache_key = (type(item).__name__, item.id)
+        text_key = (item.title, item.description, item.location)
+        with self._lock:
+            cached = self._cache.get(cache_key)
+            if cached is not None and cached.key == text_key:
+                self._cache.move_to_end(cache_key)
+                return cached
+        features = ItemFeatures(item)
+        if item.id is not None:
+            with self._lock:
+                self._cache[cache_key] = features
+                self._cache.move_to_end(cache_key)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return features
+
+    def score(self, item, candidates):
+        """item 与每个候选物品的综合相似度（0~1）"""
+        if not candidates:
+            return np.zeros(0, dtype=np.float64)
+        query = self.features(item)
+        features = [self.features(candidate) for candidate in candidates]
+        scores = WEIGHTS['category'] * np.fromiter(
+            (candidate.category == item.category for candidate in candidates),
+            dtype=np.float64, count=len(candidates))
+        for field in ('title', 'description'):
+            matrix = FeatureMatrix([getattr(f, field) for f in features])
+            scores += WEIGHTS[field] * np.clip(matrix.cosine(getattr(query, field)), 0.0, 1.0)
+        location = np.clip(FeatureMatrix([f.location for f in features]).cosine(query.location), 0.0, 1.0)
+        place_id = getattr(item, 'place_id', None)
+        if self.places is not None and place_id is not None:
+            gazetteer = self.places()
+            for i, candidate in enumerate(candidates):
+                similarity = gazetteer.similarity(place_id, getattr(candidate, 'place_id', None))
+                if similarity is not None:
+                    location[i] = similarity
+        scores += WEIGHTS['location'] * location
+        if self.images is not None and getattr(item, 'image', None):
+            self._blend_images(item, candidates, scores)
+        return scores
+
+    def _blend_images(self, item, candidates, scores):
+        keys = {candidate.image for candidate in candidates if getattr(candidate, 'image', None)}
+        if not keys:
+            return
+        hashes = self.images(keys | {item.image})
+        query = hashes.get(item.image)
+        if query is None:
+            return
+        weight = self.image_weight
+        for i, candidate in enumerate(candidates):
+            other = hashes.get(getattr(candidate, 'image', None))
+            if other is not None:
+                distance = (hamming(query[0], other[0]) + hamming(query[1], other[1])) / 2
+                scores[i] = max(scores[i], (1 - weight) * scores[i] + weight * hash_similarity(distance))
+
+    def top_matches(self, item, candidates, threshold=0.0, k=None):
+        """返回按相似度降序排列的 [(候选物品, 相似度)]，只保留超过阈值的前 k 个"""
+        scores = self.score(item, candidates)
+        selected = np.flatnonzero(scores > threshold)
+        if k is not None and len(selected) > k:
+            selected = selected[np.argpartition(-scores[selected], k - 1)[:k]]
+        selected = selected[np.argsort(-scores[selected], kind='stable')]
+        return [(candidates[i], float(scores[i])) for i in selected]
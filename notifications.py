@@ -0,0 +1,79 @@
+"""站内通知推送（Server-Sent Events）
+
+每个打开的页面订阅一个队列，发送消息、提交或审核认领时在事务提交后向接收者的
+所有订阅推送事件。订阅只保存在当前进程内：多进程部署时连到其他进程的页面收不到
+推送，但会在重连或轮询时拿到最新未读数。
+"""
+import json
+import queue
+import threading
+
+
+class Subscription:
+    __slots__ = ('user_id', 'queue')
+
+    def __init__(self, user_id, maxsize):
+        self.user_id = user_id
+        self.queue = queue.Queue(maxsize=maxsize)
+
+    def get(self, timeout):
+        """等待下一条事件，超时返回 None"""
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def drain(self):
+        """取出所有已到达的事件"""
+        events = []
+        while True:
+            try:
+                events.append(self.queue.get_nowait())
+            except queue.Empty:
+                return events
+
+
+class NotificationHub:
+    def __init__(self, max_connections=500, queue_size=50):
+        self.max_connections = max_connections
+        self.queue_size = queue_size
+        self._subscriptions = {}
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def subscribe(self, user_id):
+        """连接数已满时返回 None，由客户端改用轮询"""
+        with self._lock:
+            if self._count >= self.max_connections:
+                return None
+            subscription = Subscription(user_id, self.queue_size)
+            self._subscriptions.setdefault(user_id, set()).add(subscription)
+            self._count += 1
+            return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.user_id)
+            if not subscriptions or subscription not in subscriptions:
+                return
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del self._subscriptions[subscription.user_id]
+            self._count -= 1
+
+    def publish(self, user_id, event, data):
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(user_id, ()))
+        for subscription in subscriptions:
+            try:
+                subscription.queue.put_nowait((event, data))
+            except queue.Full:
+                # 客户端读取太慢，丢弃该事件；未读数会随下一条事件一起更新
+                pass
+
+    def connection_count(self):
+        return self._count
+
+
+def format_event(event, data):
+    return f'event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n'
@@ -0,0 +1,73 @@
+"""密码哈希的有界执行器
+
+密码哈希故意设计得很耗 CPU。所有哈希计算都交给固定数量的线程执行，同时在等待的请求数
+也有上限：登录高峰或撞库攻击时，超出部分直接返回"系统繁忙"，不会占满全部工作线程，
+普通页面仍能正常响应。
+"""
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+import os
+import threading
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+
+class HasherBusy(Exception):
+    """等待哈希计算的请求过多或等待超时"""
+
+
+class PasswordHasher:
+    def __init__(self, app=None):
+        self.method = 'scrypt'
+        self.timeout = 10
+        self.workers = 0
+        self._executor = None
+        self._pid = None
+        self._slots = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.method = app.config.get('PASSWORD_HASH_METHOD', 'scrypt')
+        self.timeout = app.config.get('PASSWORD_HASH_TIMEOUT', 10)
+        self.workers = app.config.get('PASSWORD_HASH_WORKERS', 2)
+        # 正在计算和排队等待的总数上限
+        self._slots = threading.BoundedSemaphore(self.workers + app.config.get('PASSWORD_HASH_QUEUE_SIZE', 16))
+
+    def _get_executor(self):
+        # fork 出的工作进程不会继承线程，按进程创建线程池
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='password')
+                self._pid = os.getpid()
+            return self._executor
+
+    def _run(self, function, *args):
+        if not self.workers:
+            return function(*args)
+        if not self._slots.acquire(blocking=False):
+            raise HasherBusy()
+        try:
+            future = self._get_executor().submit(function, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        # 等待超时后任务仍在线程池中执行，任务结束时才释放名额，否则超时的任务会不断累积
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except TimeoutError:
+            raise HasherBusy()
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, pwhash, password):
+        return self._run(check_password_hash, pwhash, password)
+
+    def needs_rehash(self, pwhash):
+        """哈希参数与当前配置不同（如调整了 PASSWORD_HASH_METHOD）"""
+        method = pwhash.split('$', 1)[0]
+        if ':' in self.method:
+            return method != self.method
+        return method.split(':', 1)[0] != self.method
@@ -0,0 +1,142 @@
+"""按路由统计 SQL 查询与响应耗时，并记录慢查询
+
+通过 SQLAlchemy 引擎事件统计每个请求的查询次数、数据库耗时和最慢语句，
+通过 Flask 请求钩子统计整体耗时。未开启时不注册任何钩子，没有额外开销。
+"""
+from collections import deque
+import logging
+import threading
+import time
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+slow_query_logger = logging.getLogger('lostfound.slow_query')
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class EndpointStats:
+    __slots__ = ('samples', 'total', 'slowest_statement', 'slowest_duration')
+
+    def __init__(self, window):
+        # (总耗时, 查询次数, 数据库耗时)
+        self.samples = deque(maxlen=window)
+        self.total = 0
+        self.slowest_statement = None
+        self.slowest_duration = 0.0
+
+
+class QueryProfiler:
+    def __init__(self, app=None):
+        self.enabled = False
+        self.slow_query_threshold = 0.1
+        self.window = 500
+        self._endpoints = {}
+        self._slow_queries = deque(maxlen=100)
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.enabled = app.config.get('PROFILER_ENABLED', False)
+        self.slow_query_threshold = app.config.get('PROFILER_SLOW_QUERY_THRESHOLD', 0.1)
+        self.window = app.config.get('PROFILER_WINDOW', 500)
+        if not self.enabled:
+            return
+        if not event.contains(Engine, 'before_cursor_execute', self._before_cursor_execute):
+            event.listen(Engine, 'before_cursor_execute', self._before_cursor_execute)
+            event.listen(Engine, 'after_cursor_execute', self._after_cursor_execute)
+        app.before_request(self._start_request)
+        app.teardown_request(self._finish_request)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('profiler_start', []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get('profiler_start')
+        if not starts:
+            return
+        duration = time.perf_counter() - starts.pop()
+
+        endpoint = None
+        if has_request_context() and 'profile' in g:
+            profile = g.profile
+            profile['queries'] += 1
+            profile['db_time'] += duration
+            if duration > profile['slowest_duration']:
+                profile['slowest_duration'] = duration
+                profile['slowest_statement'] = statement
+            endpoint = request.endpoint
+
+        if duration >= self.slow_query_threshold:
+            slow_query_logger.warning('慢查询 %.1fms [%s] %s', duration * 1000, endpoint, statement)
+            self._slow_queries.appendleft({
+                'time': time.time(),
+                'endpoint': endpoint,
+                'duration': duration,
+                'statement': statement,
+            })
+
+    def _start_request(self):
+        g.profile = {
+            'start': time.perf_counter(),
+            'queries': 0,
+            'db_time': 0.0,
+            'slowest_duration': 0.0,
+            'slowest_statement': None,
+        }
+
+    def _finish_request(self, exc=None):
+        profile = g.pop('profile', None)
+        if profile is None or request.endpoint is None:
+            return
+        wall_time = time.perf_counter() - profile['start']
+        with self._lock:
+            stats = self._endpoints.get(request.endpoint)
+            if stats is None:
+                stats = self._endpoints[request.endpoint] = EndpointStats(self.window)
+            stats.samples.append((wall_time, profile['queries'], profile['db_time']))
+            stats.total += 1
+            if profile['slowest_duration'] > stats.slowest_duration:
+                stats.slowest_duration = profile['slowest_duration']
+                stats.slowest_statement = profile['slowest_statement']
+
+    def report(self, order_by='p95'):
+        """各路由的统计结果，默认按 p95 耗时降序"""
+        rows = []
+        with self._lock:
+            for endpoint, stats in self._endpoints.items():
+                samples = list(stats.samples)
+                wall_times = [sample[0] for sample in samples]
+                query_counts = [sample[1] for sample in samples]
+                db_times = [sample[2] for sample in samples]
+                rows.append({
+                    'endpoint': endpoint,
+                    'requests': stats.total,
+                    'p50': percentile(wall_times, 0.50),
+                    'p95': percentile(wall_times, 0.95),
+                    'max': max(wall_times, default=0.0),
+                    'avg_queries': sum(query_counts) / len(samples) if samples else 0,
+                    'max_queries': max(query_counts, default=0),
+                    'avg_db_time': sum(db_times) / len(samples) if samples else 0,
+                    'slowest_duration': stats.slowest_duration,
+                    'slowest_statement': stats.slowest_statement,
+                })
+        rows.sort(key=lambda row: row[order_by], reverse=True)
+        return rows
+
+    def slow_queries(self):
+        return list(self._slow_queries)
+
+    def reset(self):
+        with self._lock:
+            self._endpoints.clear()
+            self._slow_queries.clear()
@@ -0,0 +1,151 @@
+"""全文检索索引（SQLite FTS5）
+
+标题、描述、地点以"中文二元分词 + 英文单词"的形式写入 FTS5 虚拟表，
+检索时按 bm25 相关度排序，代替 LIKE '%关键词%' 的全表扫描。
+"""
+import re
+
+from sqlalchemy import Float, Integer, text
+
+# 中文字符（含扩展A区与兼容汉字）
+_CJK_RUN = re.compile(r'[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]+')
+_TOKEN_RUN = re.compile(r'[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]+|[0-9a-z]+')
+
+# 各物品表对应的索引表
+INDEX_TABLES = {
+    'lost_item': 'lost_item_fts',
+    'found_item': 'found_item_fts',
+}
+
+# bm25 列权重：标题 > 地点 > 描述，status 不参与打分
+_BM25_WEIGHTS = '10.0, 1.0, 5.0, 0.0'
+
+_ready_engines = set()
+
+
+def segment(value):
+    """把文本切分为索引词：中文取相邻二元组并保留末字，其余按单词切分"""
+    tokens = []
+    for run in _TOKEN_RUN.findall((value or '').lower()):
+        if _CJK_RUN.match(run):
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+            tokens.append(run[-1])
+        else:
+            tokens.append(run)
+    return ' '.join(tokens)
+
+
+def _phrase(value):
+    """把用户输入转换为 FTS5 查询表达式，语义与子串匹配一致"""
+    parts = []
+    for run in _TOKEN_RUN.findall((value or '').lower()):
+        if _CJK_RUN.match(run) and len(run) > 1:
+            # 连续的二元组组成短语，要求在原文中相邻出现
+            parts.append('"%s"' % ' '.join(run[i:i + 2] for i in range(len(run) - 1)))
+        else:
+            # 单个汉字或英文单词按前缀匹配
+            parts.append('"%s" *' % run)
+    return ' AND '.join(parts)
+
+
+def build_match_expression(clauses):
+    """clauses 为 [(列名元组, 关键词), ...]，返回 MATCH 表达式；无可用词时返回 None"""
+    expressions = []
+    for columns, value in clauses:
+        phrase = _phrase(value)
+        if not phrase:
+            return None
+        expressions.append('{%s} : (%s)' % (' '.join(columns), phrase))
+    return ' AND '.join(expressions) if expressions else None
+
+
+def is_supported(connection):
+    return connection.dialect.name == 'sqlite'
+
+
+def ensure_index(connection):
+    """创建索引表；索引为空而主表有数据时自动回填"""
+    engine_key = id(connection.engine)
+    if engine_key in _ready_engines:
+        return
+    for source, table in INDEX_TABLES.items():
+        connection.execute(text(
+            f'CREATE VIRTUAL TABLE IF NOT EXISTS {table} '
+            f'USING fts5(title, description, location, status UNINDEXED, tokenize="unicode61")'
+        ))
+        indexed = connection.execute(text(f'SELECT count(*) FROM {table}')).scalar()
+        if not indexed:
+            _backfill(connection, source, table)
+    _ready_engines.add(engine_key)
+
+
+def _backfill(connection, source, table, batch_size=1000):
+    last_id = 0
+    while True:
+        rows = connection.execute(text(
+            f'SELECT id, title, description, location, status FROM {source} '
+            f'WHERE id > :last_id ORDER BY id LIMIT :limit'
+        ), {'last_id': last_id, 'limit': batch_size}).fetchall()
+        if not rows:
+            break
+        connection.execute(text(
+            f'INSERT INTO {table}(rowid, title, description, location, status) '
+            f'VALUES (:id, :title, :description, :location, :status)'
+        ), [_document(row) for row in rows])
+        last_id = rows[-1].id
+
+
+def rebuild(connection):
+    """清空并重建全部索引"""
+    for source, table in INDEX_TABLES.items():
+        connection.execute(text(f'DROP TABLE IF EXISTS {table}'))
+    _ready_engines.discard(id(connection.engine))
+    ensure_index(connection)
+
+
+def _document(item):
+    return {
+        'id': item.id,
+        'title': segment(item.title),
+        'description': segment(item.description),
+        'location': segment(item.location),
+        'status': item.status,
+    }
+
+
+def index_item(connection, source, item):
+    """写入或覆盖一条物品的索引"""
+    if not is_supported(connection):
+        return
+    ensure_index(connection)
+    table = INDEX_TABLES[source]
+    connection.execute(text(f'DELETE FROM {table} WHERE rowid = :id'), {'id': item.id})
+    connection.execute(text(
+        f'INSERT INTO {table}(rowid, title, description, location, status) '
+        f'VALUES (:id, :title, :description, :location, :status)'
+    ), _document(item))
+
+
+def remove_item(connection, source, item_id):
+    if not is_supported(connection):
+        return
+    ensure_index(connection)
+    connection.execute(text(f'DELETE FROM {INDEX_TABLES[source]} WHERE rowid = :id'), {'id': item_id})
+
+
+def match(session, source, clauses):
+    """返回 (item_id, rank) 子查询，rank 越小越相关；不支持 FTS5 或无可用词时返回 None"""
+    # 只在索引尚未就绪时才取会话的连接，避免查询占用写连接
+    bind = session.get_bind()
+    if not is_supported(bind):
+        return None
+    expression = build_match_expression(clauses)
+    if expression is None:
+        return None
+    if id(bind.engine) not in _ready_engines:
+        ensure_index(session.connection())
+    table = INDEX_TABLES[source]
+    return text(
+        f'SELECT rowid AS item_id, bm25({table}, {_BM25_WEIGHTS}) AS rank '
+        f'FROM {table} WHERE {table} MATCH :expression'
+    ).bindparams(expression=expression).columns(item_id=Integer, rank=Float).subquery(f'{table}_hits')
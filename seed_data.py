@@ -0,0 +1,294 @@
+"""生成大规模模拟数据，用于在本地复现生产环境的数据量
+
+用法：
+    python seed_data.py --items 100000              # 10 万条失物/拾物及相应的评论、消息等
+    python seed_data.py --items 1000000 --users 50000
+    python seed_data.py --items 100000 --reset      # 清空已有数据后重新生成
+
+所有用户的密码均为 password123，用户名为 user1、user2……
+地点词典为空时先导入 places.json，生成的物品地点都能解析为规范地点。
+"""
+import argparse
+import json
+import os
+import random
+import time
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import insert, text
+
+from app import (create_app, db, password_hasher, search_index, statistics_snapshot, matching_engine,
+                 reconcile_unread_counts, reconcile_rating_aggregates, load_places, resolve_places,
+                 rebuild_item_signatures, Place, User, LostItem, FoundItem, Comment, Message, Favorite, Report,
+                 ClaimRequest, UserRating, MatchCandidate)
+
+CATEGORIES = {
+    'electronics': ['手机', '耳机', '充电宝', '平板电脑', '笔记本电脑', '智能手表', 'U盘', '充电器'],
+    'documents': ['学生证', '身份证', '校园卡', '银行卡', '驾驶证', '图书证', '毕业证书'],
+    'accessories': ['眼镜', '手表', '项链', '手链', '戒指', '发卡', '围巾'],
+    'bags': ['钱包', '书包', '双肩包', '手提包', '帆布袋', '笔袋', '卡包'],
+    'keys': ['宿舍钥匙', '车钥匙', '自行车钥匙', '门禁卡', '钥匙串'],
+    'pets': ['小猫', '小狗', '仓鼠', '兔子'],
+    'other': ['雨伞', '水杯', '外套', '课本', '笔记本', '篮球', '保温杯'],
+}
+COLORS = ['黑色', '白色', '蓝色', '红色', '灰色', '粉色', '绿色', '棕色', '银色', '金色']
+BUILDINGS = ['图书馆', '第一教学楼', '第二教学楼', '第三教学楼', '实验楼', '体育馆', '学生食堂',
+             '第二食堂', '行政楼', '学生活动中心', '东区宿舍', '西区宿舍', '南门', '北门', '操场']
+FLOORS = ['一楼', '二楼', '三楼', '四楼', '五楼', '大厅', '门口']
+DETAILS = ['上面有划痕', '贴着卡通贴纸', '里面有几张银行卡', '挂着一个小熊挂件', '外壳有点磨损',
+           '写着名字缩写', '带着蓝色保护套', '是新买的', '有明显的使用痕迹']
+COMMENTS = ['我好像看到过', '已帮忙转发', '请问现在还在吗？', '希望早日找到', '可以私信联系我']
+SURNAMES = '王李张刘陈杨黄赵吴周徐孙马朱胡郭何林高罗'
+LOST_STATUS = [('lost', 0.7), ('found', 0.2), ('closed', 0.1)]
+FOUND_STATUS = [('unclaimed', 0.7), ('claimed', 0.1), ('returned', 0.2)]
+CLAIM_STATUS = [('pending', 0.5), ('approved', 0.3), ('rejected', 0.2)]
+
+
+def weighted(choices):
+    values, weights = zip(*choices)
+    return random.choices(values, weights)[0]
+
+
+def random_time(days=365):
+    return datetime.utcnow() - timedelta(seconds=random.randint(0, days * 86400))
+
+
+def random_item(user_count):
+    category = random.choice(list(CATEGORIES))
+    name = random.choice(CATEGORIES[category])
+    color = random.choice(COLORS)
+    building = random.choice(BUILDINGS)
+    location = f'{building}{random.choice(FLOORS)}'
+    created_at = random_time()
+    return {
+        'title': f'{color}{name}',
+        'description': f'在{location}附近，{color}的{name}，{random.choice(DETAILS)}。',
+        'category': category,
+        'location': location,
+        'image': None,
+        'contact_info': f'1{random.randint(3, 9)}{random.randint(100000000, 999999999)}',
+        'user_id': random.randint(1, user_count),
+        'created_at': created_at,
+        'views': int(random.expovariate(1 / 30)),
+    }, created_at
+
+
+def insert_batches(model, rows, batch_size):
+    """分批插入，rows 为生成器"""
+    total = 0
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            db.session.execute(insert(model.__table__), batch)
+            db.session.commit()
+            total += len(batch)
+            batch = []
+    if batch:
+        db.session.execute(insert(model.__table__), batch)
+        db.session.commit()
+        total += len(batch)
+    return total
+
+
+def max_id(model):
+    return db.session.query(db.func.max(model.id)).scalar() or 0
+
+
+def seed(args):
+    random.seed(args.seed)
+    started = time.time()
+
+    def log(message):
+        print(f'[{time.time() - started:7.1f}s] {message}')
+
+    if args.places and os.path.exists(args.places) and not Place.query.first():
+        with open(args.places, encoding='utf-8') as f:
+            log(f'地点：{load_places(json.load(f))}')
+        db.session.commit()
+
+    # 用户（所有用户共用同一个密码哈希）
+    password_hash = password_hasher.hash('password123')
+    first_user = max_id(User) + 1
+
+    def users():
+        for i in range(first_user, first_user + args.users):
+            yield {
+                'username': f'user{i}',
+                'email': f'user{i}@example.com',
+                'password_hash': password_hash,
+                'phone': f'1{random.randint(3, 9)}{random.randint(100000000, 999999999)}',
+                'is_admin': False,
+                'created_at': random_time(),
+            }
+
+    log(f'用户：{insert_batches(User, users(), args.batch_size)}')
+    user_count = max_id(User)
+
+    lost_count = args.items // 2
+    found_count = args.items - lost_count
+
+    def lost_items():
+        for _ in range(lost_count):
+            row, created_at = random_item(user_count)
+            row['lost_date'] = created_at - timedelta(days=random.randint(0, 3))
+            row['status'] = weighted(LOST_STATUS)
+            row['reward'] = random.choice([None, None, '50元', '100元', '请吃饭'])
+            yield row
+
+    def found_items():
+        for _ in range(found_count):
+            row, created_at = random_item(user_count)
+            row['found_date'] = created_at - timedelta(days=random.randint(0, 3))
+            row['status'] = weighted(FOUND_STATUS)
+            yield row
+
+    log(f'失物：{insert_batches(LostItem, lost_items(), args.batch_size)}')
+    log(f'拾物：{insert_batches(FoundItem, found_items(), args.batch_size)}')
+    lost_max, found_max = max_id(LostItem), max_id(FoundItem)
+
+    def comments():
+        for _ in range(int(args.items * 0.5)):
+            on_lost = random.random() < 0.5
+            yield {
+                'content': random.choice(COMMENTS),
+                'user_id': random.randint(1, user_count),
+                'lost_item_id': random.randint(1, lost_max) if on_lost else None,
+                'found_item_id': None if on_lost else random.randint(1, found_max),
+                'created_at': random_time(),
+            }
+
+    def favorites():
+        for _ in range(int(args.items * 0.3)):
+            on_lost = random.random() < 0.5
+            yield {
+                'user_id': random.randint(1, user_count),
+                'lost_item_id': random.randint(1, lost_max) if on_lost else None,
+                'found_item_id': None if on_lost else random.randint(1, found_max),
+                'created_at': random_time(),
+            }
+
+    def messages():
+        for _ in range(int(args.items * 0.3)):
+            yield {
+                'subject': f'关于{random.choice(CATEGORIES[random.choice(list(CATEGORIES))])}',
+                'content': f'你好，我是{random.choice(SURNAMES)}同学，想确认一下物品的细节。',
+                'sender_id': random.randint(1, user_count),
+                'receiver_id': random.randint(1, user_count),
+                'is_read': random.random() < 0.6,
+                'created_at': random_time(),
+            }
+
+    def claims():
+        for _ in range(int(found_count * 0.1)):
+            status = weighted(CLAIM_STATUS)
+            created_at = random_time()
+            yield {
+                'found_item_id': random.randint(1, found_max),
+                'claimer_id': random.randint(1, user_count),
+                'proof_description': f'物品上{random.choice(DETAILS)}，可以提供购买记录。',
+                'status': status,
+                'created_at': created_at,
+                'reviewed_at': None if status == 'pending' else created_at + timedelta(hours=random.randint(1, 72)),
+            }
+
+    def ratings():
+        for _ in range(int(args.users * 2)):
+            yield {
+                'rater_id': random.randint(1, user_count),
+                'rated_user_id': random.randint(1, user_count),
+                'rating': random.choices([1, 2, 3, 4, 5], [1, 1, 2, 5, 10])[0],
+                'comment': random.choice([None, '很热心', '沟通顺畅', '非常感谢']),
+                'created_at': random_time(),
+            }
+
+    def reports():
+        for _ in range(int(args.items * 0.01)):
+            on_lost = random.random() < 0.5
+            yield {
+                'reporter_id': random.randint(1, user_count),
+                'lost_item_id': random.randint(1, lost_max) if on_lost else None,
+                'found_item_id': None if on_lost else random.randint(1, found_max),
+                'reason': random.choice(['spam', 'fraud', 'inappropriate', 'duplicate', 'other']),
+                'description': '信息疑似重复或不实',
+                'status': random.choice(['pending', 'reviewed', 'resolved']),
+                'created_at': random_time(),
+            }
+
+    for label, model, rows in (('评论', Comment, comments()), ('收藏', Favorite, favorites()),
+                               ('消息', Message, messages()), ('认领', ClaimRequest, claims()),
+                               ('评分', UserRating, ratings()), ('举报', Report, reports())):
+        log(f'{label}：{insert_batches(model, rows, args.batch_size)}')
+
+    # 批量插入绕过了 ORM 事件和计数维护，需要解析地点、计算重复检测签名、重算未读数和评分汇总、
+    # 重建全文索引并为部分失物计算匹配候选
+    log(f'地点解析：{resolve_places(args.batch_size)}')
+    log(f'重复检测签名：{rebuild_item_signatures(args.batch_size)}')
+    reconcile_unread_counts()
+    reconcile_rating_aggregates()
+    db.session.commit()
+
+    with db.engine.begin() as connection:
+        if search_index.is_supported(connection):
+            search_index.rebuild(connection)
+            log('全文检索索引已重建')
+
+    if args.matches:
+        seed_match_candidates(args.matches, args.batch_size)
+        log(f'匹配候选：最近 {args.matches} 件失物')
+
+    if db.engine.dialect.name == 'sqlite':
+        db.session.execute(text('ANALYZE'))
+        db.session.commit()
+    statistics_snapshot.clear()
+    log('完成')
+
+
+def seed_match_candidates(limit, batch_size):
+    threshold = current_app.config['MATCH_SCORE_THRESHOLD']
+    top_k = current_app.config['RECOMMENDATION_TOP_K']
+    lost_items = LostItem.query.filter_by(status='lost').order_by(LostItem.created_at.desc()).limit(limit).all()
+    candidates_by_category = {}
+
+    def rows():
+        for lost_item in lost_items:
+            if lost_item.category not in candidates_by_category:
+                candidates_by_category[lost_item.category] = FoundItem.query.filter_by(
+                    category=lost_item.category, status='unclaimed').all()
+            candidates = candidates_by_category[lost_item.category]
+            for found_item, score in matching_engine.top_matches(lost_item, candidates, threshold, top_k):
+                yield {
+                    'lost_item_id': lost_item.id,
+                    'found_item_id': found_item.id,
+                    'score': score,
+                    'computed_at': datetime.utcnow(),
+                }
+
+    MatchCandidate.query.filter(MatchCandidate.lost_item_id.in_([item.id for item in lost_items])).delete()
+    db.session.commit()
+    insert_batches(MatchCandidate, rows(), batch_size)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='生成大规模模拟数据')
+    parser.add_argument('--items', type=int, default=100000, help='失物与拾物总数（各占一半）')
+    parser.add_argument('--users', type=int, default=None, help='用户数，默认为物品数的 1/20')
+    parser.add_argument('--matches', type=int, default=1000, help='为最近多少件失物计算匹配候选')
+    parser.add_argument('--batch-size', type=int, default=5000)
+    parser.add_argument('--seed', type=int, default=42, help='随机数种子')
+    parser.add_argument('--reset', action='store_true', help='先清空数据库')
+    parser.add_argument('--places', default='places.json', help='地点词典为空时导入的地点文件')
+    args = parser.parse_args()
+    if args.users is None:
+        args.users = max(args.items // 20, 10)
+
+    with create_app().app_context():
+        if args.reset:
+            db.drop_all()
+        db.create_all()
+        seed(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+"""生产环境启动入口：主进程加载一次应用，再 fork 出多个工作进程
+
+    python serve.py                       # 工作进程数默认等于 CPU 核数
+    python serve.py --workers 4 --port 8000
+    python serve.py --no-threaded         # 每个工作进程一次只处理一个请求
+
+工作进程共享主进程已加载的代码和数据（写时复制），启动只需 fork 的时间；
+默认每个工作进程为每个请求启动一个线程（werkzeug 不限制线程数）。工作进程异常退出时主进程会重新拉起。
+不支持 fork 的系统（Windows）退回单进程多线程模式。
+推送通知的订阅只保存在进程内，多个工作进程或关闭线程时停用推送（/api/stream 返回 204，客户端改用轮询）。
+"""
+import argparse
+import gc
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+
+from werkzeug.serving import make_server
+
+from app import (create_app, db, database_router, duplicate_indexes, found_image_index, image_pipeline, search_index,
+                 suggester, view_counter)
+
+
+def prepare(app):
+    """在 fork 之前完成需要写数据库的初始化，避免多个工作进程同时执行"""
+    with app.app_context():
+        with db.engine.begin() as connection:
+            if search_index.is_supported(connection):
+                search_index.ensure_index(connection)
+        # 联想、相似图片和重复检测索引在主进程构建一次，工作进程通过 fork 共享
+        suggester.build()
+        found_image_index.build()
+        for index in duplicate_indexes.values():
+            index.build()
+        # 关闭主进程持有的连接，工作进程各自建立自己的连接
+        for engine in db.engines.values():
+            engine.dispose()
+    if database_router.reader is not None:
+        database_router.reader.dispose()
+
+
+def run_worker(app, listener, threaded):
+    # Ctrl+C 由主进程统一处理，主进程收到后向工作进程发送 SIGTERM
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    server = make_server(*listener.getsockname()[:2], app, threaded=threaded, fd=listener.fileno())
+
+    def stop(signum, frame):
+        # serve_forever 在本线程中运行，shutdown() 会等待它退出，需要在另一个线程中调用
+        threading.Thread(target=server.shutdown, daemon=True).start()
+
+    signal.signal(signal.SIGTERM, stop)
+    server.serve_forever()
+    # 工作进程以 os._exit 退出，不会执行 atexit：先写入缓冲的浏览量，等待排队的图片处理完成
+    view_counter.flush()
+    image_pipeline.shutdown(wait=True)
+
+
+def spawn(app, listener, threaded):
+    pid = os.fork()
+    if pid == 0:
+        try:
+            run_worker(app, listener, threaded)
+        finally:
+            os._exit(0)
+    return pid
+
+
+def main():
+    parser = argparse.ArgumentParser(description='预先 fork 多进程的生产服务器')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='工作进程数，默认等于 CPU 核数')
+    parser.add_argument('--threaded', action=argparse.BooleanOptionalAction, default=True,
+                        help='工作进程是否为每个请求启动一个线程（默认开启）')
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    app = create_app()
+    # 发送消息的进程只能推送给连在本进程的页面，多个工作进程时大部分推送会丢失；
+    # 不开启线程时一个推送连接会占住整个工作进程
+    multiprocess = args.workers > 1 and hasattr(os, 'fork')
+    if app.config['NOTIFICATION_STREAM_ENABLED'] and (multiprocess or not args.threaded):
+        app.config['NOTIFICATION_STREAM_ENABLED'] = False
+        print('多个工作进程或单线程模式下停用推送通知，客户端改用轮询未读数', file=sys.stderr)
+    prepare(app)
+    print(f'应用加载完成，用时 {(time.perf_counter() - started) * 1000:.0f}ms')
+
+    if not hasattr(os, 'fork'):
+        print(f'当前系统不支持 fork，以单进程方式运行：http://{args.host}:{args.port}')
+        make_server(args.host, args.port, app, threaded=args.threaded).serve_forever()
+        return
+
+    listener = socket.socket(socket.AF_INET6 if ':' in args.host else socket.AF_INET, socket.SOCK_STREAM)
+    listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    listener.bind((args.host, args.port))
+    listener.listen(128)
+    listener.set_inheritable(True)
+
+    # 把已加载的对象移出垃圾回收的扫描范围，避免子进程 GC 时改写引用计数导致内存页被复制
+    gc.freeze()
+    workers = {spawn(app, listener, args.threaded) for _ in range(args.workers)}
+    print(f'已启动 {len(workers)} 个工作进程：http://{args.host}:{args.port}')
+
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in workers:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    while workers:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        workers.discard(pid)
+        if not stopping:
+            print(f'工作进程 {pid} 退出（状态 {status}），重新启动', file=sys.stderr)
+            workers.add(spawn(app, listener, args.threaded))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+"""SQLite 生产模式：WAL、连接参数调优、只读连接池与单写连接
+
+开启后：
+- 所有连接启用 WAL、synchronous=NORMAL、busy_timeout、mmap 和页缓存；
+- 查询走只读连接池（mode=ro），多个读请求可以同时进行，互不阻塞；
+- 写操作只通过一个写连接进行，事务以 BEGIN IMMEDIATE 开始，遇到其他进程持有写锁时
+  按指数退避重试，避免事务中途升级写锁时出现 "database is locked"。
+
+会话中一旦发生写入（flush 或执行 INSERT/UPDATE/DELETE），同一事务后续的查询也改走
+写连接，保证能读到本事务尚未提交的数据。
+"""
+import logging
+import random
+import time
+
+from flask_sqlalchemy.session import Session as BaseSession
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import OperationalError
+
+logger = logging.getLogger(__name__)
+
+
+class RoutingSession(BaseSession):
+    """按语句类型选择读连接池或写连接的会话"""
+
+    def __init__(self, db, router=None, **kwargs):
+        super().__init__(db, **kwargs)
+        self.router = router
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        engine = super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+        router = self.router
+        if bind is not None or router is None or router.reader is None or engine is not router.writer:
+            return engine
+        if clause is None:
+            # session.connection() 等未指定语句的情况
+            return engine
+        if self.info.get('writing') or not getattr(clause, 'is_select', False):
+            self.info['writing'] = True
+            return engine
+        return router.reader
+
+
+@event.listens_for(RoutingSession, 'before_flush')
+def mark_writing(session, flush_context, instances):
+    session.info['writing'] = True
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+@event.listens_for(RoutingSession, 'after_rollback')
+def reset_writing(session):
+    session.info.pop('writing', None)
+
+
+class SQLiteRouter:
+    def __init__(self, app=None):
+        self.enabled = False
+        self.writer = None
+        self.reader = None
+        if app is not None:
+            self.configure(app)
+
+    def configure(self, app):
+        """在创建 SQLAlchemy 之前调用：写连接池只保留一个连接"""
+        uri = app.config['SQLALCHEMY_DATABASE_URI']
+        # 内存数据库无法被多个连接共享，不适用
+        self.enabled = (app.config.get('SQLITE_PRODUCTION_MODE', False) and uri.startswith('sqlite')
+                        and uri not in ('sqlite://', 'sqlite:///:memory:'))
+        if not self.enabled:
+            return
+        options = app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', {})
+        options.setdefault('pool_size', 1)
+        options.setdefault('max_overflow', 0)
+        options.setdefault('pool_timeout', app.config.get('SQLITE_WRITE_TIMEOUT', 30))
+
+    def init_db(self, app, db):
+        """db.init_app 之后调用：注册连接参数并创建只读连接池"""
+        if not self.enabled:
+            return
+        config = app.config
+        self.writer = self.init_engine(app, db)
+        # 先用写连接把数据库切换到 WAL，只读连接才能与写连接并发
+        with self.writer.connect():
+            pass
+        self.reader = create_engine(
+            f'sqlite:///file:{self.writer.url.database}?mode=ro&uri=true',
+            pool_size=config.get('SQLITE_READ_POOL_SIZE', 8),
+            max_overflow=config.get('SQLITE_READ_POOL_OVERFLOW', 8),
+            pool_timeout=config.get('SQLITE_WRITE_TIMEOUT', 30),
+        )
+        self._listen(self.reader, config, read_only=True)
+
+    def init_engine(self, app, db):
+        """只为应用的数据库引擎注册连接参数，不经过只读连接池（管理后台子应用使用）"""
+        if not self.enabled:
+            return None
+        with app.app_context():
+            engine = db.engine
+        self._listen(engine, app.config, read_only=False)
+        return engine
+
+    def _listen(self, engine, config, read_only):
+        @event.listens_for(engine, 'connect')
+        def on_connect(dbapi_connection, connection_record):
+            # 由 SQLAlchemy 显式发出 BEGIN，pysqlite 不再自行管理事务
+            dbapi_connection.isolation_level = None
+            cursor = dbapi_connection.cursor()
+            cursor.execute(f'PRAGMA busy_timeout = {int(config.get("SQLITE_BUSY_TIMEOUT", 5000))}')
+            if not read_only:
+                cursor.execute('PRAGMA journal_mode = WAL')
+            cursor.execute('PRAGMA synchronous = NORMAL')
+            cursor.execute(f'PRAGMA mmap_size = {int(config.get("SQLITE_MMAP_SIZE", 256 * 1024 * 1024))}')
+            cursor.execute(f'PRAGMA cache_size = {int(config.get("SQLITE_CACHE_SIZE", -64000))}')
+            cursor.execute('PRAGMA temp_store = MEMORY')
+            cursor.close()
+
+        retries = config.get('SQLITE_WRITE_RETRIES', 5)
+        backoff = config.get('SQLITE_WRITE_RETRY_BACKOFF', 0.05)
+
+        @event.listens_for(engine, 'begin')
+        def on_begin(connection):
+            if read_only:
+                connection.exec_driver_sql('BEGIN')
+                return
+            for attempt in range(retries + 1):
+                try:
+                    connection.exec_driver_sql('BEGIN IMMEDIATE')
+                    return
+                except OperationalError as exc:
+                    if attempt == retries or 'locked' not in str(exc.orig):
+                        raise
+                    delay = backoff * (2 ** attempt) * (0.5 + random.random())
+                    logger.warning('数据库写锁被占用，%.0fms 后重试（第 %d 次）', delay * 1000, attempt + 1)
+                    time.sleep(delay)
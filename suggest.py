@@ -0,0 +1,175 @@
+"""标题与地点的输入联想
+
+已有物品的标题和地点按出现次数建成前缀树，每个节点保存该前缀下次数最多的 k 个词，
+查询只需沿前缀走到对应节点，不访问数据库。中文词同时以拼音全拼和首字母作为键
+（依赖 pypinyin，未安装时只按原文匹配并在启动时警告），输入 "tsg" 或 "tushu" 都能联想出"图书馆"。
+
+发布、修改、删除物品提交后增量更新；多进程部署时其他进程的变更要等定期重建后才能看到。
+"""
+import logging
+import threading
+import time
+import unicodedata
+
+try:
+    from pypinyin import lazy_pinyin
+except ImportError:  # 可选依赖
+    lazy_pinyin = None
+
+logger = logging.getLogger(__name__)
+
+
+def normalize(text):
+    """全角转半角、转小写、合并空白"""
+    return ' '.join(unicodedata.normalize('NFKC', text or '').lower().split())
+
+
+def has_chinese(text):
+    return any('一' <= char <= '鿿' for char in text)
+
+
+class Node:
+    __slots__ = ('children', 'top')
+
+    def __init__(self):
+        self.children = {}
+        self.top = ()  # ((次数, 规范化文本), ...)，按次数降序；整体替换，读取时无需加锁
+
+
+class SuggestionIndex:
+    """一个字段（标题或地点）的前缀树"""
+
+    def __init__(self, k=10, max_prefix=16, pinyin=True):
+        self.k = k
+        self.max_prefix = max_prefix
+        self.pinyin = pinyin and lazy_pinyin is not None
+        self.root = Node()
+        self.counts = {}  # 规范化文本 -> 次数
+        self.labels = {}  # 规范化文本 -> 显示文本（首次出现的原文）
+        self._keys = {}
+
+    def keys(self, text):
+        """文本的检索键：原文，以及拼音全拼和首字母"""
+        keys = self._keys.get(text)
+        if keys is None:
+            keys = {text.replace(' ', '')}
+            if self.pinyin and has_chinese(text):
+                syllables = lazy_pinyin(text.replace(' ', ''), errors=lambda chars: list(chars))
+                keys.add(''.join(syllables))
+                keys.add(''.join(syllable[0] for syllable in syllables if syllable))
+            keys = self._keys[text] = tuple(key[:self.max_prefix] for key in keys if key)
+        return keys
+
+    def add(self, label, amount=1):
+        text = normalize(label)
+        if not text:
+            return
+        count = self.counts.get(text, 0) + amount
+        keys = self.keys(text)
+        if count <= 0:
+            self.counts.pop(text, None)
+            self.labels.pop(text, None)
+            self._keys.pop(text, None)
+        else:
+            self.counts[text] = count
+            self.labels.setdefault(text, label.strip())
+        for key in keys:
+            node = self.root
+            for char in key:
+                node = node.children.setdefault(char, Node())
+                self._rank(node, text, count)
+
+    def _rank(self, node, text, count):
+        """更新节点的前 k 名；次数减少时被挤出前 k 名的词要等下次重建才会补上"""
+        present = any(entry[1] == text for entry in node.top)
+        if not present and (count <= 0 or (len(node.top) >= self.k and count <= node.top[-1][0])):
+            return
+        top = [entry for entry in node.top if entry[1] != text]
+        if count > 0:
+            top.append((count, text))
+        top.sort(key=lambda entry: -entry[0])
+        node.top = tuple(top[:self.k])
+
+    def lookup(self, prefix, limit=None):
+        node = self.root
+        for char in normalize(prefix).replace(' ', '')[:self.max_prefix]:
+            node = node.children.get(char)
+            if node is None:
+                return []
+        return [self.labels.get(text, text) for _, text in node.top[:limit or self.k]]
+
+
+class Suggester:
+    """按字段管理前缀树；loader() 返回 [(字段, 文本)]，在应用上下文中执行"""
+
+    def __init__(self, loader, fields=('title', 'location')):
+        self.loader = loader
+        self.fields = fields
+        self.app = None
+        self.k = 10
+        self.max_prefix = 16
+        self.pinyin = True
+        self.rebuild_interval = 3600
+        self._indexes = None
+        self._built_at = None
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+
+    def init_app(self, app):
+        self.app = app
+        self.k = app.config.get('SUGGEST_TOP_K', self.k)
+        self.max_prefix = app.config.get('SUGGEST_MAX_PREFIX', self.max_prefix)
+        self.pinyin = app.config.get('SUGGEST_PINYIN', self.pinyin)
+        self.rebuild_interval = app.config.get('SUGGEST_REBUILD_INTERVAL', self.rebuild_interval)
+        if self.pinyin and lazy_pinyin is None:
+            logger.warning('未安装 pypinyin，输入联想只按原文匹配（pip install -r requirements.txt）')
+
+    def build(self):
+        started = time.perf_counter()
+        indexes = {field: SuggestionIndex(self.k, self.max_prefix, self.pinyin) for field in self.fields}
+        for field, text in self.loader():
+            indexes[field].add(text)
+        with self._lock:
+            self._indexes = indexes
+            self._built_at = time.monotonic()
+        logger.info('联想索引构建完成，用时 %.0fms', (time.perf_counter() - started) * 1000)
+        return indexes
+
+    def _rebuild_in_background(self):
+        if not self._build_lock.acquire(blocking=False):
+            return  # 已有线程在重建
+
+        def run():
+            try:
+                with self.app.app_context():
+                    self.build()
+            except Exception:
+                logger.exception('联想索引重建失败')
+            finally:
+                self._build_lock.release()
+
+        threading.Thread(target=run, name='suggest-rebuild', daemon=True).start()
+
+    def lookup(self, field, prefix, limit=None):
+        indexes = self._indexes
+        if indexes is None:
+            # 首次查询时同步构建
+            with self._build_lock:
+                if self._indexes is None:
+                    self.build()
+            indexes = self._indexes
+        elif self.rebuild_interval and time.monotonic() - self._built_at >= self.rebuild_interval:
+            # 旧索引继续提供服务，后台重建完成后替换
+            self._rebuild_in_background()
+        index = indexes.get(field)
+        return index.lookup(prefix, limit) if index is not None else []
+
+    def update(self, changes):
+        """changes: [(字段, 文本, 增量)]；索引尚未构建时忽略，构建时会从数据库读取"""
+        indexes = self._indexes
+        if indexes is None:
+            return
+        with self._lock:
+            for field, text, amount in changes:
+                if field in indexes and text:
+                    indexes[field].add(text, amount)
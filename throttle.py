@@ -0,0 +1,49 @@
+"""登录尝试限流（令牌桶，进程内）
+
+每个键（IP 或用户名）一个桶，桶中最多 burst 个令牌，按 rate 个/分钟匀速补充；
+每次尝试消耗一个令牌，桶空时拒绝并给出需要等待的秒数。计数只保存在当前进程，
+多进程部署时每个进程单独计数。
+"""
+import threading
+import time
+
+
+class TokenBucketThrottle:
+    def __init__(self, rate=10, burst=5, max_keys=10000):
+        """rate：每分钟补充的令牌数；burst：桶容量"""
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def hit(self, key):
+        """消耗一个令牌；允许时返回 0，否则返回需要等待的秒数"""
+        now = time.monotonic()
+        per_second = self.rate / 60.0
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated) * per_second)
+            if tokens < 1:
+                self._buckets[key] = (tokens, now)
+                return (1 - tokens) / per_second
+            self._buckets[key] = (tokens - 1, now)
+            if len(self._buckets) > self.max_keys:
+                self._prune(now, per_second)
+            return 0
+
+    def _prune(self, now, per_second):
+        # 已经补满的桶与新桶等价，可以直接删除
+        full = [key for key, (tokens, updated) in self._buckets.items()
+                if tokens + (now - updated) * per_second >= self.burst]
+        for key in full:
+            del self._buckets[key]
+        # 仍然过多时删除最久未使用的一半
+        if len(self._buckets) > self.max_keys:
+            stale = sorted(self._buckets, key=lambda key: self._buckets[key][1])
+            for key in stale[:len(stale) // 2]:
+                del self._buckets[key]
+
+    def reset(self, key):
+        with self._lock:
+            self._buckets.pop(key, None)
@@ -0,0 +1,87 @@
+"""浏览量写回缓冲
+
+详情页的浏览次数先在内存中累加，由后台线程每隔几秒（或累计到一定次数时）
+合并成一次批量 UPDATE 写入数据库，详情页本身不再产生写事务。
+"""
+import atexit
+import logging
+import os
+import threading
+from collections import defaultdict
+
+logger = logging.getLogger(__name__)
+
+
+class ViewCounter:
+    def __init__(self, writer, flush_interval=5, flush_threshold=200):
+        """writer(batch) 负责持久化，batch 形如 {(模型, 物品ID): 增量}"""
+        self.writer = writer
+        self.flush_interval = flush_interval
+        self.flush_threshold = flush_threshold
+        self.app = None
+        self._pending = defaultdict(int)
+        self._hits = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._pid = None
+        atexit.register(self.flush)
+
+    def init_app(self, app):
+        """绑定应用后，writer 在该应用的上下文中执行"""
+        self.app = app
+        self.flush_interval = app.config.get('VIEW_COUNT_FLUSH_INTERVAL', self.flush_interval)
+        self.flush_threshold = app.config.get('VIEW_COUNT_FLUSH_THRESHOLD', self.flush_threshold)
+
+    def increment(self, model, item_id, amount=1):
+        self._ensure_thread()
+        with self._lock:
+            self._pending[(model, item_id)] += amount
+            self._hits += amount
+            if self._hits >= self.flush_threshold:
+                self._wakeup.set()
+
+    def pending(self, model, item_id):
+        """尚未写入数据库的浏览次数"""
+        with self._lock:
+            return self._pending.get((model, item_id), 0)
+
+    def flush(self):
+        """把缓冲的增量写入数据库；写入失败时放回缓冲等待下次重试"""
+        with self._flush_lock:
+            with self._lock:
+                batch = dict(self._pending)
+                self._pending.clear()
+                self._hits = 0
+            if not batch:
+                return
+            try:
+                if self.app is not None:
+                    with self.app.app_context():
+                        self.writer(batch)
+                else:
+                    self.writer(batch)
+            except Exception:
+                logger.exception('浏览量写入失败，稍后重试')
+                with self._lock:
+                    for key, amount in batch.items():
+                        self._pending[key] += amount
+                        self._hits += amount
+
+    def _ensure_thread(self):
+        # fork 之后子进程需要重新启动自己的刷新线程
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='view-counter', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()